@@ -0,0 +1,300 @@
+"""
+Redis-backed admission control: a global limit on concurrently running generation jobs
+"""
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from redis import asyncio as aioredis
+from app.config import settings
+from app.database import get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+INFLIGHT_KEY = "admission:inflight"  # zset: job id -> lease expiry (unix time)
+QUEUE_KEY = "admission:queue"  # zset: job id -> enqueue time (FIFO)
+PAYLOAD_KEY = "admission:payload"  # hash: job id -> JSON describing what to submit
+AVG_SECONDS_KEY = "admission:avg_job_seconds"  # EWMA of job run time
+
+# Smoothing factor for the job run time average
+EWMA_ALPHA = 0.2
+
+# Admit immediately if a slot is free and nobody is waiting, otherwise queue
+# (unless the queue is full). Expired leases (crashed workers) are dropped first.
+# Returns {1} admitted, {0, position} queued, {-1, depth} rejected.
+_ADMIT_SCRIPT = """
+local now = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local running = redis.call('ZCARD', KEYS[1])
+local waiting = redis.call('ZCARD', KEYS[2])
+if running < tonumber(ARGV[3]) and waiting == 0 then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[5]), ARGV[1])
+    return {1}
+end
+if waiting >= tonumber(ARGV[4]) then
+    return {-1, waiting}
+end
+redis.call('ZADD', KEYS[2], now, ARGV[1])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[6])
+return {0, redis.call('ZRANK', KEYS[2], ARGV[1])}
+"""
+
+# Move queued jobs into free slots (FIFO) and return them with their payloads
+_NEXT_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local admitted = {}
+while redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) do
+    local head = redis.call('ZRANGE', KEYS[2], 0, 0)
+    if #head == 0 then
+        break
+    end
+    local job_id = head[1]
+    redis.call('ZREM', KEYS[2], job_id)
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), job_id)
+    local payload = redis.call('HGET', KEYS[3], job_id)
+    redis.call('HDEL', KEYS[3], job_id)
+    table.insert(admitted, job_id)
+    table.insert(admitted, payload or '{}')
+end
+return admitted
+"""
+
+
+class QueueFullError(Exception):
+    """Raised when the admission queue is at MAX_QUEUE_DEPTH"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """Outcome of an admission request"""
+
+    def __init__(self, admitted: bool, position: Optional[int] = None, eta_seconds: Optional[float] = None):
+        """
+        Create a ticket
+
+        Args:
+            admitted: True if the job may be submitted now
+            position: 0-based queue position if it has to wait
+            eta_seconds: Estimated wait before the job starts
+        """
+        self.admitted = admitted
+        self.position = position
+        self.eta_seconds = eta_seconds
+
+
+def _eta(position: int, avg_job_seconds: float) -> float:
+    """Estimated wait for a queue position, assuming all slots turn over at the average rate"""
+    limit = max(settings.MAX_CONCURRENT_JOBS, 1)
+    return (position // limit + 1) * avg_job_seconds
+
+
+def _decode_admitted(flat: List[Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Pairs of (job id, payload) from the flat list returned by _NEXT_SCRIPT"""
+    return [(flat[i], json.loads(flat[i + 1])) for i in range(0, len(flat), 2)]
+
+
+class AdmissionController:
+    """
+    Enforce MAX_CONCURRENT_JOBS across all workers
+
+    The API admits a job before submitting it to Celery. If every slot is
+    taken the job waits in a Redis FIFO queue (never in the broker) and is
+    submitted when a worker finishes a job and releases its slot, or when a
+    poll finds a slot freed by an expired lease. Once MAX_QUEUE_DEPTH jobs
+    are waiting, new requests are rejected so latency stays bounded.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis):
+        """
+        Initialize admission controller
+
+        Args:
+            redis_client: Async Redis client
+        """
+        self.redis = redis_client
+
+    async def admit(self, job_id: str, payload: Dict[str, Any]) -> AdmissionTicket:
+        """
+        Take a slot for a job or queue it
+
+        Args:
+            job_id: Job (or batch) id
+            payload: What to submit once admitted (see tasks.dispatch_admitted)
+
+        Returns:
+            AdmissionTicket (admitted, or queued with position and ETA)
+
+        Raises:
+            QueueFullError: If the queue is at MAX_QUEUE_DEPTH
+        """
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return AdmissionTicket(admitted=True)
+
+        try:
+            result = await self.redis.eval(
+                _ADMIT_SCRIPT, 3, INFLIGHT_KEY, QUEUE_KEY, PAYLOAD_KEY,
+                job_id, time.time(), settings.MAX_CONCURRENT_JOBS, settings.MAX_QUEUE_DEPTH,
+                settings.ADMISSION_LEASE_SECONDS, json.dumps(payload)
+            )
+        except Exception as e:
+            # Never block generation on Redis problems
+            logger.warning(f"Admission check failed for {job_id}, admitting without limit: {e}")
+            return AdmissionTicket(admitted=True)
+
+        if result[0] == 1:
+            return AdmissionTicket(admitted=True)
+
+        avg_job_seconds = await self.average_job_seconds()
+
+        if result[0] == -1:
+            limit = max(settings.MAX_CONCURRENT_JOBS, 1)
+            raise QueueFullError(retry_after=max(1, math.ceil(avg_job_seconds * result[1] / limit)))
+
+        position = int(result[1])
+        logger.info(f"Job {job_id} queued at position {position}")
+        return AdmissionTicket(admitted=False, position=position, eta_seconds=_eta(position, avg_job_seconds))
+
+    async def position(self, job_id: str) -> Optional[AdmissionTicket]:
+        """
+        Current queue position of a waiting job
+
+        Args:
+            job_id: Job (or batch) id
+
+        Returns:
+            AdmissionTicket with position and ETA, or None if the job is no longer queued
+        """
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return None
+
+        try:
+            position = await self.redis.zrank(QUEUE_KEY, job_id)
+        except Exception as e:
+            logger.warning(f"Queue position lookup failed for {job_id}: {e}")
+            return None
+
+        if position is None:
+            return None
+
+        return AdmissionTicket(
+            admitted=False,
+            position=int(position),
+            eta_seconds=_eta(int(position), await self.average_job_seconds())
+        )
+
+    async def next_admitted(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Move queued jobs into free slots (e.g. after a worker crashed and its lease expired)
+
+        Returns:
+            List of (job id, payload) the caller must now submit
+        """
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return []
+
+        try:
+            flat = await self.redis.eval(
+                _NEXT_SCRIPT, 3, INFLIGHT_KEY, QUEUE_KEY, PAYLOAD_KEY,
+                time.time(), settings.MAX_CONCURRENT_JOBS, settings.ADMISSION_LEASE_SECONDS
+            )
+            return _decode_admitted(flat)
+        except Exception as e:
+            logger.warning(f"Admission dispatch failed: {e}")
+            return []
+
+    async def cancel(self, job_id: str):
+        """
+        Give back a slot or queue entry for a job that could not be submitted
+
+        Args:
+            job_id: Job (or batch) id
+        """
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return
+
+        try:
+            await self.redis.zrem(INFLIGHT_KEY, job_id)
+            await self.redis.zrem(QUEUE_KEY, job_id)
+            await self.redis.hdel(PAYLOAD_KEY, job_id)
+        except Exception as e:
+            logger.warning(f"Admission cancel failed for {job_id}: {e}")
+
+    async def average_job_seconds(self) -> float:
+        """Smoothed run time of recent jobs (default until the first job finishes)"""
+        try:
+            value = await self.redis.get(AVG_SECONDS_KEY)
+        except Exception:
+            value = None
+        return float(value) if value else float(settings.ADMISSION_DEFAULT_JOB_SECONDS)
+
+
+# ===== Worker side =====
+
+def acquire_slot(job_id: str) -> bool:
+    """
+    Take a slot from inside a worker (background work that must yield to user jobs)
+
+    Only succeeds if a slot is free and no user job is waiting for one.
+
+    Args:
+        job_id: Id the slot is held under
+
+    Returns:
+        True if the slot was taken
+    """
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        return True
+
+    try:
+        # A queue depth of 0 means "admit now or not at all"
+        result = get_sync_redis().eval(
+            _ADMIT_SCRIPT, 3, INFLIGHT_KEY, QUEUE_KEY, PAYLOAD_KEY,
+            job_id, time.time(), settings.MAX_CONCURRENT_JOBS, 0,
+            settings.ADMISSION_LEASE_SECONDS, "{}"
+        )
+        return result[0] == 1
+    except Exception as e:
+        logger.warning(f"Admission check failed for {job_id}: {e}")
+        return False
+
+
+def release_slot(job_id: str, elapsed_seconds: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Free a finished job's slot and hand it to the next queued jobs
+
+    Args:
+        job_id: Job (or batch) id that finished
+        elapsed_seconds: Run time, folded into the ETA average (None if it failed)
+
+    Returns:
+        List of (job id, payload) the caller must now submit
+    """
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        return []
+
+    try:
+        client = get_sync_redis()
+        client.zrem(INFLIGHT_KEY, job_id)
+
+        if elapsed_seconds is not None:
+            previous = client.get(AVG_SECONDS_KEY)
+            average = elapsed_seconds if previous is None else (
+                EWMA_ALPHA * elapsed_seconds + (1 - EWMA_ALPHA) * float(previous)
+            )
+            client.set(AVG_SECONDS_KEY, average)
+
+        flat = client.eval(
+            _NEXT_SCRIPT, 3, INFLIGHT_KEY, QUEUE_KEY, PAYLOAD_KEY,
+            time.time(), settings.MAX_CONCURRENT_JOBS, settings.ADMISSION_LEASE_SECONDS
+        )
+        return _decode_admitted(flat)
+
+    except Exception as e:
+        # The slot's lease expires on its own
+        logger.warning(f"Admission release failed for {job_id}: {e}")
+        return []
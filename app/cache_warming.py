@@ -0,0 +1,124 @@
+"""
+Off-peak cache warming: pre-generate songs for likely words before kids ask for them
+"""
+import logging
+from datetime import date
+from typing import Iterable, List, Set
+import redis
+from redis import asyncio as aioredis
+from app.config import settings
+from app.services.rhyme_service import PRESCHOOL_VOCAB, validate_word
+from app.single_flight import SongSingleFlight
+from app.themes.theme_config import THEME_WORDS
+
+logger = logging.getLogger(__name__)
+
+# zset: word -> number of /api/generate cache misses
+POPULARITY_KEY = "popularity:words"
+
+# Per-day TTS character spend of the warmer (date suffixed)
+TTS_BUDGET_KEY_PREFIX = "warm:tts_chars:"
+
+# Assumed TTS characters per song until a real song has been measured
+DEFAULT_SONG_CHARACTERS = 250
+
+
+async def record_cache_miss(redis_client: aioredis.Redis, word: str):
+    """
+    Count a cache miss so the warmer prioritizes popular words
+
+    Args:
+        redis_client: Async Redis client
+        word: Normalized input word
+    """
+    try:
+        await redis_client.zincrby(POPULARITY_KEY, 1, word)
+    except Exception as e:
+        logger.warning(f"Could not record popularity for '{word}': {e}")
+
+
+class CacheWarmer:
+    """
+    Choose words to pre-generate and enforce the warmer's TTS budget
+
+    Candidates are ordered by popularity (cache misses seen by the API),
+    then theme words, then the preschool vocabulary. Words already cached,
+    currently being generated, or not valid input are skipped. The daily
+    TTS character budget is tracked in Redis so it holds across runs and
+    workers.
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        """
+        Initialize cache warmer
+
+        Args:
+            redis_client: Synchronous Redis client (runs inside a Celery worker)
+        """
+        self.redis = redis_client
+
+    def candidates(self, cached_words: Set[str], limit: int) -> List[str]:
+        """
+        Words worth generating next
+
+        Args:
+            cached_words: Words already in the song cache
+            limit: Maximum number of words to return
+
+        Returns:
+            Words in priority order
+        """
+        popular = [
+            word for word, _ in self.redis.zrevrange(
+                POPULARITY_KEY, 0, settings.CACHE_WARM_POPULAR_WORDS - 1, withscores=True
+            )
+        ]
+        theme_words = sorted(word for words in THEME_WORDS.values() for word in words)
+        vocab_words = sorted(PRESCHOOL_VOCAB)
+
+        selected = []
+        for word in self._unique(popular + theme_words + vocab_words):
+            if len(selected) >= limit:
+                break
+            if word in cached_words or not self._is_candidate(word):
+                continue
+            if self.redis.exists(f"{SongSingleFlight.KEY_PREFIX}{word}"):
+                # A user request is generating it right now (warm_song_task claims the key before generating)
+                continue
+            selected.append(word)
+
+        return selected
+
+    def remaining_budget(self) -> int:
+        """
+        TTS characters the warmer may still spend today
+
+        Returns:
+            Remaining characters (never negative)
+        """
+        spent = int(float(self.redis.get(self._budget_key()) or 0))
+        return max(settings.CACHE_WARM_TTS_CHAR_BUDGET - spent, 0)
+
+    def spend(self, characters: float):
+        """
+        Record TTS characters used by a warmed song
+
+        Args:
+            characters: Characters sent to TTS
+        """
+        key = self._budget_key()
+        self.redis.incrbyfloat(key, characters)
+        # Keep the counter a little longer than the day it covers
+        self.redis.expire(key, 2 * 24 * 60 * 60)
+
+    def _budget_key(self) -> str:
+        return f"{TTS_BUDGET_KEY_PREFIX}{date.today().isoformat()}"
+
+    @staticmethod
+    def _is_candidate(word: str) -> bool:
+        """Valid input and long enough to make a song about"""
+        return len(word) >= 3 and validate_word(word)
+
+    @staticmethod
+    def _unique(words: Iterable[str]) -> List[str]:
+        return list(dict.fromkeys(word.lower() for word in words))
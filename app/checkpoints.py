@@ -0,0 +1,235 @@
+"""
+Per-job stage checkpoints so retries resume from the last good stage
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Optional
+from app.config import settings
+from app.services.audio_buffer import AudioBuffer
+
+logger = logging.getLogger(__name__)
+
+# Stages whose artifacts are checkpointed, in pipeline order
+LYRICS = "lyrics"
+VOCALS = "vocals"
+INSTRUMENTAL = "instrumental"
+MIX = "mix"
+TIMINGS = "timings"
+
+
+class CheckpointStore:
+    """
+    Stage artifacts of one generation job, stored under TEMP_DIR/checkpoints/<job_id>
+
+    JSON artifacts (lyrics, mix metadata, timings) are written as
+    <stage>.json and audio artifacts (vocals, instrumental) as lossless
+    <stage>.wav. Every file is written to a temporary name and renamed into
+    place, so a checkpoint either exists completely or not at all. A
+    manifest records the word the checkpoints belong to; a mismatch (e.g. a
+    reused job id) discards them.
+
+    Example:
+        checkpoints = CheckpointStore(job_id, word)
+        lyrics_data = checkpoints.load_json(LYRICS)
+        if lyrics_data is None:
+            lyrics_data = generate_lyrics(word)
+            checkpoints.save_json(LYRICS, lyrics_data)
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, job_id: str, word: str, root: Optional[Path] = None):
+        """
+        Open (or create) the checkpoint directory of a job
+
+        Args:
+            job_id: Job identifier
+            word: Word being generated
+            root: Base directory (defaults to TEMP_DIR/checkpoints)
+        """
+        self.job_id = job_id
+        self.word = word
+        self.directory = Path(root or checkpoint_root()) / job_id
+        self.enabled = settings.CHECKPOINTS_ENABLED
+
+        if self.enabled:
+            self._open()
+
+    def _open(self):
+        """Create the directory and validate the manifest"""
+        manifest_path = self.directory / self.MANIFEST
+        manifest = self._read_json(manifest_path)
+
+        if manifest is not None and manifest.get('word') != self.word:
+            logger.warning(f"[{self.job_id}] Discarding checkpoints for '{manifest.get('word')}'")
+            self.clear()
+            manifest = None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        if manifest is None:
+            self._write_json(manifest_path, {'job_id': self.job_id, 'word': self.word})
+        else:
+            logger.info(f"[{self.job_id}] Resuming from checkpoints: {self.completed_stages()}")
+
+    def completed_stages(self) -> list:
+        """
+        Stages with a stored artifact
+
+        Returns:
+            List of stage names
+        """
+        if not self.directory.exists():
+            return []
+
+        return sorted(
+            path.stem for path in self.directory.iterdir()
+            if path.name != self.MANIFEST and path.suffix in ('.json', '.wav')
+        )
+
+    def has(self, stage: str) -> bool:
+        """
+        Check whether a stage has a stored artifact
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            True if the stage can be skipped
+        """
+        return self.enabled and stage in self.completed_stages()
+
+    def load_json(self, stage: str) -> Optional[Any]:
+        """
+        Load a JSON checkpoint
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            Stored data, or None if the stage has no checkpoint
+        """
+        if not self.enabled:
+            return None
+
+        data = self._read_json(self.directory / f"{stage}.json")
+        if data is not None:
+            logger.info(f"[{self.job_id}] Reusing '{stage}' checkpoint")
+        return data
+
+    def save_json(self, stage: str, data: Any):
+        """
+        Store a JSON checkpoint
+
+        Args:
+            stage: Stage name
+            data: JSON-serializable artifact
+        """
+        if self.enabled:
+            self._write_json(self.directory / f"{stage}.json", data)
+
+    def load_audio(self, stage: str) -> Optional[AudioBuffer]:
+        """
+        Load an audio checkpoint
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            Decoded audio, or None if the stage has no checkpoint
+        """
+        path = self.audio_path(stage)
+        if not self.enabled or not path.exists():
+            return None
+
+        try:
+            audio = AudioBuffer.from_file(str(path))
+        except Exception as e:
+            logger.warning(f"[{self.job_id}] Ignoring unreadable '{stage}' checkpoint: {e}")
+            return None
+
+        logger.info(f"[{self.job_id}] Reusing '{stage}' checkpoint")
+        return audio
+
+    def save_audio(self, stage: str, audio: AudioBuffer) -> Optional[str]:
+        """
+        Store an audio checkpoint as WAV
+
+        Args:
+            stage: Stage name
+            audio: Audio to store
+
+        Returns:
+            Path to the checkpoint file, or None if checkpoints are disabled
+        """
+        if not self.enabled:
+            return None
+
+        path = self.audio_path(stage)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        audio.export(str(tmp_path), format="wav")
+        os.replace(tmp_path, path)
+
+        return str(path)
+
+    def audio_path(self, stage: str) -> Path:
+        """Location of an audio checkpoint"""
+        return self.directory / f"{stage}.wav"
+
+    def clear(self):
+        """Delete all checkpoints of the job (after it completed)"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _read_json(self, path: Path) -> Optional[Any]:
+        """Read a JSON file, treating missing or corrupt files as absent"""
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"[{self.job_id}] Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+    def _write_json(self, path: Path, data: Any):
+        """Atomically write a JSON file"""
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+def checkpoint_root() -> Path:
+    """Directory holding one checkpoint directory per job"""
+    return settings.TEMP_DIR / "checkpoints"
+
+
+def cleanup_checkpoints(max_age_seconds: float) -> int:
+    """
+    Delete checkpoint directories of jobs that were never resumed
+
+    Args:
+        max_age_seconds: Age after which a job's checkpoints are dropped
+
+    Returns:
+        Number of job directories removed
+    """
+    root = checkpoint_root()
+    if not root.exists():
+        return 0
+
+    cutoff_time = time.time() - max_age_seconds
+    deleted_count = 0
+
+    for job_dir in root.iterdir():
+        if job_dir.is_dir() and job_dir.stat().st_mtime < cutoff_time:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            deleted_count += 1
+            logger.debug(f"Deleted stale checkpoints: {job_dir}")
+
+    return deleted_count
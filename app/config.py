@@ -16,6 +16,40 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # Celery pipeline
+    PIPELINE_MODE: str = "monolithic"  # Options: "monolithic" (one task) or "staged" (chain of stage tasks)
+    CELERY_QUEUE_LLM: str = "llm"  # Rhymes + Gemini lyrics stage (I/O-bound)
+    CELERY_QUEUE_TTS: str = "tts"  # ElevenLabs/Bark vocals stage
+    CELERY_QUEUE_DSP: str = "dsp"  # Instrumental, mix and alignment stages (CPU-bound)
+
+    # Worker warm start: build services once per worker process instead of per task
+    WORKER_WARM_START: bool = True  # Warm up on worker_process_init (CMU dict, beat catalog, track index, clients)
+    WORKER_PRELOAD_TTS: bool = True  # Also build the TTS generator at start (loads Bark if it is provider/fallback)
+    WORKER_CONCURRENCY: int = 0  # Celery worker processes per node (0 = Celery default, one per CPU core)
+
+    # Single-flight: concurrent requests for the same word share one generation job
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_TTL_SECONDS: int = 1200  # Safety expiry if a job is never polled to completion; restarted on queue polls and on admission, so keep it above ADMISSION_LEASE_SECONDS
+
+    # Batch generation (POST /api/generate/batch)
+    BATCH_MAX_WORDS: int = 30  # Largest accepted word list
+    BATCH_LYRICS_WORDS_PER_REQUEST: int = 8  # Words whose lyrics share one Gemini request
+    BATCH_SONG_CONCURRENCY: int = 4  # Songs of a batch voiced/mixed concurrently (TTS requests in flight)
+
+    # Cache warming (Celery beat): pre-generate likely words off-peak
+    CACHE_WARMING_ENABLED: bool = True
+    CACHE_WARM_HOURS: str = "1-5"  # Crontab hours (UTC) the warmer runs at, once per hour
+    CACHE_WARM_MAX_SONGS: int = 20  # Songs per run
+    CACHE_WARM_INTERVAL_SECONDS: float = 30.0  # Countdown before the next warmed song is queued (rate cap)
+    CACHE_WARM_TTS_CHAR_BUDGET: int = 20000  # TTS characters the warmer may spend per day
+    CACHE_WARM_POPULAR_WORDS: int = 200  # Most-requested cache misses considered first
+
+    # Checkpoints: stage artifacts are kept under the job id so retries skip completed stages
+    CHECKPOINTS_ENABLED: bool = True
+    CHECKPOINT_MAX_AGE_HOURS: int = 24  # Checkpoints of jobs never resumed are cleaned up after this
+    JOB_MAX_RETRIES: int = 2  # Automatic retries of a failed job (or stage, in staged mode)
+    JOB_RETRY_DELAY_SECONDS: int = 5
+
     # MongoDB
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "pirate_karaoke"
@@ -26,6 +60,11 @@ class Settings(BaseSettings):
     INSTRUMENTAL_VOLUME: float = 0.4
     PIRATE_SHANTY_BPM_MIN: int = 90
     PIRATE_SHANTY_BPM_MAX: int = 110
+    IN_MEMORY_PIPELINE: bool = True  # Pass PCM between stages, encode only the final song
+    PIPELINE_STAGE_WORKERS: int = 4  # Threads running independent in-memory stages concurrently
+    STREAM_TTS_LOOKAHEAD: int = 2  # Streaming mode: lyric lines synthesized ahead of the one being mixed
+    STREAM_LINE_GAP_SECONDS: float = 0.3  # Streaming mode: breath between lines (lines are voiced separately)
+    STREAM_MAX_AGE_HOURS: int = 24  # Per-line stream segments are deleted after this long
 
     # Background Music Settings
     USE_CUSTOM_BACKGROUND_MUSIC: bool = True  # Use custom tracks instead of generated beats
@@ -34,6 +73,9 @@ class Settings(BaseSettings):
     # TTS Provider Selection
     TTS_PROVIDER: str = "elevenlabs"  # Options: "elevenlabs" or "bark"
     TTS_FALLBACK_TO_BARK: bool = True  # Use Bark if ElevenLabs fails
+    TTS_LINE_MODE: bool = False  # Synthesize each unique lyric line separately (cached per line) and stitch them
+    TTS_LINE_CONCURRENCY: int = 4  # Lines in flight at once in line mode
+    TTS_LINE_GAP_SECONDS: float = 0.3  # Pause between stitched lines
 
     # ElevenLabs TTS Settings (Primary - Professional Quality)
     ELEVENLABS_VOICE_ID: str = "EXAVITQu4vr4xnSDxMaL"  # Bella - young, warm teacher voice
@@ -42,16 +84,46 @@ class Settings(BaseSettings):
     ELEVENLABS_SIMILARITY: float = 0.6  # Lower for more variation (0-1)
     ELEVENLABS_STYLE: float = 0.8  # Higher for more singing style (0-1)
     ELEVENLABS_BOOST: bool = True  # Speaker boost for clarity
+    ELEVENLABS_OUTPUT_FORMAT: str = "pcm_24000"  # Raw PCM skips an MP3 decode; "mp3_44100_128" for MP3
+
+    # TTS cache: content-addressed takes on disk, shared by every job (and retry) asking for the same text
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_DIR: Path = Path("tts_cache")
+    TTS_CACHE_MAX_MB: int = 1024  # Least recently used takes are evicted beyond this
 
     # Bark TTS Settings (Fallback - Expressive Quality)
     BARK_MODEL: str = "suno/bark"
     BARK_VOICE_PRESET: str = "v2/en_speaker_9"  # Warm, soft female teacher voice
     BARK_TEMPERATURE: float = 0.7  # Controls randomness/expressiveness (0.0-1.0)
     BARK_USE_GPU: bool = True  # Enable GPU acceleration
+    BARK_CPU_PROFILE: str = "default"  # CPU-only nodes: "default", "fast" (int8 + BetterTransformer), "small", "small-quantized"
+    BARK_CPU_THREADS: int = 0  # Torch threads per worker process (0 = CPU cores / WORKER_CONCURRENCY)
+    BARK_OFFLOAD_IDLE_SUBMODELS: bool = False  # GPU nodes: keep only the active sub-model on the GPU
     BARK_SINGING_MODE: bool = True  # Enable teacher-style expressive reading
     BARK_SEMANTIC_TEMP: float = 0.9  # Semantic (higher = more expressive)
     BARK_COARSE_TEMP: float = 0.8  # Coarse (higher = more varied)
     BARK_FINE_TEMP: float = 0.7  # Fine (higher = more natural)
+    BARK_SEED: Optional[int] = None  # Fixed sampling seed for reproducible Bark takes (part of the TTS cache key)
+    BARK_BATCH_SIZE: int = 8  # Lyric chunks per generate() call (1 = one chunk at a time)
+    BARK_BATCH_WINDOW_MS: int = 0  # Wait this long to batch chunks of songs generated concurrently (0 = per song)
+    BARK_SNAPSHOT_ENABLED: bool = False  # Memory-map Bark weights from a local safetensors snapshot (written on first load)
+    BARK_SNAPSHOT_DIR: Path = Path("models/bark")  # Where snapshots are kept (one per checkpoint and dtype)
+    BARK_LAZY_LOAD: bool = True  # When Bark is only the fallback, load it on first fallback instead of at startup
+    BARK_IDLE_UNLOAD_SECONDS: int = 900  # Unload a lazily loaded Bark after this long unused (0 = keep loaded)
+    BARK_PREWARM_ERROR_RATE: float = 0.3  # Pre-warm Bark when this share of recent ElevenLabs requests fail (0 = off)
+    BARK_PREWARM_WINDOW: int = 20  # Recent ElevenLabs requests the error rate is measured over
+    BARK_TOKEN_BUDGET: bool = True  # Cap each chunk's semantic tokens by its syllable count instead of Bark's fixed 768
+    BARK_SYLLABLES_PER_SECOND: float = 3.0  # Sung syllable rate the budget assumes
+    BARK_TOKEN_BUDGET_MARGIN: float = 1.5  # Headroom over the estimated length
+    BARK_MIN_EOS_P: Optional[float] = 0.2  # Stop semantic generation once end-of-speech is this likely (None = Bark default; needs transformers 4.35+)
+    BARK_TRIM_SILENCE: bool = True  # Trim trailing silence from every generated chunk
+    BARK_SILENCE_THRESHOLD_DB: float = -40.0  # Frames this far below the chunk's loudest frame count as silence
+    BARK_SEMANTIC_CACHE_SIZE: int = 512  # Chunks whose semantic tokens are kept for reuse, e.g. choruses (0 = off)
+    BARK_SERVER_ENABLED: bool = False  # Send Bark work to the shared server (python -m app.services.bark_server) instead of loading a model per worker
+    BARK_SERVER_SOCKET: Path = Path("temp/bark/bark.sock")  # Unix socket the Bark server listens on (its directory is made private, mode 0700)
+    BARK_SERVER_BATCH_WINDOW_MS: int = 50  # Server-side wait to batch chunks from different workers
+    BARK_SERVER_TIMEOUT_SECONDS: float = 600.0  # Longest a worker waits for the server's reply
+    BARK_SERVER_AUTHKEY: Optional[str] = None  # Optional shared secret checked on every connection (on top of the private socket)
 
     # Directories
     BEATS_DIR: Path = Path("beats")
@@ -60,7 +132,11 @@ class Settings(BaseSettings):
     BACKGROUND_MUSIC_DIR: Path = Path("background_music")
 
     # Application
-    MAX_CONCURRENT_JOBS: int = 3
+    MAX_CONCURRENT_JOBS: int = 3  # Generation jobs running at once across all workers (admission control)
+    ADMISSION_CONTROL_ENABLED: bool = True  # Queue jobs beyond MAX_CONCURRENT_JOBS in Redis instead of the broker
+    MAX_QUEUE_DEPTH: int = 20  # Waiting jobs beyond this get 429 with Retry-After
+    ADMISSION_LEASE_SECONDS: int = 900  # A slot is freed after this long even if its worker died
+    ADMISSION_DEFAULT_JOB_SECONDS: float = 60.0  # ETA estimate until real job times are measured
     CACHE_EXPIRY_DAYS: int = 7
     DEBUG: bool = False
 
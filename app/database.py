@@ -1,8 +1,13 @@
 """
-MongoDB database setup using Motor (async driver) and Beanie (ODM)
+MongoDB database setup using Motor (async driver) and Beanie (ODM),
+plus the shared async Redis client used by the API and synchronous
+clients for Celery workers
 """
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
+from pymongo import MongoClient
+import redis
+from redis import asyncio as aioredis
 import logging
 from app.config import settings
 
@@ -11,6 +16,13 @@ logger = logging.getLogger(__name__)
 # MongoDB client (will be initialized on startup)
 mongodb_client: AsyncIOMotorClient = None
 
+# Redis client (will be initialized on startup)
+redis_client: aioredis.Redis = None
+
+# Synchronous clients for Celery workers (created on first use)
+sync_mongodb_client: MongoClient = None
+sync_redis_client: redis.Redis = None
+
 
 async def connect_to_mongo():
     """Connect to MongoDB and initialize Beanie"""
@@ -26,12 +38,12 @@ async def connect_to_mongo():
         database = mongodb_client[settings.MONGODB_DB_NAME]
 
         # Import models
-        from app.models import Job, SongCache, UserLibrary, User
+        from app.models import Job, Batch, SongCache, UserLibrary, User
 
         # Initialize Beanie with models
         await init_beanie(
             database=database,
-            document_models=[Job, SongCache, UserLibrary, User]
+            document_models=[Job, Batch, SongCache, UserLibrary, User]
         )
 
         logger.info(f"Successfully connected to MongoDB database: {settings.MONGODB_DB_NAME}")
@@ -62,3 +74,64 @@ def get_database():
         raise RuntimeError("MongoDB client not initialized. Call connect_to_mongo() first.")
 
     return mongodb_client[settings.MONGODB_DB_NAME]
+
+
+async def connect_to_redis():
+    """Create the shared async Redis client"""
+    global redis_client
+
+    logger.info(f"Connecting to Redis at {settings.REDIS_URL}")
+    redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+async def close_redis_connection():
+    """Close the Redis client"""
+    global redis_client
+
+    if redis_client:
+        logger.info("Closing Redis connection")
+        await redis_client.close()
+        redis_client = None
+
+
+def get_redis() -> aioredis.Redis:
+    """
+    Get the shared async Redis client
+
+    Returns:
+        Redis client
+    """
+    if redis_client is None:
+        raise RuntimeError("Redis client not initialized. Call connect_to_redis() first.")
+
+    return redis_client
+
+
+def get_sync_database():
+    """
+    Get a synchronous MongoDB database for Celery workers
+
+    Returns:
+        pymongo database
+    """
+    global sync_mongodb_client
+
+    if sync_mongodb_client is None:
+        sync_mongodb_client = MongoClient(settings.MONGODB_URL)
+
+    return sync_mongodb_client[settings.MONGODB_DB_NAME]
+
+
+def get_sync_redis() -> redis.Redis:
+    """
+    Get a synchronous Redis client for Celery workers
+
+    Returns:
+        Redis client (responses decoded to str)
+    """
+    global sync_redis_client
+
+    if sync_redis_client is None:
+        sync_redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+    return sync_redis_client
@@ -3,18 +3,35 @@ FastAPI application for Pirate Karaoke Backend with MongoDB
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from celery.result import AsyncResult
 import logging
 import uuid
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
+from app.admission import AdmissionController, QueueFullError
+from app.cache_warming import record_cache_miss
 from app.config import settings
-from app.database import connect_to_mongo, close_mongo_connection
-from app.models import Job, SongCache, UserLibrary, User
-from app.tasks import generate_song_task
+from app.database import (
+    connect_to_mongo,
+    close_mongo_connection,
+    connect_to_redis,
+    close_redis_connection,
+    get_redis
+)
+from app.metrics import registry as metrics_registry
+from app.models import Job, Batch, SongCache, UserLibrary, User
+from app.tasks import (
+    dispatch_admitted,
+    generate_song_task,
+    resume_song_generation,
+    submit_batch_generation,
+    submit_song_generation
+)
 from app.services.rhyme_service import validate_word
+from app.single_flight import SongSingleFlight
 
 # Configure logging
 logging.basicConfig(
@@ -48,6 +65,7 @@ app.mount("/outputs", StaticFiles(directory=str(settings.OUTPUT_DIR)), name="out
 class GenerateRequest(BaseModel):
     """Request model for song generation"""
     word: str
+    stream: bool = False  # Publish each lyric line as soon as it is mixed (HLS playlist under /outputs)
 
 
 class JobResponse(BaseModel):
@@ -57,6 +75,24 @@ class JobResponse(BaseModel):
     progress: Optional[int] = 0
     error: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
+    queue_position: Optional[int] = None  # 0-based, while waiting for a free slot
+    eta_seconds: Optional[float] = None  # Estimated wait before the job starts
+    stream: Optional[Dict[str, Any]] = None  # Streaming jobs: playlist_url and segments published so far
+
+
+class BatchGenerateRequest(BaseModel):
+    """Request model for batch song generation"""
+    words: List[str]
+
+
+class BatchResponse(BaseModel):
+    """Response model for batch status"""
+    batch_id: str
+    status: str
+    progress: int = 0
+    queue_position: Optional[int] = None
+    eta_seconds: Optional[float] = None
+    jobs: Dict[str, JobResponse]
 
 
 class SongResponse(BaseModel):
@@ -76,6 +112,7 @@ async def startup_event():
     logger.info("Starting Pirate Karaoke API...")
     await connect_to_mongo()
     logger.info("MongoDB connected and ready")
+    await connect_to_redis()
 
 
 @app.on_event("shutdown")
@@ -83,6 +120,17 @@ async def shutdown_event():
     """Close MongoDB connection on shutdown"""
     logger.info("Shutting down Pirate Karaoke API...")
     await close_mongo_connection()
+    await close_redis_connection()
+
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request, exc: QueueFullError):
+    """Reject new work with 429 while the generation queue is full"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many songs are being made right now. Please try again soon."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 
 # API endpoints
@@ -95,8 +143,12 @@ async def root():
         "database": "MongoDB",
         "endpoints": {
             "generate": "POST /api/generate",
+            "generate_batch": "POST /api/generate/batch",
+            "batch_status": "GET /api/batches/{batch_id}",
             "job_status": "GET /api/jobs/{job_id}",
-            "cache": "GET /api/cache/{word}"
+            "resume_job": "POST /api/jobs/{job_id}/resume",
+            "cache": "GET /api/cache/{word}",
+            "metrics": "GET /metrics"
         }
     }
 
@@ -107,13 +159,22 @@ async def health_check():
     return {"status": "healthy", "service": "pirate-karaoke", "database": "mongodb"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage song generation metrics in Prometheus text format"""
+    return PlainTextResponse(
+        await metrics_registry.render(get_redis()),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.post("/api/generate", response_model=JobResponse)
 async def generate_song(request: GenerateRequest):
     """
     Start async song generation
 
     Args:
-        request: GenerateRequest with word field
+        request: GenerateRequest with word (and optional stream) field
 
     Returns:
         JobResponse with job_id for polling
@@ -136,67 +197,407 @@ async def generate_song(request: GenerateRequest):
         if cached_song:
             logger.info(f"Found cached song for '{word}'")
 
-            # Create a job entry for the cached result with a unique ID
-            cached_job_id = f"cached-{word}-{uuid.uuid4().hex[:8]}"
+            cached_job = await _create_cached_job(word, cached_song)
 
-            cached_job = Job(
-                job_id=cached_job_id,
-                word=word,
+            return JobResponse(
+                job_id=cached_job.job_id,
                 status="completed",
                 progress=100,
-                result={
-                    "word": cached_song.word,
-                    "lyrics": cached_song.lyrics,
-                    "audio_url": cached_song.audio_url,
-                    "timings": cached_song.timings,
-                    "duration": cached_song.duration,
-                    "bpm": cached_song.bpm
-                }
+                result=cached_job.result
             )
-            await cached_job.insert()
+
+        # Popular misses are pre-generated by the cache warmer
+        await record_cache_miss(get_redis(), word)
+
+        # Attach to an identical in-flight generation instead of starting another
+        job_id = str(uuid.uuid4())
+        single_flight = SongSingleFlight(get_redis())
+        owner_job_id = await single_flight.claim(word, job_id)
+
+        if owner_job_id:
+            logger.info(f"Attaching request for '{word}' to in-flight job {owner_job_id}")
+
+            owner_job = await Job.find_one(Job.job_id == owner_job_id)
 
             return JobResponse(
-                job_id=cached_job_id,
-                status="completed",
-                progress=100,
-                result={
-                    "word": cached_song.word,
-                    "lyrics": cached_song.lyrics,
-                    "audio_url": cached_song.audio_url,
-                    "timings": cached_song.timings,
-                    "duration": cached_song.duration,
-                    "bpm": cached_song.bpm
-                }
+                job_id=owner_job_id,
+                status=owner_job.status if owner_job else "processing",
+                progress=owner_job.progress if owner_job else 0,
+                stream=owner_job.stream_info if owner_job else None
             )
 
-        # Start Celery task FIRST to get task ID
-        task = generate_song_task.delay(word)
-        job_id = task.id  # Use Celery task ID as job_id
+        # Take a generation slot, or a place in the queue
+        admission = AdmissionController(get_redis())
+        try:
+            ticket = await admission.admit(job_id, {"kind": "song", "word": word, "stream": request.stream})
+        except QueueFullError:
+            await single_flight.release(word, job_id)
+            raise
 
-        # Save job to MongoDB with Celery task ID
+        # Save job to MongoDB before enqueuing so attached requests can poll it immediately
         job = Job(
             job_id=job_id,
             word=word,
-            status="processing",
-            progress=0
+            status="processing" if ticket.admitted else "queued",
+            progress=0,
+            stream=request.stream
         )
         await job.insert()
 
-        logger.info(f"Created job {job_id} for word '{word}'")
+        if ticket.admitted:
+            try:
+                # The job ID is the Celery task ID to poll
+                submit_song_generation(word, job_id=job_id, stream=request.stream)
+            except Exception:
+                await admission.cancel(job_id)
+                await single_flight.release(word, job_id)
+                job.status = "failed"
+                job.error = "Could not enqueue song generation"
+                await job.save()
+                raise
+
+        logger.info(f"Created job {job_id} for word '{word}' ({job.status})")
 
         return JobResponse(
             job_id=job_id,
-            status="processing",
-            progress=0
+            status=job.status,
+            progress=0,
+            queue_position=ticket.position,
+            eta_seconds=ticket.eta_seconds
         )
 
-    except HTTPException:
+    except (HTTPException, QueueFullError):
         raise
     except Exception as e:
         logger.error(f"Error in generate_song: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/generate/batch", response_model=BatchResponse)
+async def generate_batch(request: BatchGenerateRequest):
+    """
+    Start generation for a list of words (e.g. a lesson word list)
+
+    Cached words complete immediately and words already being generated
+    attach to their in-flight job; the rest run as one batch task that
+    shares Gemini requests, TTS concurrency and instrumental renders.
+
+    Args:
+        request: BatchGenerateRequest with words field
+
+    Returns:
+        BatchResponse with batch_id and a job handle per word
+    """
+    try:
+        # Normalize and de-duplicate, keeping the submitted order
+        words = list(dict.fromkeys(w.strip().lower() for w in request.words if w.strip()))
+
+        if not words:
+            raise HTTPException(status_code=400, detail="Please provide at least one word.")
+
+        if len(words) > settings.BATCH_MAX_WORDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many words. A batch can contain at most {settings.BATCH_MAX_WORDS} words."
+            )
+
+        invalid_words = [word for word in words if not validate_word(word)]
+        if invalid_words:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid words: {', '.join(invalid_words)}. Please provide single, simple English words."
+            )
+
+        batch_id = f"batch-{uuid.uuid4()}"
+        logger.info(f"Received batch {batch_id} with {len(words)} words")
+
+        single_flight = SongSingleFlight(get_redis())
+        admission = AdmissionController(get_redis())
+        jobs = {}
+        to_generate = {}
+
+        for word in words:
+            cached_song = await SongCache.find_one(SongCache.word == word)
+
+            if cached_song:
+                jobs[word] = (await _create_cached_job(word, cached_song)).job_id
+                continue
+
+            await record_cache_miss(get_redis(), word)
+
+            job_id = str(uuid.uuid4())
+            owner_job_id = await single_flight.claim(word, job_id)
+
+            if owner_job_id:
+                jobs[word] = owner_job_id
+                continue
+
+            jobs[word] = job_id
+            to_generate[word] = job_id
+
+        # The whole batch takes one generation slot
+        ticket = None
+        if to_generate:
+            try:
+                ticket = await admission.admit(batch_id, {"kind": "batch", "jobs": to_generate})
+            except QueueFullError:
+                for word, job_id in to_generate.items():
+                    await single_flight.release(word, job_id)
+                raise
+
+        queued = ticket is not None and not ticket.admitted
+        for word, job_id in to_generate.items():
+            await Job(
+                job_id=job_id,
+                word=word,
+                status="queued" if queued else "processing",
+                progress=0,
+                queue_id=batch_id
+            ).insert()
+
+        batch = Batch(
+            batch_id=batch_id,
+            words=words,
+            jobs=jobs,
+            status="queued" if queued else "processing"
+        )
+        await batch.insert()
+
+        if ticket is not None and ticket.admitted:
+            try:
+                submit_batch_generation(batch_id, to_generate)
+            except Exception:
+                await admission.cancel(batch_id)
+                for word, job_id in to_generate.items():
+                    await single_flight.release(word, job_id)
+                    job = await Job.find_one(Job.job_id == job_id)
+                    job.status = "failed"
+                    job.error = "Could not enqueue song generation"
+                    await job.save()
+                raise
+
+        logger.info(f"Created batch {batch_id}: {len(to_generate)} new, {len(words) - len(to_generate)} cached or in flight")
+
+        return await _batch_response(batch)
+
+    except (HTTPException, QueueFullError):
+        raise
+    except Exception as e:
+        logger.error(f"Error in generate_batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/batches/{batch_id}", response_model=BatchResponse)
+async def get_batch_status(batch_id: str):
+    """
+    Get aggregate batch status with per-word job status
+
+    Args:
+        batch_id: Batch identifier
+
+    Returns:
+        BatchResponse with overall progress and each word's JobResponse
+    """
+    try:
+        batch = await Batch.find_one(Batch.batch_id == batch_id)
+
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+
+        return await _batch_response(batch)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting batch status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _batch_response(batch: Batch) -> BatchResponse:
+    """
+    Refresh every job of a batch and aggregate their progress
+
+    Args:
+        batch: Batch document (its status is updated and saved)
+
+    Returns:
+        BatchResponse for the batch
+    """
+    if batch.status == "queued":
+        admission = AdmissionController(get_redis())
+        await _dispatch_admitted_jobs(admission)
+        ticket = await admission.position(batch.batch_id)
+
+        if ticket is not None:
+            return BatchResponse(
+                batch_id=batch.batch_id,
+                status="queued",
+                progress=0,
+                queue_position=ticket.position,
+                eta_seconds=ticket.eta_seconds,
+                jobs={
+                    word: JobResponse(job_id=job_id, status="queued", progress=0)
+                    for word, job_id in batch.jobs.items()
+                }
+            )
+
+    job_responses = {}
+
+    for word in batch.words:
+        job = await Job.find_one(Job.job_id == batch.jobs[word])
+
+        if not job:
+            job_responses[word] = JobResponse(job_id=batch.jobs[word], status="failed", error="Job not found")
+            continue
+
+        await _sync_job(job)
+
+        job_responses[word] = JobResponse(
+            job_id=job.job_id,
+            status=job.status,
+            progress=job.progress,
+            error=job.error,
+            result=job.result
+        )
+
+    statuses = [job.status for job in job_responses.values()]
+    progress = sum(job.progress or 0 for job in job_responses.values()) // max(len(job_responses), 1)
+
+    if "processing" in statuses or "pending" in statuses:
+        status = "processing"
+    elif all(s == "completed" for s in statuses):
+        status = "completed"
+    elif all(s == "failed" for s in statuses):
+        status = "failed"
+    else:
+        status = "partial"
+
+    if status != batch.status:
+        batch.status = status
+        batch.updated_at = datetime.utcnow()
+        await batch.save()
+
+    return BatchResponse(
+        batch_id=batch.batch_id,
+        status=status,
+        progress=progress,
+        jobs=job_responses
+    )
+
+
+async def _create_cached_job(word: str, cached_song: SongCache) -> Job:
+    """
+    Create a completed job entry for a cached song
+
+    Args:
+        word: Normalized input word
+        cached_song: Cached song document
+
+    Returns:
+        The inserted Job
+    """
+    # Create a job entry for the cached result with a unique ID
+    cached_job = Job(
+        job_id=f"cached-{word}-{uuid.uuid4().hex[:8]}",
+        word=word,
+        status="completed",
+        progress=100,
+        result={
+            "word": cached_song.word,
+            "lyrics": cached_song.lyrics,
+            "audio_url": cached_song.audio_url,
+            "timings": cached_song.timings,
+            "duration": cached_song.duration,
+            "bpm": cached_song.bpm
+        }
+    )
+    await cached_job.insert()
+
+    return cached_job
+
+
+async def _sync_job(job: Job):
+    """
+    Refresh a processing job from its Celery result (caching the song on success)
+
+    Args:
+        job: Job document, updated and saved in place
+    """
+    if job.status == "queued":
+        admission = AdmissionController(get_redis())
+        await _dispatch_admitted_jobs(admission)
+
+        if await admission.position(job.queue_id or job.job_id) is not None:
+            # Keep the word attached to this job for as long as it waits
+            await SongSingleFlight(get_redis()).refresh(job.word, job.job_id)
+            return
+
+        # Left the queue: it has been submitted to Celery
+        job.status = "processing"
+
+    if job.status != "processing":
+        return
+
+    # Try to get Celery task result
+    task = AsyncResult(job.job_id, app=generate_song_task.app)
+
+    if task.state == 'PENDING':
+        job.progress = 0
+    elif task.state == 'PROGRESS':
+        if task.info:
+            job.progress = task.info.get('progress', 0)
+            # Streaming jobs publish their segments with every progress update
+            job.stream_info = task.info.get('stream', job.stream_info)
+    elif task.state == 'SUCCESS':
+        job.status = "completed"
+        job.progress = 100
+        job.result = task.result
+
+        # Stage metrics live on the Job document, not in the client-facing result
+        if job.result:
+            job.metrics = job.result.pop('metrics', None)
+            job.stream_info = job.result.get('stream', job.stream_info)
+
+        # Cache the result
+        if task.result and 'word' in task.result:
+            # Check if already cached
+            existing_cache = await SongCache.find_one(SongCache.word == task.result['word'])
+
+            if not existing_cache:
+                cache_entry = SongCache(
+                    word=task.result['word'],
+                    lyrics=task.result['lyrics'],
+                    audio_url=task.result['audio_url'],
+                    timings=task.result['timings'],
+                    duration=task.result['duration'],
+                    bpm=task.result['bpm']
+                )
+                await cache_entry.insert()
+
+        # Cache is filled: later requests hit it instead of attaching
+        await SongSingleFlight(get_redis()).release(job.word, job.job_id)
+
+    elif task.state == 'FAILURE':
+        job.status = "failed"
+        job.error = str(task.info)
+
+        await SongSingleFlight(get_redis()).release(job.word, job.job_id)
+
+    # Update job in database
+    job.updated_at = datetime.utcnow()
+    await job.save()
+
+
+async def _dispatch_admitted_jobs(admission: AdmissionController):
+    """Submit queued jobs whose slots were freed without a worker handing them on"""
+    for job_id, payload in await admission.next_admitted():
+        try:
+            dispatch_admitted(job_id, payload)
+        except Exception as e:
+            logger.error(f"Could not submit admitted job {job_id}: {e}")
+            await admission.cancel(job_id)
+
+
 @app.get("/api/jobs/{job_id}", response_model=JobResponse)
 async def get_job_status(job_id: str):
     """
@@ -215,51 +616,22 @@ async def get_job_status(job_id: str):
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
 
-        # Check if we need to update from Celery
-        if job.status == "processing":
-            # Try to get Celery task result
-            task = AsyncResult(job_id, app=generate_song_task.app)
-
-            if task.state == 'PENDING':
-                job.progress = 0
-            elif task.state == 'PROGRESS':
-                if task.info:
-                    job.progress = task.info.get('progress', 0)
-            elif task.state == 'SUCCESS':
-                job.status = "completed"
-                job.progress = 100
-                job.result = task.result
-
-                # Cache the result
-                if task.result and 'word' in task.result:
-                    # Check if already cached
-                    existing_cache = await SongCache.find_one(SongCache.word == task.result['word'])
-
-                    if not existing_cache:
-                        cache_entry = SongCache(
-                            word=task.result['word'],
-                            lyrics=task.result['lyrics'],
-                            audio_url=task.result['audio_url'],
-                            timings=task.result['timings'],
-                            duration=task.result['duration'],
-                            bpm=task.result['bpm']
-                        )
-                        await cache_entry.insert()
-
-            elif task.state == 'FAILURE':
-                job.status = "failed"
-                job.error = str(task.info)
+        await _sync_job(job)
 
-            # Update job in database
-            job.updated_at = datetime.utcnow()
-            await job.save()
+        ticket = None
+        if job.status == "queued":
+            # Batch words wait under their batch's queue entry
+            ticket = await AdmissionController(get_redis()).position(job.queue_id or job.job_id)
 
         return JobResponse(
             job_id=job.job_id,
             status=job.status,
             progress=job.progress,
             error=job.error,
-            result=job.result
+            result=job.result,
+            queue_position=ticket.position if ticket else None,
+            eta_seconds=ticket.eta_seconds if ticket else None,
+            stream=job.stream_info
         )
 
     except HTTPException:
@@ -269,6 +641,79 @@ async def get_job_status(job_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/jobs/{job_id}/resume", response_model=JobResponse)
+async def resume_job(job_id: str):
+    """
+    Re-run a failed job from its last checkpointed stage
+
+    Args:
+        job_id: Job identifier
+
+    Returns:
+        JobResponse for the resumed job (or the in-flight job for the same word)
+    """
+    try:
+        job = await Job.find_one(Job.job_id == job_id)
+
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        if job.status != "failed":
+            raise HTTPException(status_code=409, detail=f"Only failed jobs can be resumed (job is {job.status})")
+
+        # Another request may have started generating the same word meanwhile
+        single_flight = SongSingleFlight(get_redis())
+        owner_job_id = await single_flight.claim(job.word, job.job_id)
+
+        if owner_job_id and owner_job_id != job.job_id:
+            owner_job = await Job.find_one(Job.job_id == owner_job_id)
+
+            return JobResponse(
+                job_id=owner_job_id,
+                status=owner_job.status if owner_job else "processing",
+                progress=owner_job.progress if owner_job else 0
+            )
+
+        admission = AdmissionController(get_redis())
+        try:
+            ticket = await admission.admit(job.job_id, {"kind": "resume", "word": job.word, "stream": job.stream})
+        except QueueFullError:
+            await single_flight.release(job.word, job.job_id)
+            raise
+
+        job.status = "processing" if ticket.admitted else "queued"
+        job.progress = 0
+        job.error = None
+        job.queue_id = None  # A resumed batch word waits under its own id
+        job.updated_at = datetime.utcnow()
+        await job.save()
+
+        if ticket.admitted:
+            try:
+                resume_song_generation(job.word, job.job_id, stream=job.stream)
+            except Exception:
+                await admission.cancel(job.job_id)
+                await single_flight.release(job.word, job.job_id)
+                job.status = "failed"
+                job.error = "Could not enqueue song generation"
+                await job.save()
+                raise
+
+        return JobResponse(
+            job_id=job.job_id,
+            status=job.status,
+            progress=0,
+            queue_position=ticket.position,
+            eta_seconds=ticket.eta_seconds
+        )
+
+    except (HTTPException, QueueFullError):
+        raise
+    except Exception as e:
+        logger.error(f"Error resuming job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/cache/{word}", response_model=SongResponse)
 async def get_cached_song(word: str):
     """
@@ -0,0 +1,298 @@
+"""
+Per-stage latency and resource metrics for song generation
+
+Workers record a JobMetrics per job (stage wall/CPU time plus counters
+such as bytes encoded/decoded and TTS characters). The summary travels
+with the task result and is stored on the Job document; workers also
+add it to Prometheus histograms kept in Redis when the job finishes,
+which /metrics renders.
+"""
+import contextvars
+import logging
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets (seconds) for stage and job latencies
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0]
+
+# Counter names recorded by services
+BYTES_ENCODED = "bytes_encoded"
+BYTES_DECODED = "bytes_decoded"
+TTS_CHARACTERS = "tts_characters"
+TTS_CACHE_HITS = "tts_cache_hits"
+TTS_CACHE_MISSES = "tts_cache_misses"
+BARK_SEMANTIC_CACHE_HITS = "bark_semantic_cache_hits"
+BARK_SEMANTIC_CACHE_MISSES = "bark_semantic_cache_misses"
+
+_current_job: contextvars.ContextVar[Optional["JobMetrics"]] = contextvars.ContextVar(
+    "current_job_metrics", default=None
+)
+
+
+class JobMetrics:
+    """Stage timings and resource counters for one generation job"""
+
+    def __init__(self):
+        """Initialize empty metrics"""
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a stage (wall clock and CPU time of the running thread)
+
+        Args:
+            name: Stage name; repeated stages accumulate
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            with self._lock:
+                entry = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0})
+                entry["wall_seconds"] += wall
+                entry["cpu_seconds"] += cpu
+            logger.debug(f"Stage '{name}' took {wall:.3f}s wall, {cpu:.3f}s CPU")
+
+    def count(self, name: str, value: float):
+        """
+        Add to a counter
+
+        Args:
+            name: Counter name (e.g. BYTES_ENCODED)
+            value: Amount to add
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0.0) + value
+
+    def merge(self, summary: Optional[Dict[str, Any]]):
+        """
+        Fold in a summary produced by another process (staged pipeline)
+
+        Args:
+            summary: Output of to_dict() from an earlier stage
+        """
+        if not summary:
+            return
+
+        with self._lock:
+            for name, entry in summary.get("stages", {}).items():
+                mine = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0})
+                mine["wall_seconds"] += entry.get("wall_seconds", 0.0)
+                mine["cpu_seconds"] += entry.get("cpu_seconds", 0.0)
+            for name, value in summary.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0.0) + value
+            self.started_at -= summary.get("total_seconds", 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-serializable summary
+
+        Returns:
+            Dictionary with stages, counters, total_seconds and peak_rss_bytes
+        """
+        with self._lock:
+            return {
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+                "counters": dict(self.counters),
+                "total_seconds": time.perf_counter() - self.started_at,
+                # ru_maxrss is reported in KB on Linux
+                "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            }
+
+
+@contextmanager
+def track_job(metrics: Optional[JobMetrics] = None) -> Iterator[JobMetrics]:
+    """
+    Make a JobMetrics current for the enclosed code (and threads started via copy_context)
+
+    Args:
+        metrics: Existing metrics to continue, or None for a fresh one
+
+    Yields:
+        The active JobMetrics
+    """
+    metrics = metrics or JobMetrics()
+    token = _current_job.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_job.reset(token)
+
+
+def current_metrics() -> Optional[JobMetrics]:
+    """Metrics of the job running in this context, if any"""
+    return _current_job.get()
+
+
+@contextmanager
+def stage_timer(name: str) -> Iterator[None]:
+    """
+    Time a stage against the current job (no-op outside a tracked job)
+
+    Args:
+        name: Stage name
+    """
+    metrics = _current_job.get()
+    if metrics is None:
+        yield
+        return
+
+    with metrics.stage(name):
+        yield
+
+
+def count(name: str, value: float):
+    """
+    Add to a counter of the current job (no-op outside a tracked job)
+
+    Args:
+        name: Counter name
+        value: Amount to add
+    """
+    metrics = _current_job.get()
+    if metrics is not None:
+        metrics.count(name, value)
+
+
+# Redis keys shared by every worker (writers) and API process (reader)
+COUNTERS_KEY = "metrics:counters"
+HISTOGRAMS_KEY = "metrics:histograms"
+PEAK_RSS_KEY = "metrics:peak_rss_bytes"
+
+# Keep the largest peak RSS reported by any worker
+_MAX_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+"""
+
+
+class MetricsRegistry:
+    """
+    Job metrics aggregated in Redis, rendered in Prometheus text format
+
+    Workers record every job where it finishes (completed or failed, with
+    whatever stages ran), so jobs nobody polls, batch songs, cache warming
+    and resumed jobs are all counted, and every API process serves the
+    same totals. Histograms are stored as cumulative bucket counters in
+    one hash (field "metric|labels|bucket"), counters in another.
+    """
+
+    def observe_job(self, redis_client, summary: Optional[Dict[str, Any]], status: str = "completed"):
+        """
+        Record a finished job's metrics summary (never raises)
+
+        Args:
+            redis_client: Synchronous Redis client
+            summary: JobMetrics.to_dict() output (partial for failed jobs, None if nothing ran)
+            status: Final job status
+        """
+        counters, histograms = self._updates(summary, status)
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for field, value in counters.items():
+                pipe.hincrbyfloat(COUNTERS_KEY, field, value)
+            for field, value in histograms.items():
+                pipe.hincrbyfloat(HISTOGRAMS_KEY, field, value)
+            if summary and summary.get("peak_rss_bytes"):
+                pipe.eval(_MAX_SCRIPT, 1, PEAK_RSS_KEY, summary["peak_rss_bytes"])
+            pipe.execute()
+        except Exception as e:
+            # Metrics must never fail a job
+            logger.warning(f"Could not record job metrics: {e}")
+
+    async def render(self, redis_client) -> str:
+        """
+        Render all metrics in Prometheus text exposition format
+
+        Args:
+            redis_client: Async Redis client (responses decoded to str)
+
+        Returns:
+            Metrics text
+        """
+        counters = await redis_client.hgetall(COUNTERS_KEY)
+        histograms = await redis_client.hgetall(HISTOGRAMS_KEY)
+        peak_rss_bytes = await redis_client.get(PEAK_RSS_KEY)
+
+        # metric -> label -> {"buckets": {index: count}, "count": n, "sum": s}
+        series: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for field, value in histograms.items():
+            metric, label, part = field.split("|")
+            entry = series.setdefault(metric, {}).setdefault(label, {"buckets": {}, "count": 0.0, "sum": 0.0})
+            if part in ("count", "sum"):
+                entry[part] = float(value)
+            else:
+                entry["buckets"][int(part)] = float(value)
+
+        lines = []
+        for metric, labels in sorted(series.items()):
+            lines.append(f"# TYPE {metric} histogram")
+            for label, entry in sorted(labels.items()):
+                prefix = f"{label}," if label else ""
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {entry["buckets"].get(i, 0.0):g}')
+                lines.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {entry["count"]:g}')
+                suffix = f"{{{label}}}" if label else ""
+                lines.append(f"{metric}_sum{suffix} {entry['sum']}")
+                lines.append(f"{metric}_count{suffix} {entry['count']:g}")
+
+        typed = set()
+        for key, value in sorted(counters.items()):
+            metric = key.split("{")[0]
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{key} {float(value):g}")
+
+        lines.append("# TYPE song_worker_peak_rss_bytes gauge")
+        lines.append(f"song_worker_peak_rss_bytes {int(float(peak_rss_bytes or 0))}")
+
+        return "\n".join(lines) + "\n"
+
+    def _updates(self, summary: Optional[Dict[str, Any]], status: str):
+        """Counter and histogram increments for one job"""
+        counters = {f'song_jobs_total{{status="{status}"}}': 1}
+        histograms: Dict[str, float] = {}
+
+        def observe(metric: str, label: str, value: float):
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histograms[f"{metric}|{label}|{i}"] = histograms.get(f"{metric}|{label}|{i}", 0) + 1
+            histograms[f"{metric}|{label}|count"] = histograms.get(f"{metric}|{label}|count", 0) + 1
+            histograms[f"{metric}|{label}|sum"] = histograms.get(f"{metric}|{label}|sum", 0) + value
+
+        if not summary:
+            return counters, histograms
+
+        job_label = f'status="{status}"'
+        observe("song_job_duration_seconds", job_label, summary.get("total_seconds", 0.0))
+
+        for name, entry in summary.get("stages", {}).items():
+            label = f'stage="{name}"'
+            observe("song_stage_duration_seconds", label, entry.get("wall_seconds", 0.0))
+            observe("song_stage_cpu_seconds", label, entry.get("cpu_seconds", 0.0))
+
+        for name, value in summary.get("counters", {}).items():
+            key = f"song_{name}_total"
+            counters[key] = counters.get(key, 0) + value
+
+        return counters, histograms
+
+
+# Shared by workers (observe_job) and the API (render)
+registry = MetricsRegistry()
@@ -13,10 +13,14 @@ class Job(Document):
 
     job_id: str = Field(..., description="Unique job identifier")
     word: str = Field(..., description="Input word for song generation")
-    status: str = Field(default="pending", description="Job status: pending, processing, completed, failed")
+    status: str = Field(default="pending", description="Job status: pending, queued, processing, completed, failed")
     progress: int = Field(default=0, description="Progress percentage (0-100)")
     error: Optional[str] = Field(default=None, description="Error message if failed")
     result: Optional[Dict[str, Any]] = Field(default=None, description="Result data if completed")
+    metrics: Optional[Dict[str, Any]] = Field(default=None, description="Per-stage latency and resource metrics")
+    stream: bool = Field(default=False, description="Publish the song line by line while it is generated")
+    stream_info: Optional[Dict[str, Any]] = Field(default=None, description="Playlist and segments published so far")
+    queue_id: Optional[str] = Field(default=None, description="Admission queue entry the job waits under, if not its own id (its batch)")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -39,6 +43,36 @@ class Job(Document):
         }
 
 
+class Batch(Document):
+    """Model for tracking a batch of song generation jobs (e.g. a lesson word list)"""
+
+    batch_id: str = Field(..., description="Unique batch identifier")
+    words: List[str] = Field(..., description="Normalized input words")
+    jobs: Dict[str, str] = Field(..., description="Job id per word")
+    status: str = Field(default="processing", description="Batch status: queued, processing, completed, partial, failed")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "batches"  # Collection name
+        indexes = [
+            "batch_id",
+        ]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "batch_id": "batch-123e4567-e89b-12d3-a456-426614174000",
+                "words": ["cat", "dog"],
+                "jobs": {
+                    "cat": "123e4567-e89b-12d3-a456-426614174001",
+                    "dog": "123e4567-e89b-12d3-a456-426614174002"
+                },
+                "status": "processing"
+            }
+        }
+
+
 class SongCache(Document):
     """Model for caching generated songs"""
 
@@ -1,22 +1,31 @@
 """
 Services for Pirate Karaoke App
+
+Services are imported on first use, so importing one submodule (e.g.
+app.services.audio_buffer in a benchmark) doesn't pull in every provider SDK.
 """
-from .rhyme_service import get_kid_friendly_rhymes
-from .lyrics_service import LyricsGenerator
-from .vocal_service import VocalGenerator
-from .beat_manager import BeatLibraryManager
-from .audio_service import AudioService
-from .karaoke_service import KaraokeGenerator
-from .pirate_beat_generator import PirateBeatGenerator
-from .mood_analyzer import MoodAnalyzer
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "get_kid_friendly_rhymes": "rhyme_service",
+    "LyricsGenerator": "lyrics_service",
+    "VocalGenerator": "vocal_service",
+    "BeatLibraryManager": "beat_manager",
+    "AudioService": "audio_service",
+    "KaraokeGenerator": "karaoke_service",
+    "PirateBeatGenerator": "pirate_beat_generator",
+    "MoodAnalyzer": "mood_analyzer",
+    "ServiceContainer": "container",
+    "get_services": "container",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    "get_kid_friendly_rhymes",
-    "LyricsGenerator",
-    "VocalGenerator",
-    "BeatLibraryManager",
-    "AudioService",
-    "KaraokeGenerator",
-    "PirateBeatGenerator",
-    "MoodAnalyzer",
-]
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
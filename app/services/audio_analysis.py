@@ -0,0 +1,194 @@
+"""
+Decode-once audio analysis (duration, tempo, onset envelope)
+"""
+import hashlib
+import json
+import logging
+import librosa
+import numpy as np
+import soundfile as sf
+from pathlib import Path
+from typing import Dict, Any, Optional
+from app.services.audio_buffer import AudioBuffer
+
+logger = logging.getLogger(__name__)
+
+# Rate used for tempo analysis (librosa's default load rate)
+ANALYSIS_SAMPLE_RATE = 22050
+
+# Sidecar files live next to the audio they describe
+SIDECAR_SUFFIX = ".analysis.json"
+
+
+class AudioAnalyzer:
+    """
+    Compute duration, tempo and onset envelope once per audio content hash
+
+    Results are kept in a per-instance memo (one analyzer per job) and
+    persisted as a JSON sidecar next to analysed files, so repeated BPM or
+    duration lookups for the same audio never decode it twice.
+    """
+
+    def __init__(self):
+        """Initialize an empty memo"""
+        self._memo: Dict[str, Dict[str, Any]] = {}
+
+    def analyze(self, audio_path: str) -> Dict[str, Any]:
+        """
+        Analyze an audio file
+
+        Args:
+            audio_path: Path to audio file
+
+        Returns:
+            Dictionary with content_hash, duration, bpm and onset_envelope
+        """
+        content_hash = self.hash_file(audio_path)
+
+        analysis = self._memo.get(content_hash)
+        if analysis is not None and 'bpm' in analysis:
+            return analysis
+
+        analysis = self._read_sidecar(audio_path, content_hash)
+        if analysis is not None and 'bpm' in analysis:
+            self._memo[content_hash] = analysis
+            return analysis
+
+        logger.info(f"Analyzing {audio_path}")
+
+        y, sr = librosa.load(audio_path, sr=ANALYSIS_SAMPLE_RATE, mono=True)
+        analysis = self._analyze_samples(y, sr, content_hash)
+
+        # Prefer the container's own length over the resampled estimate
+        header_duration = self._duration_from_header(audio_path)
+        if header_duration is not None:
+            analysis['duration'] = header_duration
+
+        self._memo[content_hash] = analysis
+        self._write_sidecar(audio_path, analysis)
+
+        return analysis
+
+    def analyze_pcm(self, audio: AudioBuffer, source_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyze in-memory audio
+
+        Args:
+            audio: Decoded audio
+            source_path: File the buffer was just encoded to; its sidecar is written too
+
+        Returns:
+            Dictionary with content_hash, duration, bpm and onset_envelope
+        """
+        content_hash = self.hash_pcm(audio)
+
+        analysis = self._memo.get(content_hash)
+        if analysis is None:
+            y = audio.to_mono()
+            if audio.sample_rate != ANALYSIS_SAMPLE_RATE:
+                y = librosa.resample(y, orig_sr=audio.sample_rate, target_sr=ANALYSIS_SAMPLE_RATE)
+
+            analysis = self._analyze_samples(y, ANALYSIS_SAMPLE_RATE, content_hash)
+            analysis['duration'] = audio.duration
+            self._memo[content_hash] = analysis
+
+        if source_path is not None:
+            file_analysis = dict(analysis, content_hash=self.hash_file(source_path))
+            self._memo[file_analysis['content_hash']] = file_analysis
+            self._write_sidecar(source_path, file_analysis)
+
+        return analysis
+
+    def get_duration(self, audio_path: str) -> float:
+        """
+        Get duration, reading file headers instead of decoding where possible
+
+        Args:
+            audio_path: Path to audio file
+
+        Returns:
+            Duration in seconds
+        """
+        content_hash = self.hash_file(audio_path)
+
+        analysis = self._memo.get(content_hash) or self._read_sidecar(audio_path, content_hash)
+        if analysis is not None:
+            self._memo[content_hash] = analysis
+            return analysis['duration']
+
+        duration = self._duration_from_header(audio_path)
+        if duration is None:
+            return self.analyze(audio_path)['duration']
+
+        self._memo[content_hash] = {'content_hash': content_hash, 'duration': duration}
+        return duration
+
+    @staticmethod
+    def hash_file(audio_path: str) -> str:
+        """Content hash of an audio file"""
+        digest = hashlib.sha1()
+        with open(audio_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_pcm(audio: AudioBuffer) -> str:
+        """Content hash of in-memory samples"""
+        digest = hashlib.sha1(str(audio.sample_rate).encode())
+        digest.update(np.ascontiguousarray(audio.samples).tobytes())
+        return digest.hexdigest()
+
+    def _analyze_samples(self, y: np.ndarray, sr: int, content_hash: str) -> Dict[str, Any]:
+        """Tempo and onset envelope from mono samples"""
+        onset_envelope = librosa.onset.onset_strength(y=y, sr=sr)
+        tempo, _ = librosa.beat.beat_track(onset_envelope=onset_envelope, sr=sr)
+
+        return {
+            'content_hash': content_hash,
+            'duration': len(y) / sr,
+            'bpm': float(tempo),
+            'onset_envelope': [round(float(v), 4) for v in onset_envelope],
+            'onset_sample_rate': sr
+        }
+
+    def _duration_from_header(self, audio_path: str) -> Optional[float]:
+        """Duration from container metadata, or None if unreadable"""
+        try:
+            return float(sf.info(audio_path).duration)
+        except Exception:
+            pass
+
+        try:
+            # Falls back to audioread, which reads the length without decoding
+            return float(librosa.get_duration(path=audio_path))
+        except Exception as e:
+            logger.debug(f"Could not read duration header for {audio_path}: {e}")
+            return None
+
+    def _read_sidecar(self, audio_path: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Load a sidecar if it matches the current file content"""
+        sidecar_path = Path(f"{audio_path}{SIDECAR_SUFFIX}")
+        if not sidecar_path.exists():
+            return None
+
+        try:
+            with open(sidecar_path, 'r') as f:
+                analysis = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable analysis sidecar {sidecar_path}: {e}")
+            return None
+
+        if analysis.get('content_hash') != content_hash:
+            return None
+
+        return analysis
+
+    def _write_sidecar(self, audio_path: str, analysis: Dict[str, Any]):
+        """Persist analysis next to the audio file"""
+        sidecar_path = Path(f"{audio_path}{SIDECAR_SUFFIX}")
+        try:
+            with open(sidecar_path, 'w') as f:
+                json.dump(analysis, f)
+        except Exception as e:
+            logger.warning(f"Could not write analysis sidecar {sidecar_path}: {e}")
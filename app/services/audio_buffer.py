@@ -0,0 +1,202 @@
+"""
+In-memory PCM buffers passed between song generation stages
+"""
+import logging
+import os
+import numpy as np
+import soundfile as sf
+from pathlib import Path
+from pydub import AudioSegment
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AudioBuffer:
+    """
+    Decoded float32 audio held in memory
+
+    Samples are stored as a (frames, channels) float32 array in the range
+    [-1.0, 1.0] so stages can hand audio to each other without encoding
+    to MP3 and decoding it again.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int):
+        """
+        Wrap decoded samples
+
+        Args:
+            samples: 1-D (mono) or 2-D (frames, channels) sample array
+            sample_rate: Sample rate in Hz
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 1:
+            samples = samples[:, np.newaxis]
+
+        self.samples = samples
+        self.sample_rate = int(sample_rate)
+
+    @property
+    def frames(self) -> int:
+        """Number of sample frames"""
+        return self.samples.shape[0]
+
+    @property
+    def channels(self) -> int:
+        """Number of channels"""
+        return self.samples.shape[1]
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds"""
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+    @classmethod
+    def from_file(cls, audio_path: str) -> "AudioBuffer":
+        """
+        Decode an audio file
+
+        Uses libsndfile directly for formats it understands (WAV, FLAC, OGG)
+        and only falls back to pydub/ffmpeg for everything else.
+
+        Args:
+            audio_path: Path to audio file
+
+        Returns:
+            AudioBuffer with the decoded samples
+        """
+        metrics.count(metrics.BYTES_DECODED, os.path.getsize(audio_path))
+
+        try:
+            samples, sr = sf.read(str(audio_path), dtype='float32', always_2d=True)
+            return cls(samples, sr)
+        except Exception:
+            logger.debug(f"libsndfile cannot read {audio_path}, decoding with pydub")
+
+        file_format = Path(audio_path).suffix[1:] or None
+        if file_format == 'm4a':
+            file_format = 'mp4'  # pydub uses 'mp4' for m4a
+
+        return cls.from_segment(AudioSegment.from_file(str(audio_path), format=file_format))
+
+    @classmethod
+    def from_segment(cls, segment: AudioSegment) -> "AudioBuffer":
+        """
+        Convert a pydub AudioSegment without touching the disk
+
+        Args:
+            segment: AudioSegment to convert
+
+        Returns:
+            AudioBuffer with the same samples
+        """
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+        samples = samples.reshape(-1, segment.channels)
+        samples /= float(1 << (8 * segment.sample_width - 1))
+
+        return cls(samples, segment.frame_rate)
+
+    def to_segment(self) -> AudioSegment:
+        """
+        Convert to a 16-bit pydub AudioSegment
+
+        Returns:
+            AudioSegment with the same samples
+        """
+        pcm = np.clip(self.samples, -1.0, 1.0)
+        pcm = (pcm * 32767).astype('<i2')
+
+        return AudioSegment(
+            data=pcm.tobytes(),
+            sample_width=2,
+            frame_rate=self.sample_rate,
+            channels=self.channels
+        )
+
+    def to_mono(self) -> np.ndarray:
+        """
+        Downmix to a 1-D array
+
+        Returns:
+            Mono float32 samples
+        """
+        if self.channels == 1:
+            return self.samples[:, 0]
+        return self.samples.mean(axis=1)
+
+    def with_channels(self, channels: int) -> "AudioBuffer":
+        """
+        Match a channel count (mono is duplicated, anything else is downmixed)
+
+        Args:
+            channels: Target channel count
+
+        Returns:
+            AudioBuffer with the requested number of channels
+        """
+        if channels == self.channels:
+            return self
+
+        mono = self.to_mono()
+        return AudioBuffer(np.repeat(mono[:, np.newaxis], channels, axis=1), self.sample_rate)
+
+    def pad_end(self, seconds: float) -> "AudioBuffer":
+        """
+        Append silence
+
+        Args:
+            seconds: Length of the silence
+
+        Returns:
+            Padded AudioBuffer (self if there is nothing to add)
+        """
+        frames = int(round(seconds * self.sample_rate))
+        if frames <= 0:
+            return self
+
+        silence = np.zeros((frames, self.channels), dtype=np.float32)
+        return AudioBuffer(np.concatenate([self.samples, silence]), self.sample_rate)
+
+    def resample(self, sample_rate: int) -> "AudioBuffer":
+        """
+        Resample to a new rate
+
+        Args:
+            sample_rate: Target sample rate in Hz
+
+        Returns:
+            Resampled AudioBuffer (self if the rate already matches)
+        """
+        if sample_rate == self.sample_rate:
+            return self
+
+        import librosa
+
+        resampled = librosa.resample(
+            self.samples.T,
+            orig_sr=self.sample_rate,
+            target_sr=sample_rate
+        )
+
+        return AudioBuffer(resampled.T, sample_rate)
+
+    def export(self, output_path: str, format: str = "mp3", bitrate: str = "192k") -> str:
+        """
+        Encode the buffer to a file
+
+        Args:
+            output_path: Destination path
+            format: Output format (wav is written with libsndfile whatever the path extension, anything else via pydub)
+            bitrate: Bitrate for lossy formats
+
+        Returns:
+            Path to the written file
+        """
+        if format == "wav":
+            sf.write(str(output_path), self.samples, self.sample_rate, format="WAV")
+        else:
+            self.to_segment().export(str(output_path), format=format, bitrate=bitrate)
+
+        metrics.count(metrics.BYTES_ENCODED, os.path.getsize(output_path))
+
+        return str(output_path)
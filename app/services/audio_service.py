@@ -4,12 +4,16 @@ Audio processing service for mixing vocals and instrumentals
 import librosa
 import soundfile as sf
 import numpy as np
+import os
 import uuid
 import logging
 from pathlib import Path
 from pydub import AudioSegment
-from typing import Optional
+from typing import Optional, Tuple
+from app import metrics
 from app.config import settings
+from app.services.audio_analysis import AudioAnalyzer
+from app.services.audio_buffer import AudioBuffer
 from app.services.beat_manager import BeatLibraryManager
 
 logger = logging.getLogger(__name__)
@@ -18,12 +22,19 @@ logger = logging.getLogger(__name__)
 class AudioService:
     """Handle audio processing, BPM detection, and mixing"""
 
-    def __init__(self):
-        """Initialize audio service"""
+    def __init__(self, beat_manager: Optional[BeatLibraryManager] = None):
+        """
+        Initialize audio service
+
+        Args:
+            beat_manager: Shared beat library (a new one is loaded if not provided)
+        """
         self.sample_rate = settings.SAMPLE_RATE
         self.output_dir = settings.OUTPUT_DIR
         self.temp_dir = settings.TEMP_DIR
-        self.beat_manager = BeatLibraryManager()
+        self.beat_manager = beat_manager or BeatLibraryManager()
+        # Per-job memo: each audio content is decoded and analysed once
+        self.analyzer = AudioAnalyzer()
 
     def detect_bpm(self, audio_path: str) -> float:
         """
@@ -36,9 +47,7 @@ class AudioService:
             BPM as float
         """
         try:
-            y, sr = librosa.load(audio_path)
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-            bpm = float(tempo)
+            bpm = self.analyzer.analyze(audio_path)['bpm']
 
             logger.info(f"Detected BPM: {bpm:.1f} from {audio_path}")
 
@@ -48,9 +57,31 @@ class AudioService:
             logger.warning(f"BPM detection failed: {e}, using default 95 BPM")
             return 95.0  # Default pirate shanty tempo
 
+    def detect_bpm_pcm(self, audio: AudioBuffer, source_path: Optional[str] = None) -> float:
+        """
+        Detect BPM from an in-memory buffer
+
+        Args:
+            audio: Decoded audio
+            source_path: File the buffer was encoded to, so its analysis sidecar is written
+
+        Returns:
+            BPM as float
+        """
+        try:
+            bpm = self.analyzer.analyze_pcm(audio, source_path=source_path)['bpm']
+
+            logger.info(f"Detected BPM: {bpm:.1f} from in-memory audio")
+
+            return bpm
+
+        except Exception as e:
+            logger.warning(f"BPM detection failed: {e}, using default 95 BPM")
+            return 95.0  # Default pirate shanty tempo
+
     def get_audio_duration(self, audio_path: str) -> float:
         """
-        Get duration of audio file in seconds
+        Get duration of audio file in seconds (from file headers where possible)
 
         Args:
             audio_path: Path to audio file
@@ -59,8 +90,7 @@ class AudioService:
             Duration in seconds
         """
         try:
-            y, sr = librosa.load(audio_path)
-            duration = len(y) / sr
+            duration = self.analyzer.get_duration(audio_path)
 
             logger.info(f"Audio duration: {duration:.2f}s")
 
@@ -72,22 +102,25 @@ class AudioService:
 
     def get_instrumental(
         self,
-        vocal_path: str,
-        genre: str = "pirate-shanty"
+        vocal_path: Optional[str],
+        genre: str = "pirate-shanty",
+        vocal_bpm: Optional[float] = None
     ) -> Optional[str]:
         """
         Get matching instrumental beat for vocals
 
         Args:
-            vocal_path: Path to vocal audio file
+            vocal_path: Path to vocal audio file (unused when vocal_bpm is given)
             genre: Genre/category of beat
+            vocal_bpm: Already detected vocal BPM, skips re-analysing the vocals
 
         Returns:
             Path to instrumental file or None
         """
         try:
             # Detect vocal BPM
-            vocal_bpm = self.detect_bpm(vocal_path)
+            if vocal_bpm is None:
+                vocal_bpm = self.detect_bpm(vocal_path)
 
             logger.info(f"Finding instrumental for {vocal_bpm:.1f} BPM, genre: {genre}")
 
@@ -142,6 +175,7 @@ class AudioService:
             # Load audio files with pydub
             vocals = AudioSegment.from_file(vocal_path)
             instrumental = AudioSegment.from_file(instrumental_path)
+            metrics.count(metrics.BYTES_DECODED, os.path.getsize(vocal_path) + os.path.getsize(instrumental_path))
 
             # Get vocal duration
             vocal_duration = len(vocals)
@@ -167,6 +201,7 @@ class AudioService:
 
             # Export as MP3
             mixed.export(str(output_path), format="mp3", bitrate="192k")
+            metrics.count(metrics.BYTES_ENCODED, os.path.getsize(output_path))
 
             logger.info(f"Mixed audio saved to {output_path}")
 
@@ -176,6 +211,86 @@ class AudioService:
             logger.error(f"Error mixing audio: {e}")
             raise
 
+    def mix_pcm(
+        self,
+        vocals: AudioBuffer,
+        instrumental: AudioBuffer,
+        output_filename: str = None
+    ) -> Tuple[str, AudioBuffer]:
+        """
+        Mix in-memory vocals and instrumental, encoding only the final song
+
+        Mirrors mix_audio: the instrumental is looped/trimmed to the vocal
+        length and both tracks are summed at the configured volumes.
+
+        Args:
+            vocals: Decoded vocals
+            instrumental: Decoded instrumental
+            output_filename: Optional output filename (generates unique if not provided)
+
+        Returns:
+            Tuple of (path to output MP3, mixed AudioBuffer)
+        """
+        try:
+            logger.info(
+                f"Mixing in-memory vocals ({vocals.duration:.2f}s @ {vocals.sample_rate}Hz) "
+                f"with instrumental ({instrumental.duration:.2f}s @ {instrumental.sample_rate}Hz)"
+            )
+
+            if output_filename is None:
+                output_filename = f"song_{uuid.uuid4()}.mp3"
+
+            output_path = self.output_dir / output_filename
+
+            mixed_audio = self.mix_buffers(vocals, instrumental)
+
+            # The only lossy encode in the in-memory pipeline
+            mixed_audio.export(str(output_path), format="mp3", bitrate="192k")
+
+            logger.info(f"Mixed audio saved to {output_path}")
+
+            return str(output_path), mixed_audio
+
+        except Exception as e:
+            logger.error(f"Error mixing audio: {e}")
+            raise
+
+    def mix_buffers(
+        self,
+        vocals: AudioBuffer,
+        instrumental: AudioBuffer,
+        instrumental_offset: int = 0
+    ) -> AudioBuffer:
+        """
+        Sum vocals and a looped instrumental without encoding anything
+
+        Args:
+            vocals: Decoded vocals
+            instrumental: Decoded instrumental
+            instrumental_offset: Frame of the (looped) instrumental the vocals start at,
+                so consecutive lines mixed separately continue the same instrumental
+
+        Returns:
+            Mixed AudioBuffer as long as the vocals
+        """
+        # Match sample rate and channels the same way pydub's overlay does
+        sample_rate = max(vocals.sample_rate, instrumental.sample_rate)
+        channels = max(vocals.channels, instrumental.channels)
+        vocals = vocals.resample(sample_rate).with_channels(channels)
+        instrumental = instrumental.resample(sample_rate).with_channels(channels)
+
+        mixed = vocals.samples * settings.VOCALS_VOLUME
+
+        # Loop and trim instrumental to match vocal duration
+        if instrumental.frames > 0:
+            positions = np.arange(instrumental_offset, instrumental_offset + vocals.frames)
+            inst = np.take(instrumental.samples, positions, axis=0, mode='wrap')
+            mixed += inst * settings.INSTRUMENTAL_VOLUME
+
+        np.clip(mixed, -1.0, 1.0, out=mixed)
+
+        return AudioBuffer(mixed, sample_rate)
+
     def time_stretch_beat(
         self,
         beat_path: str,
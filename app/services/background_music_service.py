@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Optional
 from pydub import AudioSegment
 
+from app import metrics
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -19,14 +20,22 @@ class BackgroundMusicManager:
         """Initialize background music manager"""
         self.music_dir = settings.BACKGROUND_MUSIC_DIR
         self.supported_formats = ['.mp3', '.wav', '.m4a', '.ogg', '.flac']
+        # Track index, scanned once per manager (long-lived in workers)
+        self._tracks: Optional[list[Path]] = None
 
-    def get_available_tracks(self) -> list[Path]:
+    def get_available_tracks(self, refresh: bool = False) -> list[Path]:
         """
         Get list of available background music tracks
 
+        Args:
+            refresh: Rescan the directory instead of using the cached index
+
         Returns:
             List of Path objects for available tracks
         """
+        if self._tracks is not None and not refresh:
+            return self._tracks
+
         tracks = []
 
         if not self.music_dir.exists():
@@ -37,6 +46,7 @@ class BackgroundMusicManager:
             tracks.extend(self.music_dir.glob(f'*{ext}'))
 
         logger.info(f"Found {len(tracks)} background music tracks")
+        self._tracks = tracks
         return tracks
 
     def select_random_track(self) -> Optional[Path]:
@@ -56,53 +66,107 @@ class BackgroundMusicManager:
         logger.info(f"Selected background track: {selected.name}")
         return selected
 
-    def trim_to_duration(
+    def load_track(self, track_path: Path) -> AudioSegment:
+        """
+        Decode a background track
+
+        Args:
+            track_path: Path to music track
+
+        Returns:
+            Full-length AudioSegment
+        """
+        logger.info(f"Loading background track: {track_path.name}")
+
+        # Detect format from extension
+        file_format = track_path.suffix[1:]  # Remove the dot
+        if file_format == 'm4a':
+            file_format = 'mp4'  # pydub uses 'mp4' for m4a
+
+        metrics.count(metrics.BYTES_DECODED, track_path.stat().st_size)
+
+        return AudioSegment.from_file(str(track_path), format=file_format)
+
+    def load_random_track(self) -> Optional[AudioSegment]:
+        """
+        Select and decode a random background track
+
+        Does not need the vocal length, so it can run while vocals are
+        still being synthesized; fit_to_duration finishes the job.
+
+        Returns:
+            Full-length AudioSegment, or None if no tracks available
+        """
+        try:
+            track_path = self.select_random_track()
+
+            if not track_path:
+                logger.warning("No background tracks available")
+                return None
+
+            return self.load_track(track_path)
+
+        except Exception as e:
+            logger.error(f"Error loading random background: {e}")
+            return None
+
+    def fit_to_duration(
         self,
-        track_path: Path,
+        background: AudioSegment,
         target_duration: float,
         fade_out_duration: float = 1.0
     ) -> AudioSegment:
         """
-        Load and trim background track to target duration
+        Loop/trim a decoded track to target duration and fade it out
 
         Args:
-            track_path: Path to music track
+            background: Decoded music track
             target_duration: Target duration in seconds
             fade_out_duration: Duration of fade-out in seconds (default: 1.0)
 
         Returns:
             AudioSegment trimmed to target duration
         """
-        try:
-            # Load audio file
-            logger.info(f"Loading background track: {track_path.name}")
+        # Get duration in milliseconds
+        target_ms = int(target_duration * 1000)
+        fade_out_ms = int(fade_out_duration * 1000)
 
-            # Detect format from extension
-            file_format = track_path.suffix[1:]  # Remove the dot
-            if file_format == 'm4a':
-                file_format = 'mp4'  # pydub uses 'mp4' for m4a
+        # If track is shorter than target, loop it
+        if len(background) < target_ms:
+            logger.info(f"Track is shorter than target. Looping...")
+            times_to_loop = (target_ms // len(background)) + 1
+            background = background * times_to_loop
 
-            background = AudioSegment.from_file(str(track_path), format=file_format)
+        # Trim to exact duration
+        trimmed = background[:target_ms]
 
-            # Get duration in milliseconds
-            target_ms = int(target_duration * 1000)
-            fade_out_ms = int(fade_out_duration * 1000)
+        # Apply fade-out at the end
+        if fade_out_ms > 0 and len(trimmed) > fade_out_ms:
+            trimmed = trimmed.fade_out(fade_out_ms)
 
-            # If track is shorter than target, loop it
-            if len(background) < target_ms:
-                logger.info(f"Track is shorter than target. Looping...")
-                times_to_loop = (target_ms // len(background)) + 1
-                background = background * times_to_loop
+        logger.info(f"Trimmed track to {target_duration:.2f}s with {fade_out_duration}s fade-out")
+        return trimmed
 
-            # Trim to exact duration
-            trimmed = background[:target_ms]
+    def trim_to_duration(
+        self,
+        track_path: Path,
+        target_duration: float,
+        fade_out_duration: float = 1.0
+    ) -> AudioSegment:
+        """
+        Load and trim background track to target duration
 
-            # Apply fade-out at the end
-            if fade_out_ms > 0 and len(trimmed) > fade_out_ms:
-                trimmed = trimmed.fade_out(fade_out_ms)
+        Args:
+            track_path: Path to music track
+            target_duration: Target duration in seconds
+            fade_out_duration: Duration of fade-out in seconds (default: 1.0)
 
-            logger.info(f"Trimmed track to {target_duration:.2f}s with {fade_out_duration}s fade-out")
-            return trimmed
+        Returns:
+            AudioSegment trimmed to target duration
+        """
+        try:
+            background = self.load_track(track_path)
+            return self.fit_to_duration(background, target_duration, fade_out_duration)
 
         except Exception as e:
             logger.error(f"Error processing background track: {e}")
@@ -151,7 +215,7 @@ class BackgroundMusicManager:
         Returns:
             Dictionary with validation results
         """
-        tracks = self.get_available_tracks()
+        tracks = self.get_available_tracks(refresh=True)
 
         results = {
             'total_tracks': len(tracks),
@@ -0,0 +1,484 @@
+"""
+Batched Bark inference: many lyric chunks per generate() call
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pronouncing
+
+from app import metrics
+from app.config import settings
+from app.services.bark_profiles import voice_prompt
+
+logger = logging.getLogger(__name__)
+
+try:
+    import torch
+    from transformers.models.bark.generation_configuration_bark import (
+        BarkCoarseGenerationConfig,
+        BarkFineGenerationConfig,
+        BarkSemanticGenerationConfig,
+    )
+except ImportError:
+    torch = None
+
+# Bark's semantic tokens per second of audio, and its default semantic length cap
+SEMANTIC_RATE_HZ = 49.9
+SEMANTIC_MAX_NEW_TOKENS = 768
+
+# Smallest semantic budget (about 1.3s), so very short chunks still get a full phrase
+SEMANTIC_MIN_NEW_TOKENS = 64
+
+# Silence detection for trimming: frame length and audio kept after the last voiced frame
+SILENCE_FRAME_SECONDS = 0.01
+SILENCE_TAIL_SECONDS = 0.1
+
+
+def count_syllables(text: str) -> int:
+    """
+    Sung syllables in a Bark chunk (bracketed directions are not sung)
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        Syllable count from the CMU dictionary, estimated from vowel groups for unknown words
+    """
+    text = re.sub(r"\[[^\]]*\]", " ", text)
+    syllables = 0
+    for word in re.findall(r"[A-Za-z']+", text):
+        phones = pronouncing.phones_for_word(word.lower())
+        if phones:
+            syllables += pronouncing.syllable_count(phones[0])
+        else:
+            syllables += max(1, len(re.findall(r"[aeiouy]+", word.lower())))
+    return syllables
+
+
+def semantic_token_budget(text: str) -> int:
+    """
+    Semantic tokens a chunk needs, from its syllable count
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        semantic_max_new_tokens for the chunk
+    """
+    seconds = count_syllables(text) / settings.BARK_SYLLABLES_PER_SECOND
+    tokens = math.ceil(seconds * SEMANTIC_RATE_HZ * settings.BARK_TOKEN_BUDGET_MARGIN)
+    return min(max(tokens, SEMANTIC_MIN_NEW_TOKENS), SEMANTIC_MAX_NEW_TOKENS)
+
+
+def trim_trailing_silence(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Cut the silence Bark leaves after the last sung phrase
+
+    A frame counts as silent when its RMS is BARK_SILENCE_THRESHOLD_DB
+    below the loudest frame; a short tail is kept so phrases don't end abruptly.
+
+    Args:
+        audio: Mono float samples
+        sample_rate: Sample rate of the audio
+
+    Returns:
+        View of the audio without the trailing silence
+    """
+    frame = max(int(sample_rate * SILENCE_FRAME_SECONDS), 1)
+    frames = len(audio) // frame
+    if frames == 0:
+        return audio
+
+    rms = np.sqrt(np.mean(np.square(audio[:frames * frame].reshape(frames, frame), dtype=np.float32), axis=1))
+    voiced = np.flatnonzero(rms > rms.max() * 10 ** (settings.BARK_SILENCE_THRESHOLD_DB / 20))
+    if len(voiced) == 0:
+        return audio
+
+    end = (voiced[-1] + 1) * frame + int(sample_rate * SILENCE_TAIL_SECONDS)
+    return audio[:min(end, len(audio))]
+
+
+class SemanticTokenCache:
+    """
+    In-memory LRU cache of Bark semantic tokens per chunk
+
+    The semantic pass decides what is sung and how it is phrased; coarse
+    and fine passes still sample fresh, so a reused chorus line keeps some
+    natural variation while skipping the semantic model.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Chunks kept (defaults to BARK_SEMANTIC_CACHE_SIZE)
+        """
+        self.max_entries = max_entries or settings.BARK_SEMANTIC_CACHE_SIZE
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """Cached tokens (1-D CPU tensor) or None"""
+        with self._lock:
+            tokens = self._entries.get(key)
+            if tokens is not None:
+                self._entries.move_to_end(key)
+        metrics.count(metrics.BARK_SEMANTIC_CACHE_HITS if tokens is not None else metrics.BARK_SEMANTIC_CACHE_MISSES, 1)
+        return tokens
+
+    def put(self, key: tuple, tokens):
+        """Store tokens, evicting the least recently used chunks"""
+        with self._lock:
+            self._entries[key] = tokens
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class _BarkRequest:
+    """Chunks of one song waiting for a shared batch"""
+
+    def __init__(self, chunks: List[str]):
+        self.chunks = chunks
+        self.audio: Optional[List[np.ndarray]] = None
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class BarkBatcher:
+    """
+    Generate Bark audio for many text chunks with as few generate() calls as possible
+
+    Chunks are sorted by length (so padding stays small), padded into
+    batches of up to BARK_BATCH_SIZE and generated together; each output
+    is trimmed to its own length and returned in the original order.
+
+    With BARK_BATCH_WINDOW_MS > 0, songs generated concurrently in the same
+    process (batch jobs, streaming lookahead) also share batches: the first
+    caller waits the window for others to add their chunks, then runs every
+    pending chunk, while the others wait for their results. Only that
+    caller touches the model, so generate() is never run concurrently.
+
+    Example:
+        batcher = BarkBatcher(model, processor, device)
+        audio_arrays = batcher.generate(chunks)
+    """
+
+    def __init__(
+        self,
+        model,
+        processor,
+        device: str,
+        max_batch_size: Optional[int] = None,
+        window_seconds: Optional[float] = None
+    ):
+        """
+        Initialize batcher
+
+        Args:
+            model: Loaded BarkModel
+            processor: Matching AutoProcessor
+            device: Device the model runs on
+            max_batch_size: Chunks per generate() call (defaults to BARK_BATCH_SIZE)
+            window_seconds: Wait for concurrent songs' chunks (defaults to BARK_BATCH_WINDOW_MS)
+        """
+        self.model = model
+        self.processor = processor
+        self.device = device
+        self.max_batch_size = max(max_batch_size or settings.BARK_BATCH_SIZE, 1)
+        if window_seconds is None:
+            window_seconds = settings.BARK_BATCH_WINDOW_MS / 1000.0
+        self.window_seconds = window_seconds
+
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._pending: List[_BarkRequest] = []
+        self._serving = False
+        self._output_lengths_supported = True
+        self._min_eos_p_supported = _min_eos_p_supported()
+        if settings.BARK_MIN_EOS_P is not None and not self._min_eos_p_supported:
+            logger.warning("This transformers version ignores min_eos_p (needs 4.35+); BARK_MIN_EOS_P has no effect")
+        self.semantic_cache = SemanticTokenCache() if settings.BARK_SEMANTIC_CACHE_SIZE > 0 else None
+
+    @property
+    def sample_rate(self) -> int:
+        """Sample rate of generated audio"""
+        return self.model.generation_config.sample_rate
+
+    @property
+    def pending_chunks(self) -> int:
+        """Chunks waiting for the next shared batch"""
+        with self._lock:
+            return sum(len(request.chunks) for request in self._pending)
+
+    def generate(self, chunks: List[str]) -> List[np.ndarray]:
+        """
+        Generate audio for text chunks
+
+        Args:
+            chunks: Text chunks (already formatted for Bark)
+
+        Returns:
+            One float audio array per chunk, in the same order
+        """
+        if not chunks:
+            return []
+
+        if self.window_seconds <= 0:
+            # Concurrent callers (e.g. line-mode TTS) take turns on the model
+            with self._model_lock:
+                return self._generate_all(chunks)
+
+        request = _BarkRequest(chunks)
+
+        with self._lock:
+            self._pending.append(request)
+            serve = not self._serving
+            if serve:
+                self._serving = True
+
+        if serve:
+            self._serve_pending()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.audio
+
+    def _serve_pending(self):
+        """Run batches for every waiting song until none are left"""
+        # Give songs started at about the same time a chance to join
+        time.sleep(self.window_seconds)
+
+        while True:
+            with self._lock:
+                requests = self._pending
+                self._pending = []
+                if not requests:
+                    self._serving = False
+                    return
+
+            chunks = [chunk for request in requests for chunk in request.chunks]
+            if len(requests) > 1:
+                logger.info(f"Batching {len(chunks)} Bark chunks from {len(requests)} songs")
+
+            try:
+                audio = self._generate_all(chunks)
+            except Exception as e:
+                for request in requests:
+                    request.error = e
+                    request.done.set()
+                continue
+
+            start = 0
+            for request in requests:
+                request.audio = audio[start:start + len(request.chunks)]
+                start += len(request.chunks)
+                request.done.set()
+
+    def _generate_all(self, chunks: List[str]) -> List[np.ndarray]:
+        """Generate every chunk in length-sorted batches, returning outputs in input order"""
+        order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+        outputs: List[Optional[np.ndarray]] = [None] * len(chunks)
+
+        start = 0
+        while start < len(order):
+            batch = order[start:start + self.max_batch_size]
+            logger.debug(f"Bark batch of {len(batch)} chunks")
+            for index, audio in zip(batch, self._generate_batch([chunks[i] for i in batch])):
+                outputs[index] = audio
+            start += len(batch)
+
+        return outputs
+
+    def _generate_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """One padded generate() call"""
+        inputs = self.processor(texts if len(texts) > 1 else texts[0], return_tensors="pt")
+
+        # Move inputs to same device as model
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+
+        # The voice preset is loaded and moved to the device once, not per chunk
+        inputs["history_prompt"] = voice_prompt(self.processor, self.device)
+
+        generate_kwargs = dict(
+            semantic_temperature=settings.BARK_SEMANTIC_TEMP,
+            coarse_temperature=settings.BARK_COARSE_TEMP,
+            fine_temperature=settings.BARK_FINE_TEMP,
+            do_sample=True
+        )
+
+        if settings.BARK_TOKEN_BUDGET:
+            # Batched chunks share one limit; length-sorted batches keep them close
+            generate_kwargs["semantic_max_new_tokens"] = max(semantic_token_budget(text) for text in texts)
+        if settings.BARK_MIN_EOS_P is not None and self._min_eos_p_supported:
+            # Stop a chunk's semantic pass once end-of-speech is this likely, instead of running on into silence
+            generate_kwargs["semantic_min_eos_p"] = settings.BARK_MIN_EOS_P
+
+        if settings.BARK_SEED is not None:
+            torch.manual_seed(settings.BARK_SEED)
+
+        lengths = None
+        redo_singly = False
+        with torch.no_grad(), metrics.stage_timer("tts"):
+            if self._output_lengths_supported:
+                try:
+                    if self.semantic_cache is not None:
+                        audio, lengths = self._generate_reusing_semantics(texts, inputs, generate_kwargs)
+                    else:
+                        audio, lengths = self.model.generate(**inputs, **generate_kwargs, return_output_lengths=True)
+                except TypeError as e:
+                    if "return_output_lengths" not in str(e):
+                        raise
+                    self._disable_batching()
+                    if len(texts) > 1:
+                        redo_singly = True
+                    else:
+                        audio = self.model.generate(**inputs, **generate_kwargs)
+            else:
+                audio = self.model.generate(**inputs, **generate_kwargs)
+
+        if redo_singly:
+            # Padded outputs can't be trimmed: redo this batch one chunk at a time
+            # (outside the timer above, as every call times itself)
+            return [audio for text in texts for audio in self._generate_batch([text])]
+
+        audio = audio.cpu().numpy()
+        if audio.ndim == 1:
+            audio = audio[np.newaxis, :]
+
+        if lengths is None:
+            outputs = [audio[i] for i in range(len(texts))]
+        else:
+            lengths = lengths.cpu().numpy() if hasattr(lengths, 'cpu') else np.asarray(lengths)
+            outputs = [audio[i, :int(lengths[i])] for i in range(len(texts))]
+
+        if settings.BARK_TRIM_SILENCE:
+            outputs = [trim_trailing_silence(output, self.sample_rate) for output in outputs]
+
+        return outputs
+
+    def _generate_reusing_semantics(
+        self,
+        texts: List[str],
+        inputs: Dict[str, Any],
+        generate_kwargs: Dict[str, Any]
+    ) -> Tuple[Any, List[int]]:
+        """
+        BarkModel.generate() run stage by stage, with cached semantic tokens
+
+        Only distinct chunks without cached tokens go through the semantic
+        model; the coarse and fine models and the codec then run on the
+        whole batch. With one chunk per lyric line, chorus lines reuse
+        tokens within a song as well as across songs.
+
+        Returns:
+            Tuple of (padded audio batch, output length per chunk), like generate(return_output_lengths=True)
+        """
+        model = self.model
+        semantic_config = BarkSemanticGenerationConfig(**model.generation_config.semantic_config)
+        coarse_config = BarkCoarseGenerationConfig(**model.generation_config.coarse_acoustics_config)
+        fine_config = BarkFineGenerationConfig(**model.generation_config.fine_acoustics_config)
+        codebook_size = model.generation_config.codebook_size
+        history_prompt = inputs["history_prompt"]
+        semantic_kwargs, coarse_kwargs, fine_kwargs = _split_generate_kwargs(generate_kwargs)
+
+        # The token budget depends on the rest of the batch, and tokens that fit a chunk stay valid under any larger one
+        sampling = tuple(sorted((k, v) for k, v in semantic_kwargs.items() if k != "max_new_tokens"))
+        keys = [(text, settings.BARK_VOICE_PRESET, sampling) for text in texts]
+
+        # Repeated lines (a song's chorus) usually land in the same length-sorted batch:
+        # their semantic pass runs once for all of them
+        tokens = {key: self.semantic_cache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, cached in tokens.items() if cached is None]
+
+        if missing:
+            rows = [keys.index(key) for key in missing]
+            semantic_output = model.semantic.generate(
+                inputs["input_ids"][rows],
+                history_prompt=history_prompt,
+                attention_mask=inputs["attention_mask"][rows],
+                semantic_generation_config=semantic_config,
+                **semantic_kwargs
+            )
+            for row, key in zip(semantic_output, missing):
+                tokens[key] = row[row != semantic_config.semantic_pad_token].cpu()
+                self.semantic_cache.put(key, tokens[key])
+
+        if len(missing) < len(texts):
+            logger.debug(f"Reused semantic tokens for {len(texts) - len(missing)} of {len(texts)} Bark chunks")
+
+        semantic_output = torch.nn.utils.rnn.pad_sequence(
+            [tokens[key].to(self.device) for key in keys],
+            batch_first=True,
+            padding_value=semantic_config.semantic_pad_token
+        )
+
+        coarse_output, lengths = model.coarse_acoustics.generate(
+            semantic_output,
+            history_prompt=history_prompt,
+            semantic_generation_config=semantic_config,
+            coarse_generation_config=coarse_config,
+            codebook_size=codebook_size,
+            return_output_lengths=True,
+            **coarse_kwargs
+        )
+        lengths = lengths // coarse_config.n_coarse_codebooks
+
+        fine_output = model.fine_acoustics.generate(
+            coarse_output,
+            history_prompt=history_prompt,
+            semantic_generation_config=semantic_config,
+            coarse_generation_config=coarse_config,
+            fine_generation_config=fine_config,
+            codebook_size=codebook_size,
+            **fine_kwargs
+        )
+
+        # Mirror BarkModel.generate() under enable_cpu_offload(): the codec has no
+        # forward pass for its hook to act on, so it is moved by hand
+        if getattr(model, "fine_acoustics_hook", None) is not None:
+            model.fine_acoustics_hook.offload()
+            model.codec_model = model.codec_model.to(model.device)
+
+        audio = model.codec_decode(fine_output, lengths)
+
+        if getattr(model, "codec_model_hook", None) is not None:
+            model.codec_model_hook.offload()
+
+        return torch.nn.utils.rnn.pad_sequence(audio, batch_first=True), [len(a) for a in audio]
+
+    def _disable_batching(self):
+        """Fall back to one chunk per call on transformers versions without output lengths"""
+        logger.warning(
+            "This transformers version cannot report Bark output lengths; "
+            "generating one chunk per call"
+        )
+        self._output_lengths_supported = False
+        self.max_batch_size = 1
+
+
+def _min_eos_p_supported() -> bool:
+    """Whether BarkSemanticModel.generate honors min_eos_p (transformers 4.35+, which added it to the semantic config)"""
+    return torch is not None and hasattr(BarkSemanticGenerationConfig(), "min_eos_p")
+
+
+def _split_generate_kwargs(kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Route semantic_/coarse_/fine_ arguments to their sub-model (unprefixed ones go to all), as BarkModel.generate does"""
+    split = {"semantic_": {}, "coarse_": {}, "fine_": {}}
+    shared = {}
+    for key, value in kwargs.items():
+        for prefix, target in split.items():
+            if key.startswith(prefix):
+                target[key[len(prefix):]] = value
+                break
+        else:
+            shared[key] = value
+
+    return tuple({**shared, **split[prefix]} for prefix in ("semantic_", "coarse_", "fine_"))
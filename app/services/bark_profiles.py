@@ -0,0 +1,236 @@
+"""
+Bark loading and CPU inference profiles
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from app.config import settings
+from app.services.bark_snapshot import load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+try:
+    from transformers import AutoProcessor, BarkModel
+    import torch
+    BARK_AVAILABLE = True
+except ImportError:
+    BARK_AVAILABLE = False
+
+# CPU inference profiles (BARK_CPU_PROFILE). "model" None means BARK_MODEL.
+#   default:         float32, as loaded by transformers
+#   fast:            BetterTransformer fused attention + int8 dynamic quantization of Linear layers
+#   small:           suno/bark-small with BetterTransformer
+#   small-quantized: suno/bark-small with BetterTransformer + int8 quantization
+CPU_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {"model": None, "better_transformer": False, "quantize": False},
+    "fast": {"model": None, "better_transformer": True, "quantize": True},
+    "small": {"model": "suno/bark-small", "better_transformer": True, "quantize": False},
+    "small-quantized": {"model": "suno/bark-small", "better_transformer": True, "quantize": True},
+}
+
+_threads_configured = False
+
+# Processed voice presets per (preset, device)
+_voice_prompts: Dict[Tuple[str, str], Any] = {}
+_voice_prompts_lock = threading.Lock()
+
+
+def use_gpu() -> bool:
+    """True if Bark should run on CUDA"""
+    return BARK_AVAILABLE and settings.BARK_USE_GPU and torch.cuda.is_available()
+
+
+def cpu_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Settings of a CPU profile
+
+    Args:
+        name: Profile name (defaults to BARK_CPU_PROFILE)
+
+    Returns:
+        Profile dictionary (unknown names fall back to "default")
+    """
+    name = name or settings.BARK_CPU_PROFILE
+    if name not in CPU_PROFILES:
+        logger.warning(f"Unknown BARK_CPU_PROFILE '{name}', using 'default'")
+        name = "default"
+    return CPU_PROFILES[name]
+
+
+def effective_model_name(profile: Optional[str] = None) -> str:
+    """Checkpoint that will be loaded (GPU nodes always use BARK_MODEL)"""
+    if use_gpu():
+        return settings.BARK_MODEL
+    return cpu_profile(profile)["model"] or settings.BARK_MODEL
+
+
+def cpu_thread_count() -> int:
+    """
+    Intra-op threads for one Bark instance
+
+    Each Celery worker process loads its own model, so the cores are split
+    between WORKER_CONCURRENCY processes instead of every process using
+    all of them and thrashing.
+    """
+    if settings.BARK_CPU_THREADS > 0:
+        return settings.BARK_CPU_THREADS
+
+    cores = os.cpu_count() or 1
+    processes = settings.WORKER_CONCURRENCY or cores
+    return max(1, cores // processes)
+
+
+def configure_cpu_threads():
+    """Apply the thread count to torch (once per process)"""
+    global _threads_configured
+    if _threads_configured:
+        return
+
+    threads = cpu_thread_count()
+    torch.set_num_threads(threads)
+    try:
+        # Bark runs its sub-models one after another; inter-op parallelism only adds contention
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already fixed once parallel work has started
+
+    _threads_configured = True
+    logger.info(f"Bark CPU threads: {threads}")
+
+
+def load_bark(profile: Optional[str] = None) -> Tuple[Any, Any, str]:
+    """
+    Load Bark for this node: float16 on GPU, or the selected CPU profile
+
+    Args:
+        profile: CPU profile name (defaults to BARK_CPU_PROFILE)
+
+    Returns:
+        Tuple of (model, processor, device)
+    """
+    if not BARK_AVAILABLE:
+        raise ImportError("Bark dependencies not installed")
+
+    start = time.perf_counter()
+    model_name = effective_model_name(profile)
+    logger.info(f"Loading Bark model: {model_name}")
+
+    processor = AutoProcessor.from_pretrained(model_name)
+
+    if use_gpu():
+        model = load_weights(model_name, "float16")
+        if settings.BARK_OFFLOAD_IDLE_SUBMODELS:
+            # Only the sub-model currently generating stays on the GPU
+            model.enable_cpu_offload()
+            logger.info("Bark model loaded on GPU (CUDA) with idle sub-models offloaded")
+        else:
+            model = model.to("cuda")
+            logger.info("Bark model loaded on GPU (CUDA)")
+        device = "cuda"
+    else:
+        configure_cpu_threads()
+        model = load_weights(model_name, "float32")
+        model = optimize_for_cpu(model, cpu_profile(profile))
+        device = "cpu"
+        logger.info(f"Bark model loaded on CPU (profile: {profile or settings.BARK_CPU_PROFILE})")
+
+    model.eval()
+    logger.info(f"Bark ready in {time.perf_counter() - start:.1f}s")
+
+    return model, processor, device
+
+
+def load_weights(model_name: str, dtype: str):
+    """
+    Float Bark model, memory-mapped from the local snapshot when BARK_SNAPSHOT_ENABLED
+
+    A missing snapshot is written after the first regular load, so later
+    processes on the host map it instead of deserializing the checkpoint.
+
+    Args:
+        model_name: Checkpoint to load
+        dtype: "float32" or "float16"
+
+    Returns:
+        BarkModel on CPU
+    """
+    if settings.BARK_SNAPSHOT_ENABLED:
+        try:
+            model = load_snapshot(model_name, dtype)
+            if model is not None:
+                return model
+        except Exception as e:
+            logger.warning(f"Bark snapshot unusable, loading {model_name} from the checkpoint: {e}")
+
+    model = BarkModel.from_pretrained(model_name, torch_dtype=getattr(torch, dtype))
+
+    if settings.BARK_SNAPSHOT_ENABLED:
+        try:
+            save_snapshot(model, model_name, dtype)
+        except Exception as e:
+            logger.warning(f"Could not write Bark snapshot: {e}")
+
+    return model
+
+
+def voice_prompt(processor, device: str, preset: Optional[str] = None):
+    """
+    History prompt of a voice preset, loaded and moved to the device once per process
+
+    Args:
+        processor: Bark AutoProcessor
+        device: Device the model runs on
+        preset: Voice preset (defaults to BARK_VOICE_PRESET)
+
+    Returns:
+        Processed history prompt to pass to generate()
+    """
+    preset = preset or settings.BARK_VOICE_PRESET
+    key = (preset, str(device))
+
+    with _voice_prompts_lock:
+        prompt = _voice_prompts.get(key)
+        if prompt is None:
+            prompt = processor("", voice_preset=preset, return_tensors="pt")["history_prompt"].to(device)
+            _voice_prompts[key] = prompt
+            logger.info(f"Voice preset {preset} cached on {device}")
+
+    return prompt
+
+
+def release_bark_memory():
+    """Return the memory of a dropped Bark model to the system (and the CUDA cache)"""
+    gc.collect()
+    if use_gpu():
+        torch.cuda.empty_cache()
+
+
+def optimize_for_cpu(model, profile: Dict[str, Any]):
+    """
+    Apply a CPU profile's optimizations to a float32 model
+
+    BetterTransformer is applied first: it swaps attention modules, which
+    it can no longer do once their Linear layers are quantized.
+
+    Args:
+        model: BarkModel on CPU
+        profile: Entry of CPU_PROFILES
+
+    Returns:
+        Optimized model (the original if an optimization is unavailable)
+    """
+    if profile["better_transformer"]:
+        try:
+            model = model.to_bettertransformer()
+            logger.info("Bark converted to BetterTransformer")
+        except Exception as e:
+            logger.warning(f"BetterTransformer unavailable, keeping eager attention: {e}")
+
+    if profile["quantize"]:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        logger.info("Bark Linear layers quantized to int8")
+
+    return model
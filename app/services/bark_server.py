@@ -0,0 +1,269 @@
+"""
+Shared Bark inference server: one model copy for every worker process on the host
+
+Run it next to the Celery workers and set BARK_SERVER_ENABLED=True:
+
+    python -m app.services.bark_server            # serve
+    python -m app.services.bark_server --stats    # print queue depth and counters
+
+Requests are pickled, so the socket must only be reachable by trusted
+processes: it is created with owner-only permissions inside a directory
+of mode 0700, and workers have to run as the server's user. Setting
+BARK_SERVER_AUTHKEY adds a shared-secret handshake on every connection.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _authkey() -> Optional[bytes]:
+    """Shared secret for the connection handshake (the private socket applies either way)"""
+    return settings.BARK_SERVER_AUTHKEY.encode("utf-8") if settings.BARK_SERVER_AUTHKEY else None
+
+
+class BarkInferenceServer:
+    """
+    Owns the host's only Bark model and serves every worker process
+
+    Each connection is handled on its own thread, and all of them feed
+    one BarkBatcher with a batching window, so chunks from different
+    workers are micro-batched into shared generate() calls. Requests and
+    replies are pickled over a Unix socket (multiprocessing.connection),
+    which carries NumPy arrays without extra encoding.
+    """
+
+    def __init__(self, address: Optional[Path] = None, profile: Optional[str] = None):
+        """
+        Configure server
+
+        Args:
+            address: Unix socket path (defaults to BARK_SERVER_SOCKET)
+            profile: Bark CPU profile (defaults to BARK_CPU_PROFILE)
+        """
+        self.address = Path(address or settings.BARK_SERVER_SOCKET)
+        self.profile = profile
+        self.batcher = None
+        self.started_at = time.time()
+
+        self._lock = threading.Lock()
+        self._in_flight_chunks = 0
+        self._requests_served = 0
+        self._chunks_served = 0
+
+    def serve_forever(self):
+        """Load the model and accept connections until interrupted"""
+        from app.services.bark_batcher import BarkBatcher
+        from app.services.bark_profiles import load_bark
+
+        model, processor, device = load_bark(self.profile)
+        self.batcher = BarkBatcher(
+            model, processor, device,
+            window_seconds=settings.BARK_SERVER_BATCH_WINDOW_MS / 1000.0
+        )
+
+        self._prepare_socket_directory()
+        # A socket left behind by a previous run would make bind() fail
+        self.address.unlink(missing_ok=True)
+
+        # Bind under an owner-only umask so the socket is never reachable by others,
+        # not even between bind() and a chmod
+        previous_umask = os.umask(0o077)
+        try:
+            # The handshake runs on each connection's thread, so a slow or silent
+            # client can't stall accept()
+            listener = Listener(str(self.address), family="AF_UNIX", authkey=None)
+        finally:
+            os.umask(previous_umask)
+
+        with listener:
+            logger.info(f"Bark server listening on {self.address}")
+
+            while True:
+                try:
+                    connection = listener.accept()
+                except OSError as e:
+                    logger.warning(f"Failed to accept Bark client: {e}")
+                    continue
+
+                threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _prepare_socket_directory(self):
+        """Create the socket's directory, or check an existing one, as private to this user"""
+        directory = self.address.parent
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+        info = directory.stat()
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"Bark socket directory {directory} is owned by another user")
+        if info.st_mode & 0o077:
+            os.chmod(directory, 0o700)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Load and throughput counters
+
+        Returns:
+            Dictionary with queue_depth (chunks waiting for a batch),
+            in_flight_chunks, requests_served, chunks_served and uptime_seconds
+        """
+        with self._lock:
+            return {
+                "queue_depth": self.batcher.pending_chunks if self.batcher else 0,
+                "in_flight_chunks": self._in_flight_chunks,
+                "requests_served": self._requests_served,
+                "chunks_served": self._chunks_served,
+                "uptime_seconds": time.time() - self.started_at,
+            }
+
+    def _handle(self, connection):
+        """Authenticate one client connection, then serve it"""
+        try:
+            authkey = _authkey()
+            if authkey:
+                # Same exchange Listener(authkey=...) runs inside accept()
+                deliver_challenge(connection, authkey)
+                answer_challenge(connection, authkey)
+
+            while True:
+                try:
+                    request = connection.recv()
+                except EOFError:
+                    break
+                connection.send(self._dispatch(request))
+        except Exception as e:
+            logger.warning(f"Bark client connection failed: {e}")
+        finally:
+            connection.close()
+
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a generate or stats request"""
+        op = request.get("op")
+
+        if op == "stats":
+            return {"ok": True, "stats": self.stats()}
+
+        if op != "generate":
+            return {"ok": False, "error": f"Unknown request '{op}'"}
+
+        chunks = request.get("chunks") or []
+        with self._lock:
+            self._in_flight_chunks += len(chunks)
+
+        try:
+            audio = self.batcher.generate(chunks)
+            return {"ok": True, "audio": audio, "sample_rate": self.batcher.sample_rate}
+        except Exception as e:
+            logger.error(f"Bark generation failed: {e}", exc_info=True)
+            return {"ok": False, "error": str(e)}
+        finally:
+            with self._lock:
+                self._in_flight_chunks -= len(chunks)
+                self._requests_served += 1
+                self._chunks_served += len(chunks)
+
+
+class BarkServerClient:
+    """
+    Worker-side stand-in for BarkBatcher that sends chunks to the Bark server
+
+    A connection is opened per request, so nothing socket-related is
+    inherited across Celery's prefork.
+    """
+
+    def __init__(self, address: Optional[Path] = None, timeout: Optional[float] = None):
+        """
+        Configure client
+
+        Args:
+            address: Unix socket path (defaults to BARK_SERVER_SOCKET)
+            timeout: Seconds to wait for a reply (defaults to BARK_SERVER_TIMEOUT_SECONDS)
+        """
+        self.address = Path(address or settings.BARK_SERVER_SOCKET)
+        self.timeout = timeout if timeout is not None else settings.BARK_SERVER_TIMEOUT_SECONDS
+        self._sample_rate: Optional[int] = None
+
+    @property
+    def sample_rate(self) -> int:
+        """Sample rate of the server's model (known after the first generate)"""
+        if self._sample_rate is None:
+            raise RuntimeError("Sample rate is known after the first generate() call")
+        return self._sample_rate
+
+    def generate(self, chunks: List[str]) -> List[np.ndarray]:
+        """
+        Generate audio for text chunks on the server
+
+        Args:
+            chunks: Text chunks (already formatted for Bark)
+
+        Returns:
+            One float audio array per chunk, in the same order
+        """
+        with metrics.stage_timer("tts"):
+            reply = self._request({"op": "generate", "chunks": chunks})
+
+        self._sample_rate = reply["sample_rate"]
+        return reply["audio"]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Server queue depth and counters
+
+        Returns:
+            Dictionary from BarkInferenceServer.stats()
+        """
+        return self._request({"op": "stats"})["stats"]
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and wait for its reply"""
+        try:
+            connection = Client(str(self.address), family="AF_UNIX", authkey=_authkey())
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise ConnectionError(f"Bark server is not running at {self.address}") from e
+
+        try:
+            connection.send(message)
+            if not connection.poll(self.timeout):
+                raise TimeoutError(f"Bark server did not answer within {self.timeout:.0f}s")
+            reply = connection.recv()
+        finally:
+            connection.close()
+
+        if not reply.get("ok"):
+            raise RuntimeError(f"Bark server error: {reply.get('error')}")
+        return reply
+
+
+def main():
+    """Run the server, or print its stats"""
+    parser = argparse.ArgumentParser(description="Shared Bark inference server")
+    parser.add_argument("--stats", action="store_true", help="Print the running server's stats and exit")
+    parser.add_argument("--profile", help="Bark CPU profile (defaults to BARK_CPU_PROFILE)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    if args.stats:
+        print(json.dumps(BarkServerClient().stats(), indent=2))
+        return
+
+    BarkInferenceServer(profile=args.profile).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
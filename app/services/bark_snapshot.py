@@ -0,0 +1,225 @@
+"""
+Local Bark weight snapshots loaded with memory-mapping
+
+A snapshot is a directory with the model's config, generation config and
+all weights in one safetensors file, already in the dtype the node runs
+(float32 on CPU, float16 on GPU). Loading maps the file copy-on-write and
+hands the mapped tensors to the model as-is, so nothing is deserialized:
+weights are paged in from the OS page cache on first touch, and every
+process on the host loading the same snapshot shares those pages.
+
+Weights rewritten after loading (int8 quantization, BetterTransformer's
+fused attention, the copy to the GPU) are private again, so the sharing
+applies in full to the "default" and "small" CPU profiles.
+
+Build snapshots ahead of deployment with:
+
+    python -m app.services.bark_snapshot [--profile NAME]
+"""
+import argparse
+import inspect
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import torch
+    from safetensors.torch import save_file
+    from transformers import BarkConfig, BarkModel, GenerationConfig
+    from transformers.modeling_utils import no_init_weights
+    SNAPSHOTS_AVAILABLE = True
+except ImportError:
+    SNAPSHOTS_AVAILABLE = False
+
+WEIGHTS_FILE = "model.safetensors"
+
+# safetensors dtype names
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def snapshot_path(model_name: str, dtype: str) -> Path:
+    """
+    Directory of the snapshot for a checkpoint and dtype
+
+    Args:
+        model_name: Hugging Face checkpoint (e.g. "suno/bark")
+        dtype: "float32" or "float16"
+
+    Returns:
+        Path under BARK_SNAPSHOT_DIR
+    """
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name)
+    return Path(settings.BARK_SNAPSHOT_DIR) / f"{slug}-{dtype}"
+
+
+def save_snapshot(model, model_name: str, dtype: str) -> Path:
+    """
+    Write a freshly loaded (not yet optimized) model as a snapshot
+
+    The snapshot is assembled in a temporary directory and renamed into
+    place, so concurrent workers never see a partial one.
+
+    Args:
+        model: BarkModel as returned by from_pretrained
+        model_name: Checkpoint it was loaded from
+        dtype: Dtype its weights are in
+
+    Returns:
+        Snapshot directory
+    """
+    target = snapshot_path(model_name, dtype)
+    staging = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+    staging.mkdir(parents=True)
+
+    try:
+        # Tied weights share storage, which safetensors refuses; store each name separately
+        tensors, seen = {}, set()
+        for name, tensor in model.state_dict().items():
+            tensor = tensor.detach().contiguous()
+            if tensor.data_ptr() in seen:
+                tensor = tensor.clone()
+            seen.add(tensor.data_ptr())
+            tensors[name] = tensor
+
+        save_file(tensors, str(staging / WEIGHTS_FILE), metadata={"model": model_name, "dtype": dtype})
+        model.config.save_pretrained(staging)
+        model.generation_config.save_pretrained(staging)
+
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Another process finished the same snapshot first
+            shutil.rmtree(staging, ignore_errors=True)
+            return target
+
+        logger.info(f"Bark snapshot written to {target}")
+        return target
+
+    except Exception as e:
+        logger.error(f"Failed to write Bark snapshot: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def load_snapshot(model_name: str, dtype: str) -> Optional[Any]:
+    """
+    Build a BarkModel on memory-mapped snapshot weights
+
+    Args:
+        model_name: Checkpoint the snapshot was made from
+        dtype: Dtype of the snapshot
+
+    Returns:
+        BarkModel on CPU, or None if there is no snapshot
+    """
+    directory = snapshot_path(model_name, dtype)
+    if not (directory / WEIGHTS_FILE).exists():
+        return None
+
+    config = BarkConfig.from_pretrained(directory)
+
+    # Parameters are replaced by the mapped tensors below, so skip initializing them
+    with no_init_weights():
+        model = BarkModel(config)
+
+    state_dict = map_safetensors(directory / WEIGHTS_FILE)
+    if _assign_supported():
+        model.load_state_dict(state_dict, strict=True, assign=True)
+    else:
+        # torch < 2.1 can only copy into the model's own tensors: loading still
+        # skips deserialization, but the weights are private to this process
+        logger.warning("torch < 2.1: Bark snapshot weights are copied, not shared between processes")
+        model.load_state_dict(state_dict, strict=True)
+    model.tie_weights()
+    model.generation_config = GenerationConfig.from_pretrained(directory)
+
+    logger.info(f"Bark weights memory-mapped from {directory}")
+    return model
+
+
+def _assign_supported() -> bool:
+    """Whether load_state_dict can adopt the given tensors (assign=True, torch 2.1+)"""
+    return "assign" in inspect.signature(torch.nn.Module.load_state_dict).parameters
+
+
+def map_safetensors(path: Path) -> Dict[str, Any]:
+    """
+    Memory-map a safetensors file as tensors without copying
+
+    The mapping is copy-on-write (private), so a stray write can't touch
+    the file, while untouched pages stay shared through the page cache.
+
+    Args:
+        path: safetensors file
+
+    Returns:
+        Dictionary of tensor name to tensor viewing the mapping
+    """
+    with open(path, "rb") as f:
+        header_length = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_length))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_length
+    tensors = {}
+
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+
+        dtype = getattr(torch, _DTYPES[info["dtype"]])
+        start, end = info["data_offsets"]
+
+        if end == start:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+
+        count = (end - start) // torch.empty((), dtype=dtype).element_size()
+        # frombuffer keeps a reference to the mapping for as long as the tensor lives
+        tensors[name] = torch.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + start
+        ).reshape(info["shape"])
+
+    return tensors
+
+
+def main():
+    """Build the snapshot this node would load"""
+    parser = argparse.ArgumentParser(description="Build a memory-mappable Bark snapshot")
+    parser.add_argument("--profile", help="Bark CPU profile (defaults to BARK_CPU_PROFILE)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    from app.services.bark_profiles import effective_model_name, use_gpu
+
+    model_name = effective_model_name(args.profile)
+    dtype = "float16" if use_gpu() else "float32"
+
+    if (snapshot_path(model_name, dtype) / WEIGHTS_FILE).exists():
+        print(f"Snapshot already exists: {snapshot_path(model_name, dtype)}")
+        return
+
+    model = BarkModel.from_pretrained(model_name, torch_dtype=getattr(torch, dtype))
+    print(f"Snapshot written to {save_snapshot(model, model_name, dtype)}")
+
+
+if __name__ == "__main__":
+    main()
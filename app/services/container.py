@@ -0,0 +1,147 @@
+"""
+Per-process service container so Celery workers build their services once
+"""
+import logging
+import threading
+import time
+from typing import Optional
+import pronouncing
+
+from app.config import settings
+from app.services.audio_service import AudioService
+from app.services.background_music_service import BackgroundMusicManager
+from app.services.beat_manager import BeatLibraryManager
+from app.services.karaoke_service import KaraokeGenerator
+from app.services.lyrics_service import LyricsGenerator
+from app.services.mood_analyzer import MoodAnalyzer
+from app.services.pirate_beat_generator import PirateBeatGenerator
+from app.services.vocal_service import VocalGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Long-lived services shared by every task a worker process runs
+
+    Services are created on first access (or all at once by warm_up() when
+    the worker process starts) instead of once per task, so the Gemini
+    client, ElevenLabs client, Bark model, beat catalog and background
+    track index are set up a single time. AudioService is the exception:
+    it carries a per-job analysis memo, so audio_service() returns a new
+    instance that shares the container's beat library.
+    """
+
+    def __init__(self):
+        """Initialize an empty container"""
+        self._lock = threading.RLock()
+        self._lyrics: Optional[LyricsGenerator] = None
+        self._vocals: Optional[VocalGenerator] = None
+        self._beat_manager: Optional[BeatLibraryManager] = None
+        self._music_manager: Optional[BackgroundMusicManager] = None
+        self._karaoke: Optional[KaraokeGenerator] = None
+        self._mood_analyzer: Optional[MoodAnalyzer] = None
+        self._beat_generator: Optional[PirateBeatGenerator] = None
+
+    def _get(self, attr: str, factory):
+        """Create a service once, even if several threads ask for it at the same time"""
+        service = getattr(self, attr)
+        if service is None:
+            with self._lock:
+                service = getattr(self, attr)
+                if service is None:
+                    service = factory()
+                    setattr(self, attr, service)
+        return service
+
+    @property
+    def lyrics(self) -> LyricsGenerator:
+        """Gemini lyrics generator"""
+        return self._get('_lyrics', LyricsGenerator)
+
+    @property
+    def vocals(self) -> VocalGenerator:
+        """TTS generator (loads Bark when it is the provider or the fallback)"""
+        return self._get('_vocals', VocalGenerator)
+
+    @property
+    def beat_manager(self) -> BeatLibraryManager:
+        """Beat library with its parsed catalog"""
+        return self._get('_beat_manager', BeatLibraryManager)
+
+    @property
+    def music_manager(self) -> BackgroundMusicManager:
+        """Background music manager with its cached track index"""
+        return self._get('_music_manager', BackgroundMusicManager)
+
+    @property
+    def karaoke(self) -> KaraokeGenerator:
+        """Karaoke timing generator"""
+        return self._get('_karaoke', KaraokeGenerator)
+
+    @property
+    def mood_analyzer(self) -> MoodAnalyzer:
+        """Lyrics mood analyzer"""
+        return self._get('_mood_analyzer', MoodAnalyzer)
+
+    @property
+    def beat_generator(self) -> PirateBeatGenerator:
+        """Procedural beat generator"""
+        return self._get('_beat_generator', PirateBeatGenerator)
+
+    def audio_service(self) -> AudioService:
+        """
+        New AudioService for one job, sharing the beat library
+
+        Returns:
+            AudioService with a fresh analysis memo
+        """
+        return AudioService(beat_manager=self.beat_manager)
+
+    def warm_up(self, preload_tts: Optional[bool] = None):
+        """
+        Build every service and load the data they read on first use
+
+        Args:
+            preload_tts: Also build the TTS generator (and Bark); defaults to settings
+        """
+        if preload_tts is None:
+            preload_tts = settings.WORKER_PRELOAD_TTS
+
+        start = time.perf_counter()
+
+        # The CMU dictionary is parsed lazily on the first rhyme lookup
+        pronouncing.init_cmu()
+
+        self.lyrics
+        self.beat_manager
+        self.music_manager.get_available_tracks()
+        self.karaoke
+        self.mood_analyzer
+        self.beat_generator
+
+        if preload_tts:
+            self.vocals
+
+        logger.info(f"Worker services warmed up in {time.perf_counter() - start:.2f}s (TTS preloaded: {preload_tts})")
+
+
+_container: Optional[ServiceContainer] = None
+_container_lock = threading.Lock()
+
+
+def get_services() -> ServiceContainer:
+    """
+    The current process's service container
+
+    Returns:
+        Shared ServiceContainer (created on first call)
+    """
+    global _container
+
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = ServiceContainer()
+
+    return _container
@@ -4,7 +4,7 @@ Karaoke timing service using aeneas for word-level synchronization
 import uuid
 import logging
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from app.config import settings
 
 # Try to import aeneas, but make it optional
@@ -30,7 +30,8 @@ class KaraokeGenerator:
     def generate_word_timings(
         self,
         audio_path: str,
-        lyrics: str
+        lyrics: str,
+        duration: Optional[float] = None
     ) -> List[Dict[str, any]]:
         """
         Generate word-by-word timestamps using aeneas forced alignment
@@ -38,6 +39,7 @@ class KaraokeGenerator:
         Args:
             audio_path: Path to audio file
             lyrics: Lyrics text
+            duration: Audio length in seconds, used to spread fallback timings
 
         Returns:
             List of timing dictionaries:
@@ -50,7 +52,7 @@ class KaraokeGenerator:
         # Use fallback if aeneas is not available
         if not AENEAS_AVAILABLE:
             logger.info("Aeneas not installed, using fallback timing")
-            return self._generate_fallback_timings(lyrics)
+            return self._generate_fallback_timings(lyrics, duration)
 
         try:
             logger.info(f"Generating karaoke timings for {audio_path}")
@@ -101,7 +103,7 @@ class KaraokeGenerator:
         except Exception as e:
             logger.error(f"Error generating karaoke timings: {e}")
             # Return fallback simple timing
-            return self._generate_fallback_timings(lyrics)
+            return self._generate_fallback_timings(lyrics, duration)
 
     def _clean_lyrics_for_alignment(self, lyrics: str) -> str:
         """
@@ -133,13 +135,14 @@ class KaraokeGenerator:
 
         return clean_lyrics
 
-    def _generate_fallback_timings(self, lyrics: str) -> List[Dict[str, any]]:
+    def _generate_fallback_timings(self, lyrics: str, duration: Optional[float] = None) -> List[Dict[str, any]]:
         """
         Generate simple fallback timings if aeneas fails
-        Assumes even distribution of words over 30 seconds
+        Assumes even distribution of words over the audio (30 seconds if unknown)
 
         Args:
             lyrics: Lyrics text
+            duration: Audio length in seconds
 
         Returns:
             List of simple timing dictionaries
@@ -150,8 +153,8 @@ class KaraokeGenerator:
         clean_lyrics = self._clean_lyrics_for_alignment(lyrics)
         words = clean_lyrics.split()
 
-        # Assume 30 second duration
-        duration = 30.0
+        # Assume 30 second duration unless the audio length is known
+        duration = duration or 30.0
         word_duration = duration / len(words) if words else 1.0
 
         timings = []
@@ -1,10 +1,12 @@
 """
 Lyrics generation service using Gemini API for pirate-themed sea shanties
 """
+import json
 import google.generativeai as genai
 from typing import List, Dict
 import logging
 from app.config import settings
+from app.metrics import stage_timer
 
 logger = logging.getLogger(__name__)
 
@@ -36,9 +38,100 @@ class LyricsGenerator:
         try:
             logger.info(f"Generating kids song for word '{word}' with rhymes: {rhymes}")
 
+            prompt = self._build_prompt(word, rhymes)
+
+            # Generate lyrics with Gemini
+            with stage_timer("gemini"):
+                response = self.model.generate_content(prompt)
+
+            return self._build_result(word, rhymes, response.text)
+
+        except Exception as e:
+            logger.error(f"Error generating lyrics: {e}")
+            raise
+
+    def generate_pirate_shanties(self, word_rhymes: Dict[str, List[str]]) -> Dict[str, Dict[str, any]]:
+        """
+        Generate songs for several words with a single Gemini request
+
+        The model is asked for a JSON object keyed by word. Words missing
+        from (or empty in) the response are left out of the result, so the
+        caller can fall back to generate_pirate_shanty for them.
+
+        Args:
+            word_rhymes: Mapping of theme word to its rhyming words
+
+        Returns:
+            Mapping of word to the same dictionary generate_pirate_shanty returns
+        """
+        try:
+            words = list(word_rhymes)
+            logger.info(f"Generating kids songs for {len(words)} words in one request: {words}")
+
+            topics = "\n".join(
+                f"- {word} (optional gentle words: {', '.join(rhymes[:2])})"
+                for word, rhymes in word_rhymes.items()
+            )
+
             prompt = f"""
 You are a gentle, caring preschool teacher creating SOFT, EDUCATIONAL songs for 3-5 year olds.
 
+Write ONE separate song for EACH topic below:
+{topics}
+
+CRITICAL RULES FOR EVERY SONG - READ CAREFULLY:
+1. ✅ GENTLE & SMOOTH - Use soft, flowing words that sound sweet when sung
+2. ✅ EDUCATIONAL - Teach kids what the topic is in a loving, nurturing way
+3. ✅ SIMPLE STORY - Tell one clear idea that makes sense to little children
+4. ✅ NATURAL LANGUAGE - Write like you're talking to a young child, not performing
+5. ✅ CALM TONE - Soothing and peaceful, like a lullaby or gentle nursery rhyme
+
+ABSOLUTELY FORBIDDEN WORDS (NEVER USE THESE):
+❌ arr, ahoy, yo-ho, avast, matey, shiver, timbers
+❌ ANY pirate-related words or sounds
+❌ ANY harsh or loud exclamations
+❌ ship, sail, sea, ocean, boat, treasure, captain, crew (unless it is the topic itself)
+
+SONG STRUCTURE:
+✅ Write exactly 4-6 gentle lines per song
+✅ Each line teaches something sweet about the song's topic
+✅ Use words a 3-year-old knows: happy, soft, pretty, nice, love, play, fun
+✅ Make it peaceful and comforting
+
+RESPONSE FORMAT:
+Respond ONLY with a JSON object. Each key is a topic word exactly as listed,
+each value is that song's lyrics as one string with a newline between lines.
+            """
+
+            with stage_timer("gemini"):
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config={"response_mime_type": "application/json"}
+                )
+
+            songs = self._parse_batch_response(response.text)
+
+            results = {}
+            for word, rhymes in word_rhymes.items():
+                lyrics = songs.get(word)
+                if not isinstance(lyrics, str) or not lyrics.strip():
+                    logger.warning(f"Batch response has no lyrics for '{word}'")
+                    continue
+                results[word] = self._build_result(word, rhymes, lyrics)
+
+            logger.info(f"Batch lyrics generated for {len(results)}/{len(words)} words")
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Error generating batch lyrics: {e}")
+            raise
+
+    def _build_prompt(self, word: str, rhymes: List[str]) -> str:
+        """Prompt for a single song"""
+        return f"""
+You are a gentle, caring preschool teacher creating SOFT, EDUCATIONAL songs for 3-5 year olds.
+
 TOPIC: {word}
 
 CRITICAL RULES - READ CAREFULLY:
@@ -68,32 +161,52 @@ TONE EXAMPLES:
 WRITE A GENTLE SONG ABOUT "{word}":
             """
 
-            # Generate lyrics with Gemini
-            response = self.model.generate_content(prompt)
-            lyrics = response.text.strip()
+    def _build_result(self, word: str, rhymes: List[str], raw_lyrics: str) -> Dict[str, any]:
+        """
+        Clean generated lyrics and attach song metadata
 
-            logger.info(f"Generated lyrics (raw):\n{lyrics}")
+        Args:
+            word: Main theme word
+            rhymes: Rhyming words offered to the model
+            raw_lyrics: Text returned by Gemini
 
-            # CRITICAL: Remove any pirate words that slipped through
-            lyrics = self._remove_pirate_words(lyrics)
+        Returns:
+            Dictionary with lyrics, word_count, estimated_duration, word and rhymes_used
+        """
+        lyrics = raw_lyrics.strip()
 
-            logger.info(f"Generated lyrics (cleaned):\n{lyrics}")
+        logger.info(f"Generated lyrics (raw):\n{lyrics}")
 
-            # Parse and validate
-            word_count = len(lyrics.split())
-            estimated_duration = self._estimate_duration(lyrics)
+        # CRITICAL: Remove any pirate words that slipped through
+        lyrics = self._remove_pirate_words(lyrics)
 
-            return {
-                "lyrics": lyrics,
-                "word_count": word_count,
-                "estimated_duration": estimated_duration,
-                "word": word,
-                "rhymes_used": rhymes
-            }
+        logger.info(f"Generated lyrics (cleaned):\n{lyrics}")
 
-        except Exception as e:
-            logger.error(f"Error generating lyrics: {e}")
-            raise
+        # Parse and validate
+        word_count = len(lyrics.split())
+        estimated_duration = self._estimate_duration(lyrics)
+
+        return {
+            "lyrics": lyrics,
+            "word_count": word_count,
+            "estimated_duration": estimated_duration,
+            "word": word,
+            "rhymes_used": rhymes
+        }
+
+    def _parse_batch_response(self, text: str) -> Dict[str, str]:
+        """Parse the JSON object of a batch response (tolerating code fences)"""
+        text = text.strip()
+        if text.startswith("```"):
+            text = text.strip("`")
+            text = text[text.index("\n") + 1:] if "\n" in text else text
+
+        songs = json.loads(text)
+        if not isinstance(songs, dict):
+            raise ValueError("Batch lyrics response is not a JSON object")
+
+        # Match keys case-insensitively; the model sometimes capitalizes topics
+        return {str(key).strip().lower(): value for key, value in songs.items()}
 
     def _remove_pirate_words(self, lyrics: str) -> str:
         """
@@ -44,6 +44,42 @@ class PirateBeatGenerator:
         Returns:
             Path to generated WAV file
         """
+        try:
+            stereo_mix = self.render_beat(word, duration, bpm, energy)
+
+            if output_path is None:
+                filename = f"beat_{word}_{uuid.uuid4().hex[:8]}.wav"
+                output_path = str(self.temp_dir / filename)
+
+            sf.write(output_path, stereo_mix, self.sample_rate)
+
+            logger.info(f"Beat generated successfully: {output_path}")
+
+            return output_path
+
+        except Exception as e:
+            logger.error(f"Error generating beat: {e}")
+            raise
+
+    def render_beat(
+        self,
+        word: str,
+        duration: float,
+        bpm: float,
+        energy: float = 0.6
+    ) -> np.ndarray:
+        """
+        Synthesize a themed pirate beat in memory
+
+        Args:
+            word: Theme word (e.g., "ship", "treasure")
+            duration: Length in seconds
+            bpm: Tempo in beats per minute
+            energy: Energy level 0.0-1.0 (affects intensity)
+
+        Returns:
+            Stereo (samples, 2) array at settings.SAMPLE_RATE
+        """
         try:
             logger.info(f"Generating pirate beat: word='{word}', duration={duration}s, bpm={bpm}, energy={energy:.2f}")
 
@@ -109,21 +145,11 @@ class PirateBeatGenerator:
             # Apply energy-based compression (louder for high energy)
             mix = mix * (0.7 + (energy * 0.3))
 
-            # Save as stereo WAV
-            stereo_mix = np.stack([mix, mix], axis=1)
-
-            if output_path is None:
-                filename = f"beat_{word}_{uuid.uuid4().hex[:8]}.wav"
-                output_path = str(self.temp_dir / filename)
-
-            sf.write(output_path, stereo_mix, self.sample_rate)
-
-            logger.info(f"Beat generated successfully: {output_path}")
-
-            return output_path
+            # Stereo output
+            return np.stack([mix, mix], axis=1)
 
         except Exception as e:
-            logger.error(f"Error generating beat: {e}")
+            logger.error(f"Error rendering beat: {e}")
             raise
 
     def _generate_drums(self, duration: float, bpm: float, energy: float, intensity: float = 1.0):
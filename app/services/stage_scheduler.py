@@ -0,0 +1,105 @@
+"""
+Intra-job stage scheduler: runs pipeline stages as soon as their inputs are ready
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable
+from app.metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+
+class StageScheduler:
+    """
+    Run a small dependency graph of stages on a thread pool
+
+    Each stage is a callable that receives the results of the stages it
+    depends on as keyword arguments. A stage is started the moment all of
+    its dependencies have finished, so independent work (e.g. decoding the
+    background track while TTS is still running) overlaps instead of
+    adding up on the critical path. Every stage is timed against the
+    current job's metrics under its own name.
+
+    Example:
+        scheduler = StageScheduler()
+        scheduler.add("lyrics", lambda: generate_lyrics(word))
+        scheduler.add("vocals", lambda lyrics: tts(lyrics), depends_on=["lyrics"])
+        results = scheduler.run()
+    """
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Initialize an empty stage graph
+
+        Args:
+            max_workers: Maximum number of stages running at the same time
+        """
+        self.max_workers = max_workers
+        self._stages: Dict[str, Callable[..., Any]] = {}
+        self._dependencies: Dict[str, tuple] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], depends_on: Iterable[str] = ()):
+        """
+        Register a stage
+
+        Args:
+            name: Unique stage name (also the keyword its result is passed as)
+            fn: Callable taking the dependency results as keyword arguments
+            depends_on: Names of stages that must finish first
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already registered")
+
+        self._stages[name] = fn
+        self._dependencies[name] = tuple(depends_on)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Execute all stages, failing fast on the first exception
+
+        Returns:
+            Dictionary mapping stage name to its result
+        """
+        for name, deps in self._dependencies.items():
+            missing = [d for d in deps if d not in self._stages]
+            if missing:
+                raise ValueError(f"Stage '{name}' depends on unknown stages: {missing}")
+
+        results: Dict[str, Any] = {}
+        pending = dict(self._dependencies)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                # Start every stage whose inputs are ready
+                for name in [n for n, deps in pending.items() if all(d in results for d in deps)]:
+                    kwargs = {d: results[d] for d in pending.pop(name)}
+                    logger.debug(f"Starting stage '{name}'")
+                    # Copy the context so stages see the current job's metrics
+                    context = contextvars.copy_context()
+                    running[executor.submit(context.run, self._run_stage, name, kwargs)] = name
+
+                if not running:
+                    raise RuntimeError(f"Stage graph has a cycle: {sorted(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        logger.error(f"Stage '{name}' failed")
+                        for other in running:
+                            other.cancel()
+                        raise
+
+                    logger.debug(f"Finished stage '{name}'")
+
+        return results
+
+    def _run_stage(self, name: str, kwargs: Dict[str, Any]) -> Any:
+        """Run one stage under its stage timer"""
+        with stage_timer(name):
+            return self._stages[name](**kwargs)
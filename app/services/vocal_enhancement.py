@@ -0,0 +1,189 @@
+"""
+Vectorized vocal enhancement on float32 sample arrays
+
+The chain VocalGenerator applies to every take: peak normalization,
+a feed-forward compressor, a make-up gain and an 80 Hz high-pass.
+Every step works on a (frames, channels) float32 array in place.
+
+Output RMS matches the pydub chain this replaced; peaks come out about
+1.2 dB higher, because the RMS detector lets short transients through
+that pydub's compressor caught. Compressed vocals still peak several dB
+below full scale, so the final clip does not engage on normal takes;
+benchmarks/bench_vocal_enhancement.py reports the peak level and the
+share of clipped samples of both chains.
+"""
+import logging
+from typing import Dict, Tuple
+import numpy as np
+from scipy.ndimage import maximum_filter1d, uniform_filter1d
+from scipy.signal import butter, lfilter, sosfilt
+
+logger = logging.getLogger(__name__)
+
+# Chain settings (the values the pydub chain used)
+NORMALIZE_HEADROOM_DB = 0.1
+COMPRESSOR_THRESHOLD_DB = -20.0
+COMPRESSOR_RATIO = 4.0
+COMPRESSOR_ATTACK_MS = 5.0
+COMPRESSOR_RELEASE_MS = 50.0
+MAKEUP_GAIN_DB = 2.0
+HIGH_PASS_HZ = 80.0
+
+# Gain is computed on blocks of this length and interpolated between them
+COMPRESSOR_BLOCK_MS = 1.0
+
+# High-pass filter coefficients per (cutoff, sample rate)
+_high_pass_filters: Dict[Tuple[float, int], np.ndarray] = {}
+
+
+def enhance_vocals(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Apply the full enhancement chain
+
+    Args:
+        samples: (frames, channels) float32 array, modified in place
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        The same array, for chaining
+    """
+    if samples.size == 0:
+        return samples
+
+    peak_normalize(samples, NORMALIZE_HEADROOM_DB)
+    compress(
+        samples, sample_rate,
+        threshold_db=COMPRESSOR_THRESHOLD_DB,
+        ratio=COMPRESSOR_RATIO,
+        attack_ms=COMPRESSOR_ATTACK_MS,
+        release_ms=COMPRESSOR_RELEASE_MS
+    )
+    apply_gain(samples, MAKEUP_GAIN_DB)
+    high_pass(samples, sample_rate, HIGH_PASS_HZ)
+    np.clip(samples, -1.0, 1.0, out=samples)
+
+    return samples
+
+
+def peak_normalize(samples: np.ndarray, headroom_db: float = 0.1) -> np.ndarray:
+    """
+    Scale so the loudest sample sits headroom_db below full scale
+
+    Args:
+        samples: Float array, modified in place
+        headroom_db: Distance of the peak from 0 dBFS
+
+    Returns:
+        The same array
+    """
+    peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+    if peak > 0:
+        samples *= np.float32(10 ** (-headroom_db / 20) / peak)
+    return samples
+
+
+def compress(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = -20.0,
+    ratio: float = 4.0,
+    attack_ms: float = 5.0,
+    release_ms: float = 50.0
+) -> np.ndarray:
+    """
+    Feed-forward RMS compressor
+
+    The detector measures RMS level over the attack window on
+    COMPRESSOR_BLOCK_MS blocks (linked across channels) and computes the
+    gain reduction above threshold_db. Reductions are held for
+    release_ms, then smoothed by one-pole filters:
+    the faster attack filter follows rises, the slower release filter
+    governs recovery (the larger of the two wins). The block gains are
+    interpolated to every frame.
+
+    Args:
+        samples: (frames, channels) float array, modified in place
+        sample_rate: Sample rate in Hz
+        threshold_db: Level where compression starts, in dBFS
+        ratio: Input/output ratio above the threshold
+        attack_ms: Attack time constant
+        release_ms: Release time constant
+
+    Returns:
+        The same array
+    """
+    frames = samples.shape[0]
+    block = max(int(sample_rate * COMPRESSOR_BLOCK_MS / 1000), 1)
+    blocks = -(-frames // block)
+    block_ms = block * 1000.0 / sample_rate
+
+    power = np.zeros(blocks * block, dtype=np.float32)
+    np.mean(np.square(samples.reshape(frames, -1)), axis=1, out=power[:frames])
+    power = power.reshape(blocks, block).mean(axis=1)
+
+    # RMS over the attack window, ending at each block
+    window = max(int(round(attack_ms / block_ms)), 1)
+    power = uniform_filter1d(power, size=window, origin=(window - 1) // 2, mode="nearest")
+
+    level_db = 10 * np.log10(np.maximum(power, 1e-12))
+    reduction_db = np.maximum(level_db - threshold_db, 0.0) * (1.0 - 1.0 / ratio)
+    if not reduction_db.any():
+        return samples
+
+    hold = max(int(round(release_ms / block_ms)), 1)
+    reduction_db = maximum_filter1d(reduction_db, size=hold, origin=(hold - 1) // 2)  # Trailing window
+
+    attack = _one_pole(reduction_db, attack_ms / block_ms)
+    release = _one_pole(reduction_db, release_ms / block_ms)
+    reduction_db = np.maximum(attack, release)
+
+    gain = np.power(10.0, -reduction_db / 20.0)
+    centers = (np.arange(blocks) + 0.5) * block
+    samples *= np.interp(np.arange(frames), centers, gain).astype(np.float32)[:, np.newaxis]
+
+    return samples
+
+
+def apply_gain(samples: np.ndarray, gain_db: float) -> np.ndarray:
+    """
+    Apply a fixed gain
+
+    Args:
+        samples: Float array, modified in place
+        gain_db: Gain in dB
+
+    Returns:
+        The same array
+    """
+    samples *= np.float32(10 ** (gain_db / 20))
+    return samples
+
+
+def high_pass(samples: np.ndarray, sample_rate: int, cutoff_hz: float = 80.0) -> np.ndarray:
+    """
+    Second-order Butterworth high-pass (one biquad)
+
+    Args:
+        samples: (frames, channels) float array, overwritten with the result
+        sample_rate: Sample rate in Hz
+        cutoff_hz: Cutoff frequency
+
+    Returns:
+        The same array
+    """
+    key = (cutoff_hz, sample_rate)
+    sos = _high_pass_filters.get(key)
+    if sos is None:
+        sos = butter(2, cutoff_hz, btype="highpass", fs=sample_rate, output="sos")
+        _high_pass_filters[key] = sos
+
+    samples[...] = sosfilt(sos, samples, axis=0)
+    return samples
+
+
+def _one_pole(signal: np.ndarray, time_constant_blocks: float) -> np.ndarray:
+    """Exponential smoothing with a time constant given in blocks"""
+    if time_constant_blocks <= 0:
+        return signal
+    a = np.exp(-1.0 / time_constant_blocks)
+    return lfilter([1.0 - a], [1.0, -a], signal)
@@ -2,19 +2,38 @@
 Hybrid vocal generation service using ElevenLabs (primary) + Bark (fallback)
 """
 import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
 import uuid
 import logging
 import numpy as np
-import scipy.io.wavfile as wavfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from pydub import AudioSegment
-from typing import Optional
+from collections import deque
+from typing import Any, Dict, Optional
 import io
 
+from app import metrics
 from app.config import settings
+from app.services.audio_buffer import AudioBuffer
+from app.services.bark_batcher import BarkBatcher
+from app.services.bark_profiles import BARK_AVAILABLE, effective_model_name, load_bark, release_bark_memory
+from app.services.bark_server import BarkServerClient
+from app.services.vocal_enhancement import enhance_vocals
 
 logger = logging.getLogger(__name__)
 
+# Pause inserted between consecutive Bark chunks
+BARK_CHUNK_PAUSE_SECONDS = 0.3
+
+# ElevenLabs requests seen before their error rate can trigger a Bark pre-warm
+PREWARM_MIN_SAMPLES = 3
+
 # Try to import ElevenLabs
 try:
     from elevenlabs.client import ElevenLabs
@@ -23,13 +42,8 @@ except ImportError:
     ELEVENLABS_AVAILABLE = False
     logger.warning("ElevenLabs not available - will use Bark only")
 
-# Try to import Bark
-try:
-    from transformers import AutoProcessor, BarkModel
-    import torch
-    BARK_AVAILABLE = True
-except ImportError:
-    BARK_AVAILABLE = False
+# Bark needs transformers + torch (checked by bark_profiles)
+if not BARK_AVAILABLE:
     logger.warning("Bark not available")
 
 
@@ -51,30 +65,292 @@ class BarkModelCache:
             raise ImportError("Bark dependencies not installed")
 
         if self._model is None or self._processor is None:
-            logger.info(f"Loading Bark model: {settings.BARK_MODEL}")
+            self._model, self._processor, self._device = load_bark()
+            logger.info("Bark model and processor loaded successfully")
+
+        return self._model, self._processor, self._device
+
+    def unload(self):
+        """Drop the cached model so its memory can be released"""
+        self._model = None
+        self._processor = None
+        self._device = None
+        release_bark_memory()
+        logger.info("Bark model unloaded")
+
+
+class LazyBark:
+    """
+    Bark fallback that is loaded on first use and unloaded when idle
+
+    Stands in for BarkBatcher (generate(), sample_rate) while ElevenLabs
+    is the primary provider, so workers don't load Bark until a fallback
+    actually needs it. prewarm() starts the load in the background ahead
+    of need, and once Bark has been idle for BARK_IDLE_UNLOAD_SECONDS it is
+    unloaded again.
+    """
+
+    def __init__(self, idle_seconds: Optional[float] = None):
+        """
+        Initialize without loading
+
+        Args:
+            idle_seconds: Unload after this long without use (defaults to BARK_IDLE_UNLOAD_SECONDS, 0 = never)
+        """
+        self.idle_seconds = settings.BARK_IDLE_UNLOAD_SECONDS if idle_seconds is None else idle_seconds
+        self._batcher: Optional[BarkBatcher] = None
+        self._sample_rate: Optional[int] = None
+        self._load_lock = threading.Lock()  # Held while loading or unloading
+        self._lock = threading.Lock()       # Guards the usage counters below
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._prewarming = False
+        self._reaper: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        """True while the model is in memory"""
+        return self._batcher is not None
+
+    @property
+    def sample_rate(self) -> int:
+        """Sample rate of generated audio"""
+        if self._sample_rate is None:
+            return self._ensure_loaded().sample_rate
+        return self._sample_rate
+
+    def generate(self, chunks: list) -> list:
+        """
+        Generate audio for text chunks, loading Bark first if needed
+
+        Args:
+            chunks: Text chunks (already formatted for Bark)
 
-            # Load processor
-            self._processor = AutoProcessor.from_pretrained(settings.BARK_MODEL)
+        Returns:
+            One float audio array per chunk, in the same order
+        """
+        with self._lock:
+            self._active += 1
+        try:
+            return self._ensure_loaded().generate(chunks)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_used = time.monotonic()
+
+    def prewarm(self):
+        """Load Bark in a background thread (no-op if loaded or already loading)"""
+        with self._lock:
+            if self._batcher is not None or self._prewarming:
+                return
+            self._prewarming = True
+
+        threading.Thread(target=self._prewarm, name="bark-prewarm", daemon=True).start()
+
+    def _prewarm(self):
+        """Background load started by prewarm()"""
+        try:
+            logger.info("Pre-warming Bark fallback")
+            self._ensure_loaded()
+        except Exception as e:
+            logger.warning(f"Bark pre-warm failed: {e}")
+        finally:
+            with self._lock:
+                self._prewarming = False
+
+    def _ensure_loaded(self) -> BarkBatcher:
+        """Load the model if it isn't in memory"""
+        with self._load_lock:
+            if self._batcher is None:
+                model, processor, device = BarkModelCache().get_model_and_processor()
+                self._batcher = BarkBatcher(model, processor, device)
+                self._sample_rate = self._batcher.sample_rate
+                with self._lock:
+                    self._last_used = time.monotonic()
+
+                if self.idle_seconds > 0 and self._reaper is None:
+                    self._reaper = threading.Thread(target=self._reap_idle, name="bark-reaper", daemon=True)
+                    self._reaper.start()
+
+            return self._batcher
+
+    def _reap_idle(self):
+        """Unload the model once it has been idle for idle_seconds"""
+        while True:
+            time.sleep(min(self.idle_seconds, 60))
+
+            with self._load_lock:
+                if self._batcher is None:
+                    self._reaper = None
+                    return
+
+                with self._lock:
+                    # Callers register before taking the load lock, so none is mid-generation here
+                    idle = self._active == 0 and time.monotonic() - self._last_used >= self.idle_seconds
+
+                if idle:
+                    logger.info(f"Bark idle for {self.idle_seconds:.0f}s, unloading")
+                    self._batcher = None
+                    BarkModelCache().unload()
+                    self._reaper = None
+                    return
+
+
+class TTSCache:
+    """
+    Disk-backed, content-addressed cache of synthesized vocals
+
+    The key is a hash of the cleaned lyrics and everything that changes
+    how they sound: provider, voice, model, voice settings and Bark
+    temperatures/seed. Any path that asks for the same text again (a
+    retry, a regenerated song, identical lyrics) gets the stored take
+    instead of paying for TTS. Takes are stored as lossless WAV; file
+    modification times track recency, and the least recently used takes
+    are evicted once the directory grows past TTS_CACHE_MAX_MB.
+    """
+
+    # Bump when post-processing changes so old takes are not reused
+    VERSION = 2
 
-            # Load model
-            self._model = BarkModel.from_pretrained(
-                settings.BARK_MODEL,
-                torch_dtype=torch.float16 if settings.BARK_USE_GPU else torch.float32
+    def __init__(self, directory: Optional[Path] = None, max_bytes: Optional[int] = None):
+        """
+        Open (or create) the cache directory
+
+        Args:
+            directory: Cache directory (defaults to TTS_CACHE_DIR)
+            max_bytes: Size cap (defaults to TTS_CACHE_MAX_MB)
+        """
+        self.directory = Path(directory or settings.TTS_CACHE_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.TTS_CACHE_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._size = sum(path.stat().st_size for path in self.directory.glob("*.wav"))
+
+    @classmethod
+    def make_key(cls, text: str, provider: str) -> str:
+        """
+        Cache key of a TTS request
+
+        Args:
+            text: Cleaned lyrics sent to the provider
+            provider: "elevenlabs" or "bark"
+
+        Returns:
+            Hex digest identifying the take
+        """
+        params: Dict[str, Any] = {"version": cls.VERSION, "provider": provider, "text": text}
+
+        if provider == "elevenlabs":
+            params.update(
+                voice_id=settings.ELEVENLABS_VOICE_ID,
+                model=settings.ELEVENLABS_MODEL,
+                stability=settings.ELEVENLABS_STABILITY,
+                similarity=settings.ELEVENLABS_SIMILARITY,
+                style=settings.ELEVENLABS_STYLE,
+                boost=settings.ELEVENLABS_BOOST,
+                output_format=settings.ELEVENLABS_OUTPUT_FORMAT,
+            )
+        else:
+            params.update(
+                model=effective_model_name(),
+                cpu_profile=settings.BARK_CPU_PROFILE,
+                voice_preset=settings.BARK_VOICE_PRESET,
+                semantic_temperature=settings.BARK_SEMANTIC_TEMP,
+                coarse_temperature=settings.BARK_COARSE_TEMP,
+                fine_temperature=settings.BARK_FINE_TEMP,
+                seed=settings.BARK_SEED,
+                token_budget=settings.BARK_TOKEN_BUDGET,
+                syllables_per_second=settings.BARK_SYLLABLES_PER_SECOND,
+                token_budget_margin=settings.BARK_TOKEN_BUDGET_MARGIN,
+                min_eos_p=settings.BARK_MIN_EOS_P,
+                trim_silence=settings.BARK_TRIM_SILENCE,
+                silence_threshold_db=settings.BARK_SILENCE_THRESHOLD_DB,
             )
 
-            # Move to GPU if available and enabled
-            if settings.BARK_USE_GPU and torch.cuda.is_available():
-                self._device = "cuda"
-                self._model = self._model.to(self._device)
-                logger.info("Bark model loaded on GPU (CUDA)")
-            else:
-                self._device = "cpu"
-                self._model = self._model.to(self._device)
-                logger.info("Bark model loaded on CPU")
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
 
-            logger.info("Bark model and processor loaded successfully")
+    def get(self, key: str) -> Optional[AudioSegment]:
+        """
+        Look up a take
 
-        return self._model, self._processor, self._device
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Stored vocals, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            audio = AudioSegment.from_wav(str(path))
+        except FileNotFoundError:
+            metrics.count(metrics.TTS_CACHE_MISSES, 1)
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable TTS cache entry {path.name}: {e}")
+            metrics.count(metrics.TTS_CACHE_MISSES, 1)
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        metrics.count(metrics.TTS_CACHE_HITS, 1)
+        logger.info(f"TTS cache hit ({key[:12]})")
+        return audio
+
+    def put(self, key: str, audio: AudioSegment):
+        """
+        Store a take and evict old ones if the cache is over its cap
+
+        Args:
+            key: Key from make_key
+            audio: Enhanced vocals
+        """
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            audio.export(str(tmp_path), format="wav")
+            size = tmp_path.stat().st_size
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Caching must never fail TTS
+            logger.warning(f"Could not store TTS cache entry: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used takes until the cache is 90% of its cap"""
+        entries = []
+        for path in self.directory.glob("*.wav"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Other processes share the directory: start from its real size
+        self._size = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+
+        evicted = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if self._size <= target:
+                break
+            path.unlink(missing_ok=True)
+            self._size -= size
+            evicted += 1
+
+        logger.info(f"TTS cache evicted {evicted} takes ({self._size / (1024 * 1024):.1f} MB left)")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
 
 
 class VocalGenerator:
@@ -104,17 +380,35 @@ class VocalGenerator:
         self.bark_model = None
         self.bark_processor = None
         self.bark_device = None
-
-        if BARK_AVAILABLE and (self.provider == "bark" or self.fallback_enabled or not self.elevenlabs_available):
+        self.bark_batcher = None
+
+        needs_bark = self.provider == "bark" or self.fallback_enabled or not self.elevenlabs_available
+
+        if needs_bark and settings.BARK_SERVER_ENABLED:
+            # Every worker process shares the Bark server's single model copy
+            self.bark_batcher = BarkServerClient()
+            logger.info(f"Bark TTS served by {self.bark_batcher.address}")
+        elif BARK_AVAILABLE and needs_bark and settings.BARK_LAZY_LOAD and self.provider != "bark" and self.elevenlabs_available:
+            # Bark is only the fallback: load it when a fallback first needs it
+            self.bark_batcher = LazyBark()
+            logger.info("Bark TTS will be loaded on first fallback")
+        elif BARK_AVAILABLE and needs_bark:
             try:
                 cache = BarkModelCache()
                 self.bark_model, self.bark_processor, self.bark_device = cache.get_model_and_processor()
+                self.bark_batcher = BarkBatcher(self.bark_model, self.bark_processor, self.bark_device)
                 logger.info("Bark TTS initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize Bark: {e}")
                 if not self.elevenlabs_available:
                     raise
 
+        self.tts_cache = TTSCache() if settings.TTS_CACHE_ENABLED else None
+
+        # Recent ElevenLabs outcomes (True = success) for pre-warming the Bark fallback
+        self._elevenlabs_outcomes = deque(maxlen=max(settings.BARK_PREWARM_WINDOW, 1))
+        self._outcomes_lock = threading.Lock()
+
         logger.info(f"VocalGenerator initialized: Primary={self.provider}, Fallback={self.fallback_enabled}")
 
     async def generate_vocals_async(
@@ -156,17 +450,105 @@ class VocalGenerator:
         if not output_path.endswith('.mp3'):
             output_path = output_path.replace('.wav', '.mp3')
 
-        # Clean lyrics
-        cleaned_lyrics = self._clean_lyrics(lyrics)
+        audio = self._synthesize(lyrics)
+
+        # Export as MP3
+        audio.export(output_path, format="mp3", bitrate="192k")
+        metrics.count(metrics.BYTES_ENCODED, Path(output_path).stat().st_size)
+
+        logger.info(f"Vocals generated successfully: {output_path}")
+        return output_path
+
+    def generate_vocals_pcm(self, lyrics: str) -> AudioBuffer:
+        """
+        Generate vocals and keep them in memory instead of encoding to MP3
+
+        Args:
+            lyrics: The lyrics text
+
+        Returns:
+            AudioBuffer with the enhanced vocals
+        """
+        audio = AudioBuffer.from_segment(self._synthesize(lyrics))
+
+        logger.info(f"Vocals generated in memory: {audio.duration:.2f}s @ {audio.sample_rate}Hz")
+        return audio
+
+    def _synthesize(self, lyrics: str) -> AudioSegment:
+        """
+        Synthesize lyrics in one request, or line by line if TTS_LINE_MODE is on
+
+        Args:
+            lyrics: The lyrics text
+
+        Returns:
+            Enhanced vocals as an AudioSegment
+        """
+        if settings.TTS_LINE_MODE:
+            return self._synthesize_lines(lyrics)
+
+        return self._synthesize_text(self._clean_lyrics(lyrics))
+
+    def _synthesize_lines(self, lyrics: str) -> AudioSegment:
+        """
+        Synthesize each unique lyric line once, several at a time, and stitch them
+
+        Repeated lines (choruses) are requested once per song, and every
+        line goes through the TTS cache, so lines shared with earlier songs
+        are free. With enough concurrency the TTS wait is roughly that of
+        the longest line.
+
+        Args:
+            lyrics: The lyrics text
+
+        Returns:
+            Enhanced vocals with TTS_LINE_GAP_SECONDS between lines
+        """
+        # Clean line by line so each line is synthesized (and cached) on its own
+        lines = [self._clean_lyrics(line) for line in lyrics.splitlines()]
+        lines = [line for line in lines if line]
+        if not lines:
+            raise ValueError("No lyrics to synthesize")
+
+        unique_lines = list(dict.fromkeys(lines))
+        logger.info(f"Synthesizing {len(unique_lines)} unique lines ({len(lines)} total)")
+
+        workers = max(1, min(settings.TTS_LINE_CONCURRENCY, len(unique_lines)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-line") as executor:
+            # Copy the context so each line's TTS counts against the current job's metrics
+            futures = {
+                line: executor.submit(contextvars.copy_context().run, self._synthesize_text, line)
+                for line in unique_lines
+            }
+            takes = {line: AudioBuffer.from_segment(future.result()) for line, future in futures.items()}
+
+        sample_rate = takes[lines[0]].sample_rate
+        gap_frames = int(sample_rate * settings.TTS_LINE_GAP_SECONDS)
+        song = self._assemble_chunks(
+            [takes[line].resample(sample_rate).to_mono() for line in lines],
+            gap_frames=gap_frames
+        )
+
+        return AudioBuffer(song, sample_rate).to_segment()
+
+    def _synthesize_text(self, cleaned_lyrics: str) -> AudioSegment:
+        """
+        Run the primary TTS provider with automatic fallback
+
+        Args:
+            cleaned_lyrics: Lyrics already passed through _clean_lyrics
 
+        Returns:
+            Enhanced vocals as an AudioSegment
+        """
         # Try primary provider
         try:
             if self.provider == "elevenlabs" and self.elevenlabs_available:
                 logger.info("Generating vocals with ElevenLabs...")
-                return self._generate_with_elevenlabs(cleaned_lyrics, output_path)
-            elif self.provider == "bark" and self.bark_model:
+                return self._cached("elevenlabs", cleaned_lyrics, self._generate_with_elevenlabs)
+            elif self.provider == "bark" and self.bark_batcher:
                 logger.info("Generating vocals with Bark...")
-                return self._generate_with_bark(cleaned_lyrics, output_path)
+                return self._cached("bark", cleaned_lyrics, self._generate_with_bark)
             else:
                 raise ValueError(f"Provider '{self.provider}' not available")
 
@@ -177,60 +559,111 @@ class VocalGenerator:
             if self.fallback_enabled:
                 logger.warning("Falling back to alternative TTS provider...")
                 try:
-                    if self.provider == "elevenlabs" and self.bark_model:
+                    if self.provider == "elevenlabs" and self.bark_batcher:
                         logger.info("Falling back to Bark...")
-                        return self._generate_with_bark(cleaned_lyrics, output_path)
+                        return self._cached("bark", cleaned_lyrics, self._generate_with_bark)
                     elif self.provider == "bark" and self.elevenlabs_available:
                         logger.info("Falling back to ElevenLabs...")
-                        return self._generate_with_elevenlabs(cleaned_lyrics, output_path)
+                        return self._cached("elevenlabs", cleaned_lyrics, self._generate_with_elevenlabs)
                 except Exception as fallback_error:
                     logger.error(f"Fallback also failed: {fallback_error}")
                     raise Exception(f"Both TTS providers failed. Primary: {e}, Fallback: {fallback_error}")
-            else:
-                raise
+            raise
 
-    def _generate_with_elevenlabs(self, lyrics: str, output_path: str) -> str:
-        """Generate vocals using ElevenLabs API (v2 SDK)"""
-        try:
-            # Format lyrics for better rhythm and musicality
-            formatted_lyrics = self._format_for_elevenlabs(lyrics)
+    def _cached(self, provider: str, lyrics: str, generate) -> AudioSegment:
+        """
+        Serve a take from the TTS cache, or generate and store it
 
-            # Generate audio using v2 client API
-            response = self.elevenlabs_client.text_to_speech.convert(
-                text=formatted_lyrics,
-                voice_id=settings.ELEVENLABS_VOICE_ID,
-                model_id=settings.ELEVENLABS_MODEL,
-                voice_settings={
-                    "stability": settings.ELEVENLABS_STABILITY,
-                    "similarity_boost": settings.ELEVENLABS_SIMILARITY,
-                    "style": settings.ELEVENLABS_STYLE,
-                    "use_speaker_boost": settings.ELEVENLABS_BOOST
-                }
-            )
+        Args:
+            provider: Provider that would generate the take
+            lyrics: Cleaned lyrics
+            generate: Provider method to call on a miss
+
+        Returns:
+            Enhanced vocals
+        """
+        if self.tts_cache is None:
+            return generate(lyrics)
 
-            # Collect audio bytes from generator
-            audio_bytes = b''
-            for chunk in response:
-                audio_bytes += chunk
+        key = self.tts_cache.make_key(lyrics, provider)
+        audio = self.tts_cache.get(key)
+        if audio is not None:
+            return audio
+
+        audio = generate(lyrics)
+        self.tts_cache.put(key, audio)
+        return audio
+
+    def _generate_with_elevenlabs(self, lyrics: str) -> AudioSegment:
+        """Generate vocals using ElevenLabs API (v2 SDK)"""
+        try:
+            # Format lyrics for better rhythm and musicality (ElevenLabs gets them
+            # as one line, as it always has; only Bark chunks by line)
+            formatted_lyrics = self._format_for_elevenlabs(' '.join(lyrics.split()))
+
+            metrics.count(metrics.TTS_CHARACTERS, len(formatted_lyrics))
+
+            output_format = settings.ELEVENLABS_OUTPUT_FORMAT
+
+            with metrics.stage_timer("tts"):
+                # Generate audio using v2 client API
+                response = self.elevenlabs_client.text_to_speech.convert(
+                    text=formatted_lyrics,
+                    voice_id=settings.ELEVENLABS_VOICE_ID,
+                    model_id=settings.ELEVENLABS_MODEL,
+                    output_format=output_format,
+                    voice_settings={
+                        "stability": settings.ELEVENLABS_STABILITY,
+                        "similarity_boost": settings.ELEVENLABS_SIMILARITY,
+                        "style": settings.ELEVENLABS_STYLE,
+                        "use_speaker_boost": settings.ELEVENLABS_BOOST
+                    }
+                )
 
-            # Convert to AudioSegment
-            audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
+                # Collect audio bytes from generator (extending in place, not re-copying)
+                audio_bytes = bytearray()
+                for chunk in response:
+                    audio_bytes.extend(chunk)
+
+            if output_format.startswith("pcm_"):
+                # Raw 16-bit little-endian mono: no decode needed
+                audio = AudioSegment(
+                    data=bytes(audio_bytes[:len(audio_bytes) - len(audio_bytes) % 2]),
+                    sample_width=2,
+                    frame_rate=int(output_format.split("_")[1]),
+                    channels=1
+                )
+            else:
+                audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
+                metrics.count(metrics.BYTES_DECODED, len(audio_bytes))
 
             # Apply post-processing
             audio = self._enhance_audio(audio)
 
-            # Export as MP3
-            audio.export(output_path, format="mp3", bitrate="192k")
-
-            logger.info(f"ElevenLabs vocals generated successfully: {output_path}")
-            return output_path
+            logger.info("ElevenLabs vocals generated successfully")
+            self._record_elevenlabs_outcome(True)
+            return audio
 
         except Exception as e:
             logger.error(f"ElevenLabs generation failed: {e}")
+            self._record_elevenlabs_outcome(False)
             raise
 
-    def _generate_with_bark(self, lyrics: str, output_path: str) -> str:
-        """Generate vocals using Bark (with chunking optimization)"""
+    def _record_elevenlabs_outcome(self, success: bool):
+        """Pre-warm the lazy Bark fallback when ElevenLabs' recent error rate reaches BARK_PREWARM_ERROR_RATE"""
+        if not isinstance(self.bark_batcher, LazyBark) or settings.BARK_PREWARM_ERROR_RATE <= 0:
+            return
+
+        with self._outcomes_lock:
+            self._elevenlabs_outcomes.append(success)
+            samples = len(self._elevenlabs_outcomes)
+            failures = samples - sum(self._elevenlabs_outcomes)
+
+        if samples >= PREWARM_MIN_SAMPLES and failures / samples >= settings.BARK_PREWARM_ERROR_RATE:
+            self.bark_batcher.prewarm()
+
+    def _generate_with_bark(self, lyrics: str) -> AudioSegment:
+        """Generate vocals using Bark (one chunk per lyric line, generated in padded batches)"""
         try:
             # Format lyrics for teacher-style reading
             formatted_lyrics = self._format_for_bark(lyrics)
@@ -239,79 +672,60 @@ class VocalGenerator:
             chunks = self._split_into_chunks(formatted_lyrics, max_length=200)
 
             logger.info(f"Split lyrics into {len(chunks)} chunks for Bark")
+            metrics.count(metrics.TTS_CHARACTERS, sum(len(chunk) for chunk in chunks))
 
-            # Generate audio for each chunk
-            audio_segments = []
-            sample_rate = self.bark_model.generation_config.sample_rate
-
-            for i, chunk in enumerate(chunks):
-                logger.debug(f"Generating chunk {i+1}/{len(chunks)}")
-
-                # Prepare inputs
-                inputs = self.bark_processor(
-                    chunk,
-                    voice_preset=settings.BARK_VOICE_PRESET,
-                    return_tensors="pt"
-                )
-
-                # Move inputs to same device as model
-                inputs = {k: v.to(self.bark_device) for k, v in inputs.items()}
+            # All chunks are generated in padded batches
+            audio_arrays = self.bark_batcher.generate(chunks)
 
-                # Generate audio
-                with torch.no_grad():
-                    audio_array = self.bark_model.generate(
-                        **inputs,
-                        semantic_temperature=settings.BARK_SEMANTIC_TEMP,
-                        coarse_temperature=settings.BARK_COARSE_TEMP,
-                        fine_temperature=settings.BARK_FINE_TEMP,
-                        do_sample=True
-                    )
+            sample_rate = self.bark_batcher.sample_rate
 
-                # Convert to numpy array
-                audio_array = audio_array.cpu().numpy().squeeze()
-
-                # Convert to AudioSegment
-                if audio_array.dtype != np.int16:
-                    audio_array = np.clip(audio_array, -1.0, 1.0)
-                    audio_array = (audio_array * 32767).astype(np.int16)
-
-                # Create temporary file
-                temp_chunk_wav = str(settings.TEMP_DIR / f"chunk_{i}_{uuid.uuid4()}.wav")
-                wavfile.write(temp_chunk_wav, rate=sample_rate, data=audio_array)
-
-                # Load as AudioSegment
-                chunk_audio = AudioSegment.from_wav(temp_chunk_wav)
-
-                # Add pause between chunks
-                if i < len(chunks) - 1:
-                    silence = AudioSegment.silent(duration=300)
-                    chunk_audio = chunk_audio + silence
-
-                audio_segments.append(chunk_audio)
-
-                # Cleanup
-                Path(temp_chunk_wav).unlink(missing_ok=True)
+            # Assemble the song in one preallocated buffer with the pauses in place
+            buffer = AudioBuffer(
+                self._assemble_chunks(audio_arrays, gap_frames=int(sample_rate * BARK_CHUNK_PAUSE_SECONDS)),
+                sample_rate
+            )
 
-            # Concatenate all chunks
-            final_audio = sum(audio_segments)
-
-            # Apply post-processing
-            final_audio = self._enhance_audio(final_audio)
+            # Apply post-processing on the samples before the single conversion to 16-bit
+            enhance_vocals(buffer.samples, sample_rate)
+            final_audio = buffer.to_segment()
 
             # Resample if needed
             if sample_rate != settings.SAMPLE_RATE:
                 final_audio = final_audio.set_frame_rate(settings.SAMPLE_RATE)
 
-            # Export as MP3
-            final_audio.export(output_path, format="mp3", bitrate="192k")
-
-            logger.info(f"Bark vocals generated successfully: {output_path}")
-            return output_path
+            logger.info("Bark vocals generated successfully")
+            return final_audio
 
         except Exception as e:
             logger.error(f"Bark generation failed: {e}")
             raise
 
+    @staticmethod
+    def _assemble_chunks(audio_arrays: list, gap_frames: int) -> np.ndarray:
+        """
+        Concatenate chunk audio with silence between chunks in a single allocation
+
+        Args:
+            audio_arrays: Per-chunk audio (float, or int16 PCM)
+            gap_frames: Silence between consecutive chunks
+
+        Returns:
+            Mono float32 samples
+        """
+        total = sum(len(audio) for audio in audio_arrays) + gap_frames * max(len(audio_arrays) - 1, 0)
+        song = np.zeros(total, dtype=np.float32)
+
+        position = 0
+        for audio in audio_arrays:
+            audio = np.asarray(audio).reshape(-1)
+            if audio.dtype == np.int16:
+                song[position:position + len(audio)] = audio / 32768.0
+            else:
+                song[position:position + len(audio)] = audio
+            position += len(audio) + gap_frames
+
+        return song
+
     def _clean_lyrics(self, lyrics: str) -> str:
         """Clean lyrics for TTS"""
         import re
@@ -350,7 +764,7 @@ class VocalGenerator:
 
         # Clean up excessive blank lines and spaces
         cleaned = re.sub(r'\n\s*\n\s*\n', '\n\n', cleaned)
-        cleaned = re.sub(r'\s+', ' ', cleaned)  # Multiple spaces to single
+        cleaned = re.sub(r'[ \t]+', ' ', cleaned)  # Multiple spaces to single (lines are kept for Bark's chunks)
         cleaned = re.sub(r'\s+\n', '\n', cleaned)  # Trailing spaces
 
         return cleaned.strip()
@@ -393,7 +807,14 @@ class VocalGenerator:
         return f"[Gentle teacher singing a sweet song to children]\n{lyrics}"
 
     def _split_into_chunks(self, text: str, max_length: int = 200) -> list:
-        """Split text into smaller chunks for Bark"""
+        """
+        Split text into one Bark chunk per lyric line
+
+        Short chunks keep each generation well inside Bark's semantic
+        window, get their own token budget, batch together, and repeat
+        exactly for chorus lines, so their semantic tokens are reused.
+        Lines longer than max_length are split at word boundaries.
+        """
         # Remove context prompt for chunking
         if text.startswith('['):
             context_end = text.find(']')
@@ -403,47 +824,22 @@ class VocalGenerator:
             context = ""
             text_body = text
 
-        # Split by lines
-        lines = [line.strip() for line in text_body.split('\n') if line.strip()]
-
         chunks = []
-        current_chunk = ""
-
-        for line in lines:
-            if len(current_chunk) + len(line) + 2 > max_length and current_chunk:
-                chunk_with_context = f"{context}\n{current_chunk}".strip() if context else current_chunk
-                chunks.append(chunk_with_context)
-                current_chunk = line
-            else:
-                if current_chunk:
-                    current_chunk += "\n" + line
+        for line in text_body.split('\n'):
+            current_chunk = ""
+            for word in line.split():
+                if len(current_chunk) + len(word) + 1 > max_length and current_chunk:
+                    chunks.append(current_chunk)
+                    current_chunk = word
                 else:
-                    current_chunk = line
-
-        # Add the last chunk
-        if current_chunk:
-            chunk_with_context = f"{context}\n{current_chunk}".strip() if context else current_chunk
-            chunks.append(chunk_with_context)
+                    current_chunk = f"{current_chunk} {word}" if current_chunk else word
+            if current_chunk:
+                chunks.append(current_chunk)
 
-        return chunks
+        return [f"{context}\n{chunk}" if context else chunk for chunk in chunks]
 
     def _enhance_audio(self, audio: AudioSegment) -> AudioSegment:
-        """Apply audio enhancements"""
-        # Normalize
-        audio = audio.normalize()
-
-        # Gentle compression
-        audio = audio.compress_dynamic_range(
-            threshold=-20.0,
-            ratio=4.0,
-            attack=5.0,
-            release=50.0
-        )
-
-        # Boost volume
-        audio = audio + 2
-
-        # High-pass filter
-        audio = audio.high_pass_filter(80)
-
-        return audio
+        """Apply audio enhancements (normalize, gentle compression, +2 dB, 80 Hz high-pass)"""
+        buffer = AudioBuffer.from_segment(audio)
+        enhance_vocals(buffer.samples, buffer.sample_rate)
+        return buffer.to_segment()
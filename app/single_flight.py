@@ -0,0 +1,170 @@
+"""
+Redis-backed single-flight deduplication of concurrent song generation requests
+"""
+import logging
+from typing import Any, Optional
+import redis
+from redis import asyncio as aioredis
+from app.config import settings
+from app.database import get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+# Own the key, or return the job id that already owns it
+_CLAIM_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    return false
+end
+return redis.call('GET', KEYS[1])
+"""
+
+# Delete the key only if it still belongs to the given job
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Restart the key's expiry only if it still belongs to the given job
+_REFRESH_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class SongSingleFlight:
+    """
+    Make the first request for a word own its generation
+
+    The owner stores its job id under a per-word key; later requests for
+    the same word attach to that job id instead of enqueuing identical
+    LLM and TTS work. The key is released once the song is cached (or the
+    job fails). Its expiry is a safety net for jobs nobody polls to the
+    end: it is restarted while a queued job is polled and when the job is
+    admitted, so it outlives queue wait plus the admission lease.
+
+    Each operation is one Lua script, so this async class and
+    WorkerSingleFlight (its synchronous twin for Celery workers) only
+    differ in how they call Redis.
+    """
+
+    KEY_PREFIX = "singleflight:song:"
+
+    def __init__(self, redis: aioredis.Redis, ttl_seconds: int = None):
+        """
+        Initialize single-flight helper
+
+        Args:
+            redis: Async Redis client
+            ttl_seconds: Safety expiry for in-flight keys (defaults to settings)
+        """
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds or settings.SINGLE_FLIGHT_TTL_SECONDS
+
+    def _key(self, word: str) -> str:
+        return f"{self.KEY_PREFIX}{word}"
+
+    def _eval(self, script: str, word: str, *args: Any):
+        """Run one of the scripts on a word's key"""
+        return self.redis.eval(script, 1, self._key(word), *args)
+
+    async def claim(self, word: str, job_id: str) -> Optional[str]:
+        """
+        Try to become the owner of generation for a word
+
+        Args:
+            word: Normalized input word
+            job_id: Job id the caller will use if it becomes the owner
+
+        Returns:
+            None if the caller owns the generation, otherwise the in-flight job id to attach to
+        """
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return None
+
+        try:
+            return await self._eval(_CLAIM_SCRIPT, word, job_id, self.ttl_seconds)
+        except Exception as e:
+            # Never block generation on Redis problems
+            logger.warning(f"Single-flight claim failed for '{word}', generating without dedup: {e}")
+            return None
+
+    async def release(self, word: str, job_id: str):
+        """
+        Release ownership for a word if it is still held by job_id
+
+        Args:
+            word: Normalized input word
+            job_id: Owning job id
+        """
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return
+
+        try:
+            await self._eval(_RELEASE_SCRIPT, word, job_id)
+        except Exception as e:
+            logger.warning(f"Single-flight release failed for '{word}': {e}")
+
+    async def refresh(self, word: str, job_id: str):
+        """
+        Restart the expiry of a word still held by job_id
+
+        Args:
+            word: Normalized input word
+            job_id: Owning job id
+        """
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return
+
+        try:
+            await self._eval(_REFRESH_SCRIPT, word, job_id, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Single-flight refresh failed for '{word}': {e}")
+
+
+class WorkerSingleFlight(SongSingleFlight):
+    """SongSingleFlight on the synchronous client, for Celery workers"""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, ttl_seconds: int = None):
+        """
+        Initialize single-flight helper
+
+        Args:
+            redis_client: Synchronous Redis client (defaults to the worker's shared client)
+            ttl_seconds: Safety expiry for in-flight keys (defaults to settings)
+        """
+        super().__init__(redis_client or get_sync_redis(), ttl_seconds)
+
+    def claim(self, word: str, job_id: str) -> Optional[str]:
+        """Synchronous SongSingleFlight.claim"""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return None
+
+        try:
+            return self._eval(_CLAIM_SCRIPT, word, job_id, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Single-flight claim failed for '{word}', generating without dedup: {e}")
+            return None
+
+    def release(self, word: str, job_id: str):
+        """Synchronous SongSingleFlight.release"""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return
+
+        try:
+            self._eval(_RELEASE_SCRIPT, word, job_id)
+        except Exception as e:
+            logger.warning(f"Single-flight release failed for '{word}': {e}")
+
+    def refresh(self, word: str, job_id: str):
+        """Synchronous SongSingleFlight.refresh"""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return
+
+        try:
+            self._eval(_REFRESH_SCRIPT, word, job_id, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Single-flight refresh failed for '{word}': {e}")
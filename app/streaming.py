@@ -0,0 +1,206 @@
+"""
+Progressive song delivery: per-line segments published as an HLS playlist under /outputs
+"""
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.services.audio_buffer import AudioBuffer
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST = "playlist.m3u8"
+SEGMENT_INDEX = "segments.json"
+
+
+class SongStream:
+    """
+    Segments of one streaming job, stored under OUTPUT_DIR/stream_<job_id>
+
+    Each mixed lyric line is encoded as its own MP3 segment the moment it
+    is ready. After every segment the HLS playlist (an EVENT playlist, so
+    players keep polling it for new segments) and a JSON index carrying
+    each segment's karaoke timings are rewritten atomically. finish()
+    appends EXT-X-ENDLIST so players know the song is complete.
+
+    Segments already published by an earlier attempt of the same job are
+    kept, so a retry continues the stream instead of restarting it.
+
+    Example:
+        stream = SongStream(job_id)
+        stream.add_segment(mixed_line, "Ahoy me hearties", timings)
+        ...
+        stream.finish()
+    """
+
+    def __init__(self, job_id: str, root: Optional[Path] = None):
+        """
+        Open (or create) the stream directory of a job
+
+        Args:
+            job_id: Job identifier
+            root: Base directory (defaults to OUTPUT_DIR)
+        """
+        self.job_id = job_id
+        self.directory = Path(root or settings.OUTPUT_DIR) / f"stream_{job_id}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.complete = False
+        self.segments: List[Dict[str, Any]] = self._load_segments()
+
+        if self.segments:
+            logger.info(f"[{job_id}] Continuing stream after {len(self.segments)} published segments")
+
+    @property
+    def url(self) -> str:
+        """URL prefix of the stream directory"""
+        return f"/outputs/{self.directory.name}"
+
+    @property
+    def playlist_url(self) -> str:
+        """URL of the HLS playlist"""
+        return f"{self.url}/{PLAYLIST}"
+
+    @property
+    def end_time(self) -> float:
+        """Song time (seconds) at which the next segment starts"""
+        if not self.segments:
+            return 0.0
+        last = self.segments[-1]
+        return last['start'] + last['duration']
+
+    def segment_path(self, index: int) -> Path:
+        """Location of a segment file"""
+        return self.directory / f"seg_{index:03d}.mp3"
+
+    def add_segment(self, audio: AudioBuffer, text: str, timings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Encode and publish the next segment
+
+        Args:
+            audio: Mixed audio of the line
+            text: Lyric line the segment sings
+            timings: Karaoke timings relative to the start of the song
+
+        Returns:
+            The published segment entry
+        """
+        index = len(self.segments)
+        path = self.segment_path(index)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+
+        audio.export(str(tmp_path), format="mp3", bitrate="192k")
+        os.replace(tmp_path, path)
+
+        segment = {
+            'index': index,
+            'url': f"{self.url}/{path.name}",
+            'start': self.end_time,
+            'duration': audio.duration,
+            'text': text,
+            'timings': timings
+        }
+        self.segments.append(segment)
+        self._publish()
+
+        logger.info(f"[{self.job_id}] Published segment {index} ({audio.duration:.2f}s): {text}")
+        return segment
+
+    def finish(self):
+        """Mark the stream complete so players stop waiting for segments"""
+        self.complete = True
+        self._publish()
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Stream state for progress updates and the final result
+
+        Returns:
+            Dictionary with playlist_url, complete and segments
+        """
+        return {
+            'playlist_url': self.playlist_url,
+            'complete': self.complete,
+            'segments': self.segments
+        }
+
+    def _publish(self):
+        """Rewrite the playlist and segment index"""
+        target_duration = max((math.ceil(s['duration']) for s in self.segments), default=1)
+
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for segment in self.segments:
+            lines.append(f"#EXTINF:{segment['duration']:.3f},")
+            lines.append(Path(segment['url']).name)
+        if self.complete:
+            lines.append("#EXT-X-ENDLIST")
+
+        self._write(self.directory / PLAYLIST, "\n".join(lines) + "\n")
+        self._write(self.directory / SEGMENT_INDEX, json.dumps(self.describe()))
+
+    def _load_segments(self) -> List[Dict[str, Any]]:
+        """Segments of a previous attempt whose files still exist"""
+        index_path = self.directory / SEGMENT_INDEX
+        if not index_path.exists():
+            return []
+
+        try:
+            with open(index_path, 'r') as f:
+                segments = json.load(f).get('segments', [])
+        except Exception as e:
+            logger.warning(f"[{self.job_id}] Ignoring unreadable stream index: {e}")
+            return []
+
+        # Keep the contiguous prefix that is still on disk
+        kept = []
+        for segment in segments:
+            if not self.segment_path(segment['index']).exists():
+                break
+            kept.append(segment)
+        return kept
+
+    @staticmethod
+    def _write(path: Path, content: str):
+        """Atomically write a text file so players never read a partial playlist"""
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+def cleanup_streams(max_age_seconds: float) -> int:
+    """
+    Delete stream directories nobody is listening to anymore
+
+    The full song MP3 is kept; only the per-line segments are removed.
+
+    Args:
+        max_age_seconds: Age after which a stream is dropped
+
+    Returns:
+        Number of stream directories removed
+    """
+    root = Path(settings.OUTPUT_DIR)
+    if not root.exists():
+        return 0
+
+    cutoff_time = time.time() - max_age_seconds
+    deleted_count = 0
+
+    for stream_dir in root.glob("stream_*"):
+        if stream_dir.is_dir() and stream_dir.stat().st_mtime < cutoff_time:
+            shutil.rmtree(stream_dir, ignore_errors=True)
+            deleted_count += 1
+            logger.debug(f"Deleted old stream: {stream_dir}")
+
+    return deleted_count
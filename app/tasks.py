@@ -1,20 +1,43 @@
 """
 Celery tasks for async song generation
 """
-from celery import Celery
+from celery import Celery, chain
+from celery.schedules import crontab
+from celery.signals import worker_process_init
 import logging
-from typing import Dict, Any
-from app.config import settings
-from app.services import (
-    get_kid_friendly_rhymes,
-    LyricsGenerator,
-    VocalGenerator,
-    AudioService,
-    KaraokeGenerator,
-    PirateBeatGenerator,
-    MoodAnalyzer
+import math
+import re
+import contextvars
+import threading
+import time
+import uuid
+import numpy as np
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from pydub import AudioSegment
+from app.admission import acquire_slot, release_slot
+from app.cache_warming import CacheWarmer, DEFAULT_SONG_CHARACTERS
+from app.checkpoints import (
+    CheckpointStore,
+    cleanup_checkpoints,
+    LYRICS,
+    VOCALS,
+    INSTRUMENTAL,
+    MIX,
+    TIMINGS
 )
-from app.services.background_music_service import BackgroundMusicManager
+from app.config import settings
+from app.database import get_sync_database, get_sync_redis
+from app.metrics import JobMetrics, TTS_CHARACTERS, registry as metrics_registry, stage_timer, track_job
+from app.services import get_kid_friendly_rhymes, AudioService
+from app.services.audio_buffer import AudioBuffer
+from app.services.container import ServiceContainer, get_services
+from app.themes.theme_config import get_theme_info
+from app.services.stage_scheduler import StageScheduler
+from app.single_flight import WorkerSingleFlight
+from app.streaming import SongStream, cleanup_streams
 
 logger = logging.getLogger(__name__)
 
@@ -31,176 +54,1537 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    # Bark sizes its torch thread pool from the same number (see bark_profiles)
+    worker_concurrency=settings.WORKER_CONCURRENCY or None,
+    # Staged pipeline: I/O-bound stages and CPU-bound DSP stages get their own queues
+    task_routes={
+        'app.tasks.lyrics_stage': {'queue': settings.CELERY_QUEUE_LLM},
+        'app.tasks.vocals_stage': {'queue': settings.CELERY_QUEUE_TTS},
+        'app.tasks.instrumental_stage': {'queue': settings.CELERY_QUEUE_DSP},
+        'app.tasks.mix_stage': {'queue': settings.CELERY_QUEUE_DSP},
+        'app.tasks.alignment_stage': {'queue': settings.CELERY_QUEUE_DSP},
+    },
 )
 
+# Off-peak cache warming (run `celery -A app.tasks beat` alongside the workers)
+if settings.CACHE_WARMING_ENABLED:
+    celery_app.conf.beat_schedule = {
+        'warm-song-cache': {
+            'task': 'app.tasks.warm_song_cache',
+            'schedule': crontab(minute=0, hour=settings.CACHE_WARM_HOURS),
+        },
+    }
 
-@celery_app.task(bind=True)
-def generate_song_task(self, word: str) -> Dict[str, Any]:
+
+@worker_process_init.connect
+def warm_up_worker(**kwargs):
+    """Build the worker's services before it accepts its first task"""
+    if not settings.WORKER_WARM_START:
+        return
+
+    try:
+        get_services().warm_up()
+    except Exception as e:
+        # Services are created lazily on first use anyway
+        logger.error(f"Worker warm-up failed: {e}", exc_info=True)
+
+
+def submit_song_generation(word: str, job_id: Optional[str] = None, stream: bool = False) -> str:
+    """
+    Enqueue song generation for a word using the configured pipeline mode
+
+    Args:
+        word: The input word
+        job_id: Optional job id to use (generated if not provided)
+        stream: Publish the song line by line as it is generated
+
+    Returns:
+        Job id to poll (the Celery task id holding progress and the final result)
+    """
+    job_id = job_id or str(uuid.uuid4())
+
+    # Streaming interleaves TTS, mixing and alignment per line, so it always
+    # runs as one task
+    if settings.PIPELINE_MODE == "staged" and not stream:
+
+        # The last stage runs under the job id, so polling AsyncResult(job_id)
+        # sees the final result exactly like the monolithic task
+        chain(
+            lyrics_stage.s(word, job_id),
+            vocals_stage.s(),
+            instrumental_stage.s(),
+            mix_stage.s(),
+            alignment_stage.s().set(task_id=job_id),
+        ).apply_async()
+
+        logger.info(f"Submitted staged pipeline {job_id} for '{word}'")
+        return job_id
+
+    return generate_song_task.apply_async(args=[word], kwargs={'stream': stream}, task_id=job_id).id
+
+
+def resume_song_generation(word: str, job_id: str, stream: bool = False) -> str:
+    """
+    Re-run a failed job under the same id, resuming from its last checkpoint
+
+    Args:
+        word: The job's input word
+        job_id: Id of the failed job
+        stream: Whether the job streams its song line by line
+
+    Returns:
+        Job id to poll
+    """
+    # Drop the stored FAILURE so pollers don't see it before the new run reports progress
+    celery_app.AsyncResult(job_id).forget()
+
+    logger.info(f"Resuming job {job_id} for '{word}'")
+    return submit_song_generation(word, job_id=job_id, stream=stream)
+
+
+def dispatch_admitted(job_id: str, payload: Dict[str, Any]):
+    """
+    Submit a job that admission control let out of its queue
+
+    Args:
+        job_id: Job (or batch) id
+        payload: What AdmissionController.admit() was asked to submit
+    """
+    kind = payload.get('kind')
+
+    # The queue wait may have used up most of the single-flight expiry; restart it for the run
+    single_flight = WorkerSingleFlight()
+    if kind in ('song', 'resume'):
+        single_flight.refresh(payload['word'], job_id)
+    elif kind == 'batch':
+        for word, word_job_id in payload['jobs'].items():
+            single_flight.refresh(word, word_job_id)
+
+    if kind == 'song':
+        submit_song_generation(payload['word'], job_id=job_id, stream=payload.get('stream', False))
+    elif kind == 'resume':
+        resume_song_generation(payload['word'], job_id, stream=payload.get('stream', False))
+    elif kind == 'batch':
+        submit_batch_generation(job_id, payload['jobs'])
+    else:
+        logger.error(f"Unknown admission payload for {job_id}: {payload}")
+
+
+def _finish_admission(job_id: str, elapsed_seconds: Optional[float] = None):
+    """
+    Free a finished job's admission slot and submit the jobs waiting for it
+
+    Args:
+        job_id: Job (or batch) id
+        elapsed_seconds: Run time for the ETA average (None for failed or batch jobs)
+    """
+    for next_job_id, payload in release_slot(job_id, elapsed_seconds):
+        try:
+            dispatch_admitted(next_job_id, payload)
+        except Exception as e:
+            logger.error(f"Could not submit admitted job {next_job_id}: {e}")
+            celery_app.backend.mark_as_failure(next_job_id, e)
+
+
+def _record_job_metrics(summary: Optional[Dict[str, Any]], status: str = "completed"):
+    """
+    Add a finished job to the Prometheus metrics shared through Redis
+
+    Args:
+        summary: JobMetrics.to_dict() output (partial for failed jobs)
+        status: "completed" or "failed"
+    """
+    metrics_registry.observe_job(get_sync_redis(), summary, status)
+
+
+def _retry_or_raise(task, job_id: str, error: Exception):
+    """
+    Retry a failed task (resuming from checkpoints) while retries remain
+
+    Args:
+        task: Bound Celery task
+        job_id: Job id (for logging)
+        error: The exception that failed the attempt
+    """
+    if task.request.retries < task.max_retries:
+        logger.warning(
+            f"[{job_id}] Attempt {task.request.retries + 1} failed ({error}), "
+            f"retrying in {settings.JOB_RETRY_DELAY_SECONDS}s"
+        )
+        raise task.retry(exc=error, countdown=settings.JOB_RETRY_DELAY_SECONDS)
+
+
+@celery_app.task(bind=True, max_retries=settings.JOB_MAX_RETRIES)
+def generate_song_task(self, word: str, stream: bool = False) -> Dict[str, Any]:
     """
     Background task for complete song generation pipeline
 
+    Stage artifacts are checkpointed under the job id, so a retry (or a
+    manual resume) skips every stage that already completed.
+
     Args:
         word: The input word to generate a shanty about
+        stream: Publish each lyric line as a playable segment as soon as it is mixed
 
     Returns:
         Dictionary with song data (lyrics, audio_url, timings, etc.)
     """
+    job_id = self.request.id or str(uuid.uuid4())
+    metrics = JobMetrics()
+
     try:
         logger.info(f"Starting song generation for word: '{word}'")
 
-        # Update progress: 10%
-        self.update_state(state='PROGRESS', meta={'progress': 10, 'status': 'Generating rhymes...'})
+        checkpoints = CheckpointStore(job_id, word)
+
+        with track_job(metrics):
+            if stream:
+                result = _generate_song_streaming(self, word, checkpoints)
+            elif settings.IN_MEMORY_PIPELINE:
+                result = _generate_song_in_memory(self, word, checkpoints)
+            else:
+                result = _generate_song_from_files(self, word, checkpoints)
+
+        checkpoints.clear()
+
+        # Per-stage latency/resource summary, stored on the Job by the API
+        result["metrics"] = metrics.to_dict()
+
+        logger.info(f"Song generation completed successfully for '{word}'")
+        logger.info(f"Result: {result['audio_url']}")
+
+        _finish_admission(job_id, result["metrics"]["total_seconds"])
+        _record_job_metrics(result["metrics"])
+
+        return result
+
+    except Exception as e:
+        _retry_or_raise(self, job_id, e)
+        logger.error(f"Song generation failed for '{word}': {e}", exc_info=True)
+        _finish_admission(job_id)
+        # Keep what the stages that did run recorded
+        _record_job_metrics(metrics.to_dict(), "failed")
+        # Let Celery handle the FAILURE state automatically
+        raise
+
 
-        # Step 1: Generate rhyming words
-        rhymes = get_kid_friendly_rhymes(word, count=6)
+def _generate_song_in_memory(task, word: str, checkpoints: CheckpointStore) -> Dict[str, Any]:
+    """
+    Run the pipeline as a stage graph with PCM hand-off between stages
+
+    Stages start as soon as their inputs are ready: the background track is
+    decoded while lyrics and vocals are generated, mood analysis and lyric
+    cleanup overlap with TTS, and the final BPM analysis overlaps with
+    karaoke alignment.
 
-        if not rhymes or len(rhymes) < 2:
-            raise ValueError(f"Not enough rhymes found for word '{word}'")
+    Args:
+        task: Bound Celery task (for progress updates)
+        word: The input word
+        checkpoints: The job's stage checkpoints
 
-        logger.info(f"Found rhymes: {rhymes}")
+    Returns:
+        Dictionary with song data
+    """
+    report = _progress_reporter(task)
 
-        # Update progress: 20%
-        self.update_state(state='PROGRESS', meta={'progress': 20, 'status': 'Writing pirate shanty...'})
+    services = get_services()
+    # One AudioService per job so BPM/duration analysis is memoized across stages
+    audio_service = services.audio_service()
+    mood_analyzer = services.mood_analyzer
 
-        # Step 2: Generate lyrics with Gemini
-        lyrics_gen = LyricsGenerator()
-        lyrics_data = lyrics_gen.generate_pirate_shanty(word, rhymes)
+    def find_rhymes():
+        report(10, 'Generating rhymes...')
+        return _find_rhymes(word)
 
+    def write_lyrics(rhymes):
+        report(20, 'Writing pirate shanty...')
+        lyrics_data = checkpoints.load_json(LYRICS)
+        if lyrics_data is None:
+            lyrics_data = services.lyrics.generate_pirate_shanty(word, rhymes)
+            checkpoints.save_json(LYRICS, lyrics_data)
         logger.info(f"Generated lyrics:\n{lyrics_data['lyrics']}")
+        return lyrics_data
+
+    def record_vocals(lyrics):
+        report(40, 'Recording vocals...')
+        vocals = checkpoints.load_audio(VOCALS)
+        if vocals is None:
+            vocals = services.vocals.generate_vocals_pcm(lyrics['lyrics'])
+            checkpoints.save_audio(VOCALS, vocals)
+        return vocals
+
+    def analyze_mood(lyrics):
+        return mood_analyzer.analyze_lyrics(lyrics['lyrics'])
+
+    def clean_lyrics(lyrics):
+        return _clean_display_lyrics(lyrics['lyrics'])
+
+    def detect_vocal_bpm(vocals):
+        report(55, 'Analyzing mood and BPM...')
+        return audio_service.detect_bpm_pcm(vocals)
+
+    def load_background_track():
+        # A checkpointed instrumental makes the background track unnecessary
+        if checkpoints.has(INSTRUMENTAL):
+            return None
+        return _load_background_track()
+
+    def prepare_instrumental(lyrics, background_track, vocals, bpm, mood):
+        vocal_bpm = bpm
+        report(60, 'Selecting background music...')
+        instrumental = checkpoints.load_audio(INSTRUMENTAL)
+        if instrumental is not None:
+            return instrumental
+
+        energy = mood_analyzer.adjust_energy_for_bpm(mood['energy'], vocal_bpm)
+        logger.info(f"Mood: {mood['mood'].value}, Energy: {energy:.2f}, BPM: {vocal_bpm:.1f}")
+        instrumental = _select_instrumental_pcm(
+            audio_service, word, lyrics, vocals.duration, vocal_bpm, energy, background_track
+        )
+        checkpoints.save_audio(INSTRUMENTAL, instrumental)
+        return instrumental
+
+    def mix_song(vocals, instrumental):
+        report(75, 'Mixing vocals with instrumental...')
+        final_audio_path = _checkpointed_mix_path(checkpoints)
+        if final_audio_path:
+            return final_audio_path, AudioBuffer.from_file(final_audio_path)
+
+        mix = audio_service.mix_pcm(vocals, instrumental)
+        checkpoints.save_json(MIX, {'final_audio_path': mix[0]})
+        return mix
+
+    def align_karaoke(lyrics, mix):
+        report(85, 'Creating karaoke timings...')
+        timings = checkpoints.load_json(TIMINGS)
+        if timings is None:
+            timings = services.karaoke.generate_word_timings(mix[0], lyrics['lyrics'])
+            checkpoints.save_json(TIMINGS, timings)
+        logger.info(f"Generated {len(timings)} karaoke timings")
+        return timings
+
+    def detect_final_bpm(mix):
+        final_audio_path, final_audio = mix
+        return audio_service.detect_bpm_pcm(final_audio, source_path=final_audio_path)
+
+    scheduler = StageScheduler(max_workers=settings.PIPELINE_STAGE_WORKERS)
+    scheduler.add("rhymes", find_rhymes)
+    scheduler.add("background_track", load_background_track)
+    scheduler.add("lyrics", write_lyrics, depends_on=["rhymes"])
+    scheduler.add("vocals", record_vocals, depends_on=["lyrics"])
+    scheduler.add("mood", analyze_mood, depends_on=["lyrics"])
+    scheduler.add("display_lyrics", clean_lyrics, depends_on=["lyrics"])
+    scheduler.add("bpm", detect_vocal_bpm, depends_on=["vocals"])
+    scheduler.add(
+        "instrumental", prepare_instrumental,
+        depends_on=["lyrics", "background_track", "vocals", "bpm", "mood"]
+    )
+    scheduler.add("mix", mix_song, depends_on=["vocals", "instrumental"])
+    scheduler.add("alignment", align_karaoke, depends_on=["lyrics", "mix"])
+    scheduler.add("final_analysis", detect_final_bpm, depends_on=["mix"])
+
+    results = scheduler.run()
+
+    report(100, 'Complete!')
+
+    final_audio_path, final_audio = results['mix']
+    return _build_result(
+        word, results['display_lyrics'], final_audio_path, results['alignment'],
+        final_audio.duration, results['final_analysis'], results['rhymes']
+    )
+
+
+def _generate_song_streaming(task, word: str, checkpoints: CheckpointStore) -> Dict[str, Any]:
+    """
+    Generate the song line by line, publishing each line as soon as it is mixed
+
+    Every lyric line is voiced separately (the next lines' TTS runs while
+    the current one is mixed), mixed against a contiguous slice of a single
+    instrumental, aligned for karaoke and published as an HLS segment under
+    /outputs. Progress updates carry the stream so the frontend can start
+    playing after the first line. The full song is still assembled at the
+    end and returned like any other result.
+
+    Args:
+        task: Bound Celery task (for progress updates)
+        word: The input word
+        checkpoints: The job's stage checkpoints
+
+    Returns:
+        Dictionary with song data plus the finished stream
+    """
+    job_id = task.request.id
+    services = get_services()
+    audio_service = services.audio_service()
+    mood_analyzer = services.mood_analyzer
+    stream = SongStream(job_id)
+    started_at = time.perf_counter()
+
+    def publish(progress: int, status: str):
+        task.update_state(
+            state='PROGRESS',
+            meta={'progress': progress, 'status': status, 'stream': stream.describe()}
+        )
+
+    publish(10, 'Generating rhymes...')
+    with stage_timer("rhymes"):
+        rhymes = _find_rhymes(word)
+
+    publish(20, 'Writing pirate shanty...')
+    with stage_timer("lyrics"):
+        lyrics_data = checkpoints.load_json(LYRICS)
+        if lyrics_data is None:
+            lyrics_data = services.lyrics.generate_pirate_shanty(word, rhymes)
+            checkpoints.save_json(LYRICS, lyrics_data)
+
+    logger.info(f"Generated lyrics:\n{lyrics_data['lyrics']}")
+
+    display_lyrics = _clean_display_lyrics(lyrics_data['lyrics'])
+    lines = [line.strip() for line in display_lyrics.splitlines() if line.strip()]
+    if not lines:
+        raise ValueError(f"No lyric lines to stream for '{word}'")
+
+    publish(25, 'Selecting background music...')
+    with stage_timer("instrumental"):
+        instrumental = checkpoints.load_audio(INSTRUMENTAL)
+        if instrumental is None:
+            # The vocal BPM is only known once every line is voiced, and the
+            # first segment can't wait for that: use the middle of the shanty range
+            bpm = (settings.PIRATE_SHANTY_BPM_MIN + settings.PIRATE_SHANTY_BPM_MAX) / 2
+            mood = mood_analyzer.analyze_lyrics(lyrics_data['lyrics'])
+            energy = mood_analyzer.adjust_energy_for_bpm(mood['energy'], bpm)
+            instrumental = _select_instrumental_pcm(
+                audio_service, word, lyrics_data, lyrics_data['estimated_duration'] + 2,
+                bpm, energy, _load_background_track()
+            )
+            checkpoints.save_audio(INSTRUMENTAL, instrumental)
 
-        # Update progress: 40%
-        self.update_state(state='PROGRESS', meta={'progress': 40, 'status': 'Recording vocals...'})
+    def voice(line: str) -> AudioBuffer:
+        with stage_timer("vocals"):
+            return services.vocals.generate_vocals_pcm(line).pad_end(settings.STREAM_LINE_GAP_SECONDS)
 
-        # Step 3: Generate singing vocals with Bark TTS
-        vocal_gen = VocalGenerator()
-        vocal_path = vocal_gen.generate_vocals(lyrics_data['lyrics'])
+    # Lines published by an earlier attempt are reused from their segments
+    mixed_lines = [AudioBuffer.from_file(str(stream.segment_path(i))) for i in range(len(stream.segments))]
+    timings = [timing for segment in stream.segments for timing in segment['timings']]
 
-        logger.info(f"Vocals generated: {vocal_path}")
+    lookahead = max(settings.STREAM_TTS_LOOKAHEAD, 1)
+    with ThreadPoolExecutor(max_workers=lookahead, thread_name_prefix="stream-tts") as executor:
+        pending = {}
 
-        # Update progress: 55%
-        self.update_state(state='PROGRESS', meta={'progress': 55, 'status': 'Analyzing mood and BPM...'})
+        def schedule(index: int):
+            if index < len(lines) and index not in pending:
+                # Copy the context so TTS time counts against this job's metrics
+                context = contextvars.copy_context()
+                pending[index] = executor.submit(context.run, voice, lines[index])
 
-        # Step 4: Analyze mood and detect BPM
-        audio_service = AudioService()
+        for index in range(len(stream.segments), len(lines)):
+            for ahead in range(index, index + lookahead):
+                schedule(ahead)
+
+            vocals = pending.pop(index).result()
+
+            with stage_timer("mix"):
+                # Convert the instrumental once instead of once per line
+                instrumental = instrumental.resample(
+                    max(vocals.sample_rate, instrumental.sample_rate)
+                ).with_channels(max(vocals.channels, instrumental.channels))
+                offset = int(round(stream.end_time * instrumental.sample_rate))
+                mixed = audio_service.mix_buffers(vocals, instrumental, instrumental_offset=offset)
+
+            with stage_timer("alignment"):
+                line_timings = _align_stream_line(services, job_id, index, vocals, lines[index])
+                line_timings = [
+                    {**timing, 'start': timing['start'] + stream.end_time, 'end': timing['end'] + stream.end_time}
+                    for timing in line_timings
+                ]
+
+            with stage_timer("segment_encode"):
+                stream.add_segment(mixed, lines[index], line_timings)
+
+            if index == 0:
+                logger.info(f"[{job_id}] First audio after {time.perf_counter() - started_at:.2f}s")
+
+            mixed_lines.append(mixed)
+            timings.extend(line_timings)
+            publish(30 + int(60 * (index + 1) / len(lines)), f'Singing line {index + 1} of {len(lines)}...')
+
+    stream.finish()
+    publish(95, 'Finalizing...')
+
+    with stage_timer("final_analysis"):
+        sample_rate = max(line.sample_rate for line in mixed_lines)
+        channels = max(line.channels for line in mixed_lines)
+        final_audio = AudioBuffer(
+            np.concatenate([line.resample(sample_rate).with_channels(channels).samples for line in mixed_lines]),
+            sample_rate
+        )
+        final_audio_path = final_audio.export(
+            str(settings.OUTPUT_DIR / f"song_{uuid.uuid4()}.mp3"), format="mp3", bitrate="192k"
+        )
+        bpm = audio_service.detect_bpm_pcm(final_audio, source_path=final_audio_path)
+
+    logger.info(f"Generated {len(timings)} karaoke timings across {len(mixed_lines)} segments")
+
+    result = _build_result(
+        word, display_lyrics, final_audio_path, timings, final_audio.duration, bpm, rhymes
+    )
+    result["stream"] = stream.describe()
+    return result
+
+
+def _align_stream_line(services: ServiceContainer, job_id: str, index: int, vocals: AudioBuffer, line: str) -> list:
+    """
+    Karaoke timings of one streamed line, relative to the start of its segment
+
+    The line's clean vocals are aligned (the instrumental only gets in the
+    aligner's way), written to a temporary WAV and deleted afterwards.
+    """
+    vocals_path = _temp_wav_path(f"stream_line_{index:03d}", job_id)
+    vocals.export(vocals_path, format="wav")
+    try:
+        return services.karaoke.generate_word_timings(vocals_path, line, duration=vocals.duration)
+    finally:
+        Path(vocals_path).unlink(missing_ok=True)
+
+
+def _generate_song_from_files(task, word: str, checkpoints: CheckpointStore) -> Dict[str, Any]:
+    """
+    Run the pipeline serially with every stage handing off encoded files
+
+    Args:
+        task: Bound Celery task (for progress updates)
+        word: The input word
+        checkpoints: The job's stage checkpoints
+
+    Returns:
+        Dictionary with song data
+    """
+    # Update progress: 10%
+    task.update_state(state='PROGRESS', meta={'progress': 10, 'status': 'Generating rhymes...'})
+
+    # Step 1: Generate rhyming words
+    with stage_timer("rhymes"):
+        rhymes = _find_rhymes(word)
+
+    # Update progress: 20%
+    task.update_state(state='PROGRESS', meta={'progress': 20, 'status': 'Writing pirate shanty...'})
+
+    # Step 2: Generate lyrics with Gemini
+    with stage_timer("lyrics"):
+        lyrics_data = checkpoints.load_json(LYRICS)
+        if lyrics_data is None:
+            lyrics_data = get_services().lyrics.generate_pirate_shanty(word, rhymes)
+            checkpoints.save_json(LYRICS, lyrics_data)
+
+    logger.info(f"Generated lyrics:\n{lyrics_data['lyrics']}")
+
+    # One AudioService per job so BPM/duration analysis is memoized across steps
+    audio_service = get_services().audio_service()
+
+    # Steps 3-6: vocals, mood/BPM, background music and mixing
+    final_audio_path = _checkpointed_mix_path(checkpoints)
+    if not final_audio_path:
+        final_audio_path = _produce_mix_from_files(task, audio_service, word, lyrics_data, checkpoints)
+        checkpoints.save_json(MIX, {'final_audio_path': final_audio_path})
+
+    logger.info(f"Mixed audio: {final_audio_path}")
+
+    # Update progress: 85%
+    task.update_state(state='PROGRESS', meta={'progress': 85, 'status': 'Creating karaoke timings...'})
+
+    # Step 7: Generate karaoke timings
+    with stage_timer("alignment"):
+        timings = checkpoints.load_json(TIMINGS)
+        if timings is None:
+            timings = get_services().karaoke.generate_word_timings(final_audio_path, lyrics_data['lyrics'])
+            checkpoints.save_json(TIMINGS, timings)
+
+    logger.info(f"Generated {len(timings)} karaoke timings")
+
+    # Update progress: 95%
+    task.update_state(state='PROGRESS', meta={'progress': 95, 'status': 'Finalizing...'})
+
+    # Step 8: Get final metadata
+    with stage_timer("final_analysis"):
+        duration = audio_service.get_audio_duration(final_audio_path)
+        bpm = audio_service.detect_bpm(final_audio_path)
+
+    # Update progress: 100%
+    task.update_state(state='PROGRESS', meta={'progress': 100, 'status': 'Complete!'})
+
+    return _build_result(
+        word, _clean_display_lyrics(lyrics_data['lyrics']), final_audio_path,
+        timings, duration, bpm, rhymes
+    )
+
+
+def _progress_reporter(task):
+    """
+    Thread-safe progress callback that never moves the percentage backwards
+
+    Args:
+        task: Bound Celery task
+
+    Returns:
+        Callable taking (progress, status)
+    """
+    lock = threading.Lock()
+    last = {'progress': 0}
+
+    def report(progress: int, status: str):
+        with lock:
+            if progress <= last['progress']:
+                return
+            last['progress'] = progress
+            task.update_state(state='PROGRESS', meta={'progress': progress, 'status': status})
+
+    return report
+
+
+def _produce_mix_from_files(
+    task,
+    audio_service: AudioService,
+    word: str,
+    lyrics_data: Dict[str, Any],
+    checkpoints: CheckpointStore
+) -> str:
+    """
+    Vocals, background music and mixing with every stage handing off encoded files
+
+    Args:
+        task: Bound Celery task (for progress updates)
+        audio_service: The job's AudioService (shares its analysis memo)
+        word: The input word
+        lyrics_data: Output of LyricsGenerator.generate_pirate_shanty
+        checkpoints: The job's stage checkpoints
+
+    Returns:
+        Path to the mixed MP3
+    """
+    # Update progress: 40%
+    task.update_state(state='PROGRESS', meta={'progress': 40, 'status': 'Recording vocals...'})
+
+    # Step 3: Generate singing vocals with Bark TTS
+    with stage_timer("vocals"):
+        if checkpoints.has(VOCALS):
+            vocal_path = str(checkpoints.audio_path(VOCALS))
+        else:
+            vocal_path = get_services().vocals.generate_vocals(lyrics_data['lyrics'])
+            checkpoints.save_audio(VOCALS, AudioBuffer.from_file(vocal_path))
+
+    logger.info(f"Vocals generated: {vocal_path}")
+
+    # Update progress: 55%
+    task.update_state(state='PROGRESS', meta={'progress': 55, 'status': 'Analyzing mood and BPM...'})
+
+    # Step 4: Analyze mood and detect BPM
+    with stage_timer("bpm"):
         vocal_bpm = audio_service.detect_bpm(vocal_path)
 
-        mood_analyzer = MoodAnalyzer()
-        mood_analysis = mood_analyzer.analyze_lyrics(lyrics_data['lyrics'])
-        energy = mood_analyzer.adjust_energy_for_bpm(mood_analysis['energy'], vocal_bpm)
+    mood_analyzer = get_services().mood_analyzer
+    mood_analysis = mood_analyzer.analyze_lyrics(lyrics_data['lyrics'])
+    energy = mood_analyzer.adjust_energy_for_bpm(mood_analysis['energy'], vocal_bpm)
 
-        logger.info(f"Mood: {mood_analysis['mood'].value}, Energy: {energy:.2f}, BPM: {vocal_bpm:.1f}")
+    logger.info(f"Mood: {mood_analysis['mood'].value}, Energy: {energy:.2f}, BPM: {vocal_bpm:.1f}")
 
-        # Update progress: 60%
-        self.update_state(state='PROGRESS', meta={'progress': 60, 'status': 'Selecting background music...'})
+    # Update progress: 60%
+    task.update_state(state='PROGRESS', meta={'progress': 60, 'status': 'Selecting background music...'})
+
+    # Step 5: Get background music (custom tracks or generated beats)
+    if settings.USE_CUSTOM_BACKGROUND_MUSIC:
+        # Use custom background music tracks
+        logger.info(f"Using custom background music for '{word}'...")
+
+        music_manager = get_services().music_manager
+
+        # Get actual vocal duration
+        actual_duration = audio_service.get_audio_duration(vocal_path)
+
+        # Get random background track trimmed to vocal length
+        background_audio = music_manager.get_random_background(
+            target_duration=actual_duration,
+            fade_out_duration=settings.BACKGROUND_MUSIC_FADE_OUT
+        )
+
+        if background_audio:
+            # Save background to temp file
+            import uuid
+            background_filename = f"background_{uuid.uuid4()}.mp3"
+            instrumental_path = str(settings.TEMP_DIR / background_filename)
+            background_audio.export(instrumental_path, format="mp3", bitrate="192k")
+            logger.info(f"Custom background music saved: {instrumental_path}")
+        else:
+            # Fallback to generated beat if no custom tracks
+            logger.warning("No custom background tracks found, falling back to beat generation")
+            beat_gen = get_services().beat_generator
+            instrumental_path = beat_gen.generate_beat(
+                word=word,
+                duration=lyrics_data['estimated_duration'] + 2,
+                bpm=vocal_bpm,
+                energy=energy
+            )
+    else:
+        # Use generated beats (original behavior)
+        instrumental_path = audio_service.get_instrumental(vocal_path, genre="pirate-shanty", vocal_bpm=vocal_bpm)
+
+        if not instrumental_path:
+            logger.info(f"Generating themed instrumental for '{word}'...")
+            beat_gen = get_services().beat_generator
+            instrumental_path = beat_gen.generate_beat(
+                word=word,
+                duration=lyrics_data['estimated_duration'] + 2,
+                bpm=vocal_bpm,
+                energy=energy
+            )
+            logger.info(f"Generated themed instrumental: {instrumental_path}")
+        else:
+            logger.info(f"Using pre-made instrumental: {instrumental_path}")
+
+    # Update progress: 75%
+    task.update_state(state='PROGRESS', meta={'progress': 75, 'status': 'Mixing vocals with instrumental...'})
+
+    # Step 6: Mix vocals and instrumental
+    with stage_timer("mix"):
+        return audio_service.mix_audio(vocal_path, instrumental_path)
 
-        # Step 5: Get background music (custom tracks or generated beats)
-        if settings.USE_CUSTOM_BACKGROUND_MUSIC:
-            # Use custom background music tracks
-            logger.info(f"Using custom background music for '{word}'...")
 
-            music_manager = BackgroundMusicManager()
+def _find_rhymes(word: str) -> list:
+    """Kid-friendly rhymes for a word, failing the job if there are too few"""
+    rhymes = get_kid_friendly_rhymes(word, count=6)
 
-            # Get actual vocal duration
-            actual_duration = audio_service.get_audio_duration(vocal_path)
+    if not rhymes or len(rhymes) < 2:
+        raise ValueError(f"Not enough rhymes found for word '{word}'")
+
+    logger.info(f"Found rhymes: {rhymes}")
+
+    return rhymes
+
+
+def _checkpointed_mix_path(checkpoints: CheckpointStore) -> Optional[str]:
+    """Final MP3 of a previous attempt, if it was checkpointed and still exists"""
+    mix = checkpoints.load_json(MIX)
+    if mix and Path(mix['final_audio_path']).exists():
+        return mix['final_audio_path']
+    return None
+
+
+def _select_instrumental_pcm(
+    audio_service: AudioService,
+    word: str,
+    lyrics_data: Dict[str, Any],
+    vocal_duration: float,
+    vocal_bpm: float,
+    energy: float,
+    background_track: Optional[AudioSegment],
+    beat_renders: Optional[Dict[tuple, Future]] = None
+) -> AudioBuffer:
+    """
+    Pick (or synthesize) the instrumental as in-memory PCM
 
-            # Get random background track trimmed to vocal length
-            background_audio = music_manager.get_random_background(
-                target_duration=actual_duration,
+    Args:
+        audio_service: The job's AudioService
+        word: The input word
+        lyrics_data: Output of LyricsGenerator.generate_pirate_shanty
+        vocal_duration: Length of the vocals in seconds
+        vocal_bpm: Detected vocal BPM
+        energy: Mood energy (0.0-1.0)
+        background_track: Full-length track from _load_background_track (or None)
+        beat_renders: Generated beats shared across a batch, keyed by theme/tempo/energy/length
+
+    Returns:
+        AudioBuffer with the instrumental
+    """
+    instrumental = None
+    if settings.USE_CUSTOM_BACKGROUND_MUSIC:
+        if background_track is not None:
+            logger.info(f"Using custom background music for '{word}'...")
+            background_audio = get_services().music_manager.fit_to_duration(
+                background_track,
+                target_duration=vocal_duration,
                 fade_out_duration=settings.BACKGROUND_MUSIC_FADE_OUT
             )
+            instrumental = AudioBuffer.from_segment(background_audio)
+        else:
+            logger.warning("No custom background tracks found, falling back to beat generation")
+    else:
+        instrumental_path = audio_service.get_instrumental(None, genre="pirate-shanty", vocal_bpm=vocal_bpm)
 
-            if background_audio:
-                # Save background to temp file
-                import uuid
-                background_filename = f"background_{uuid.uuid4()}.mp3"
-                instrumental_path = str(settings.TEMP_DIR / background_filename)
-                background_audio.export(instrumental_path, format="mp3", bitrate="192k")
-                logger.info(f"Custom background music saved: {instrumental_path}")
-            else:
-                # Fallback to generated beat if no custom tracks
-                logger.warning("No custom background tracks found, falling back to beat generation")
-                beat_gen = PirateBeatGenerator()
-                instrumental_path = beat_gen.generate_beat(
-                    word=word,
-                    duration=lyrics_data['estimated_duration'] + 2,
-                    bpm=vocal_bpm,
-                    energy=energy
-                )
+        if instrumental_path:
+            logger.info(f"Using pre-made instrumental: {instrumental_path}")
+            instrumental = AudioBuffer.from_file(instrumental_path)
+
+    if instrumental is None:
+        duration = lyrics_data['estimated_duration'] + 2
+        if beat_renders is not None:
+            instrumental = _render_shared_beat(word, duration, vocal_bpm, energy, beat_renders)
         else:
-            # Use generated beats (original behavior)
-            instrumental_path = audio_service.get_instrumental(vocal_path, genre="pirate-shanty")
-
-            if not instrumental_path:
-                logger.info(f"Generating themed instrumental for '{word}'...")
-                beat_gen = PirateBeatGenerator()
-                instrumental_path = beat_gen.generate_beat(
-                    word=word,
-                    duration=lyrics_data['estimated_duration'] + 2,
-                    bpm=vocal_bpm,
-                    energy=energy
-                )
-                logger.info(f"Generated themed instrumental: {instrumental_path}")
-            else:
-                logger.info(f"Using pre-made instrumental: {instrumental_path}")
+            logger.info(f"Generating themed instrumental for '{word}'...")
+            beat_gen = get_services().beat_generator
+            instrumental = AudioBuffer(
+                beat_gen.render_beat(word=word, duration=duration, bpm=vocal_bpm, energy=energy),
+                beat_gen.sample_rate
+            )
 
-        # Update progress: 75%
-        self.update_state(state='PROGRESS', meta={'progress': 75, 'status': 'Mixing vocals with instrumental...'})
+    return instrumental
 
-        # Step 6: Mix vocals and instrumental
-        final_audio_path = audio_service.mix_audio(vocal_path, instrumental_path)
 
-        logger.info(f"Mixed audio: {final_audio_path}")
+# Guards the per-batch beat_renders dictionaries shared by a batch's threads
+_beat_renders_lock = threading.Lock()
 
-        # Update progress: 85%
-        self.update_state(state='PROGRESS', meta={'progress': 85, 'status': 'Creating karaoke timings...'})
 
-        # Step 7: Generate karaoke timings
-        karaoke_gen = KaraokeGenerator()
-        timings = karaoke_gen.generate_word_timings(final_audio_path, lyrics_data['lyrics'])
+def _render_shared_beat(
+    word: str,
+    duration: float,
+    bpm: float,
+    energy: float,
+    beat_renders: Dict[tuple, Future]
+) -> AudioBuffer:
+    """
+    Render a themed beat once per theme, tempo, energy and length within a batch
 
-        logger.info(f"Generated {len(timings)} karaoke timings")
+    Tempo, energy and length are quantized (whole BPM, tenths of energy,
+    whole seconds) so words with the same theme reuse one render. The
+    batch's songs run on several threads: the first one to need a beat
+    renders it, the others wait for its result.
+    """
+    bpm = float(round(bpm))
+    energy = round(energy, 1)
+    duration = float(math.ceil(duration))
+    key = (get_theme_info(word)['theme'], bpm, energy, duration)
 
-        # Update progress: 95%
-        self.update_state(state='PROGRESS', meta={'progress': 95, 'status': 'Finalizing...'})
+    with _beat_renders_lock:
+        render = beat_renders.get(key)
+        owner = render is None
+        if owner:
+            render = beat_renders[key] = Future()
+
+    if not owner:
+        logger.info(f"Reusing shared themed instrumental {key} for '{word}'")
+        try:
+            return render.result()
+        except Exception:
+            # The render failed for another word; try it again for this one
+            return _render_shared_beat(word, duration, bpm, energy, beat_renders)
+
+    logger.info(f"Generating shared themed instrumental {key} for '{word}'...")
+    try:
+        beat_gen = get_services().beat_generator
+        instrumental = AudioBuffer(
+            beat_gen.render_beat(word=word, duration=duration, bpm=bpm, energy=energy),
+            beat_gen.sample_rate
+        )
+    except Exception as e:
+        with _beat_renders_lock:
+            del beat_renders[key]
+        render.set_exception(e)
+        raise
+
+    render.set_result(instrumental)
+    return instrumental
+
+
+def _load_background_track() -> Optional[AudioSegment]:
+    """Select and decode a custom background track (None if disabled or unavailable)"""
+    if not settings.USE_CUSTOM_BACKGROUND_MUSIC:
+        return None
+    return get_services().music_manager.load_random_track()
+
+
+def _clean_display_lyrics(lyrics: str) -> str:
+    """Remove structure labels from lyrics for display"""
+    cleaned_lyrics = lyrics
+    cleaned_lyrics = re.sub(r'Verse \d+:\s*', '', cleaned_lyrics)
+    cleaned_lyrics = re.sub(r'Chorus:\s*', '', cleaned_lyrics)
+    cleaned_lyrics = re.sub(r'Bridge:\s*', '', cleaned_lyrics)
+    cleaned_lyrics = re.sub(r'Outro:\s*', '', cleaned_lyrics)
+    return cleaned_lyrics.strip()
 
-        # Step 8: Get final metadata
-        duration = audio_service.get_audio_duration(final_audio_path)
-        bpm = audio_service.detect_bpm(final_audio_path)
 
-        # Update progress: 100%
-        self.update_state(state='PROGRESS', meta={'progress': 100, 'status': 'Complete!'})
+def _build_result(
+    word: str,
+    lyrics: str,
+    final_audio_path: str,
+    timings: list,
+    duration: float,
+    bpm: float,
+    rhymes: list
+) -> Dict[str, Any]:
+    """Assemble the song result returned to the API (lyrics already cleaned for display)"""
+    return {
+        "word": word,
+        "lyrics": lyrics,
+        "audio_url": f"/outputs/{final_audio_path.split('/')[-1]}",
+        "audio_path": final_audio_path,
+        "timings": timings,
+        "duration": duration,
+        "bpm": bpm,
+        "rhymes_used": rhymes
+    }
 
-        # Clean lyrics for display (remove structure labels)
-        import re
-        cleaned_lyrics = lyrics_data['lyrics']
-        cleaned_lyrics = re.sub(r'Verse \d+:\s*', '', cleaned_lyrics)
-        cleaned_lyrics = re.sub(r'Chorus:\s*', '', cleaned_lyrics)
-        cleaned_lyrics = re.sub(r'Bridge:\s*', '', cleaned_lyrics)
-        cleaned_lyrics = re.sub(r'Outro:\s*', '', cleaned_lyrics)
-        cleaned_lyrics = cleaned_lyrics.strip()
 
-        # Build result
-        result = {
+# ===== Staged pipeline =====
+# Each stage is its own task so a worker slot is only held for that stage.
+# Stages pass a JSON state dict along the chain; audio crosses process
+# boundaries as lossless WAV files in the job's checkpoint directory, so a
+# retried stage (or a resumed job) reuses everything already produced.
+
+def _report_progress(job_id: str, progress: int, status: str):
+    """Publish progress under the job id so GET /api/jobs/{job_id} can see it"""
+    celery_app.backend.store_result(job_id, {'progress': progress, 'status': status}, 'PROGRESS')
+
+
+def _fail_job(task, job_id: str, error: Exception, metrics: JobMetrics):
+    """Retry the stage if retries remain, otherwise mark the whole job as failed"""
+    _retry_or_raise(task, job_id, error)
+    logger.error(f"Pipeline stage failed for job {job_id}: {error}", exc_info=True)
+    celery_app.backend.mark_as_failure(job_id, error)
+    _finish_admission(job_id)
+    # Partial metrics: every earlier stage plus what this one recorded
+    _record_job_metrics(metrics.to_dict(), "failed")
+
+
+def _temp_wav_path(prefix: str, job_id: str) -> str:
+    """Path for an intermediate stage artifact"""
+    return str(settings.TEMP_DIR / f"{prefix}_{job_id}.wav")
+
+
+def _stage_audio(state: Dict[str, Any], stage: str, produce) -> tuple:
+    """
+    Audio artifact of a stage: the checkpointed WAV if present, else produce and store it
+
+    Args:
+        state: Pipeline state (job_id and word)
+        stage: Checkpoint stage name
+        produce: Callable returning an AudioBuffer
+
+    Returns:
+        Tuple of (AudioBuffer, path of the WAV handed to later stages)
+    """
+    checkpoints = CheckpointStore(state['job_id'], state['word'])
+
+    audio = checkpoints.load_audio(stage)
+    if audio is not None:
+        return audio, str(checkpoints.audio_path(stage))
+
+    audio = produce()
+    path = checkpoints.save_audio(stage, audio)
+    if path is None:
+        path = audio.export(_temp_wav_path(stage, state['job_id']), format="wav")
+
+    return audio, path
+
+
+def _resume_metrics(state: Dict[str, Any]) -> JobMetrics:
+    """Metrics for this stage, continuing the totals recorded by earlier stages"""
+    metrics = JobMetrics()
+    metrics.merge(state.get('metrics'))
+    return metrics
+
+
+@celery_app.task(bind=True, max_retries=settings.JOB_MAX_RETRIES)
+def lyrics_stage(self, word: str, job_id: str) -> Dict[str, Any]:
+    """
+    Stage 1: rhymes and lyrics (Gemini, I/O-bound)
+
+    Args:
+        word: The input word
+        job_id: Job id the final result is stored under
+
+    Returns:
+        Pipeline state for the next stage
+    """
+    metrics = JobMetrics()
+    try:
+        with track_job(metrics):
+            logger.info(f"[{job_id}] Lyrics stage for '{word}'")
+            _report_progress(job_id, 10, 'Generating rhymes...')
+
+            with stage_timer("rhymes"):
+                rhymes = _find_rhymes(word)
+
+            _report_progress(job_id, 20, 'Writing pirate shanty...')
+
+            with stage_timer("lyrics"):
+                checkpoints = CheckpointStore(job_id, word)
+                lyrics_data = checkpoints.load_json(LYRICS)
+                if lyrics_data is None:
+                    lyrics_data = get_services().lyrics.generate_pirate_shanty(word, rhymes)
+                    checkpoints.save_json(LYRICS, lyrics_data)
+
+        return {
+            "job_id": job_id,
             "word": word,
-            "lyrics": cleaned_lyrics,
-            "audio_url": f"/outputs/{final_audio_path.split('/')[-1]}",
-            "audio_path": final_audio_path,
-            "timings": timings,
-            "duration": duration,
-            "bpm": bpm,
-            "rhymes_used": rhymes
+            "rhymes": rhymes,
+            "lyrics_data": lyrics_data,
+            "metrics": metrics.to_dict()
         }
 
-        logger.info(f"Song generation completed successfully for '{word}'")
-        logger.info(f"Result: {result['audio_url']}")
+    except Exception as e:
+        _fail_job(self, job_id, e, metrics)
+        raise
+
+
+@celery_app.task(bind=True, max_retries=settings.JOB_MAX_RETRIES)
+def vocals_stage(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stage 2: TTS vocals (ElevenLabs/Bark)
+
+    Args:
+        state: Pipeline state from lyrics_stage
+
+    Returns:
+        Pipeline state with vocal_path, vocal_duration and vocal_bpm
+    """
+    job_id = state['job_id']
+    metrics = _resume_metrics(state)
+    try:
+        with track_job(metrics):
+            _report_progress(job_id, 40, 'Recording vocals...')
+
+            with stage_timer("vocals"):
+                vocals, vocal_path = _stage_audio(
+                    state, VOCALS,
+                    lambda: get_services().vocals.generate_vocals_pcm(state['lyrics_data']['lyrics'])
+                )
+
+            _report_progress(job_id, 55, 'Analyzing mood and BPM...')
+
+            with stage_timer("bpm"):
+                vocal_bpm = get_services().audio_service().detect_bpm_pcm(vocals)
+
+        state.update(
+            vocal_path=vocal_path,
+            vocal_duration=vocals.duration,
+            vocal_bpm=vocal_bpm,
+            metrics=metrics.to_dict()
+        )
+        return state
+
+    except Exception as e:
+        _fail_job(self, job_id, e, metrics)
+        raise
+
+
+@celery_app.task(bind=True, max_retries=settings.JOB_MAX_RETRIES)
+def instrumental_stage(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stage 3: mood analysis and instrumental selection/rendering
+
+    Args:
+        state: Pipeline state from vocals_stage
+
+    Returns:
+        Pipeline state with instrumental_path
+    """
+    job_id = state['job_id']
+    metrics = _resume_metrics(state)
+    try:
+        with track_job(metrics):
+            _report_progress(job_id, 60, 'Selecting background music...')
+
+            lyrics_data = state['lyrics_data']
+            with stage_timer("mood"):
+                mood_analyzer = get_services().mood_analyzer
+                mood_analysis = mood_analyzer.analyze_lyrics(lyrics_data['lyrics'])
+                energy = mood_analyzer.adjust_energy_for_bpm(mood_analysis['energy'], state['vocal_bpm'])
+
+            with stage_timer("instrumental"):
+                _, instrumental_path = _stage_audio(
+                    state, INSTRUMENTAL,
+                    lambda: _select_instrumental_pcm(
+                        get_services().audio_service(), state['word'], lyrics_data,
+                        state['vocal_duration'], state['vocal_bpm'], energy,
+                        _load_background_track()
+                    )
+                )
+
+        state.update(instrumental_path=instrumental_path, metrics=metrics.to_dict())
+        return state
+
+    except Exception as e:
+        _fail_job(self, job_id, e, metrics)
+        raise
+
+
+@celery_app.task(bind=True, max_retries=settings.JOB_MAX_RETRIES)
+def mix_stage(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stage 4: mix vocals and instrumental, encode the final MP3
+
+    Args:
+        state: Pipeline state from instrumental_stage
+
+    Returns:
+        Pipeline state with final_audio_path, duration and bpm
+    """
+    job_id = state['job_id']
+    metrics = _resume_metrics(state)
+    try:
+        with track_job(metrics):
+            _report_progress(job_id, 75, 'Mixing vocals with instrumental...')
+
+            audio_service = get_services().audio_service()
+            checkpoints = CheckpointStore(job_id, state['word'])
+            with stage_timer("mix"):
+                final_audio_path = _checkpointed_mix_path(checkpoints)
+                if final_audio_path:
+                    final_audio = AudioBuffer.from_file(final_audio_path)
+                else:
+                    final_audio_path, final_audio = audio_service.mix_pcm(
+                        AudioBuffer.from_file(state['vocal_path']),
+                        AudioBuffer.from_file(state['instrumental_path'])
+                    )
+                    checkpoints.save_json(MIX, {'final_audio_path': final_audio_path})
+
+            with stage_timer("final_analysis"):
+                bpm = audio_service.detect_bpm_pcm(final_audio, source_path=final_audio_path)
+
+        state.update(
+            final_audio_path=final_audio_path,
+            duration=final_audio.duration,
+            bpm=bpm,
+            metrics=metrics.to_dict()
+        )
+        return state
+
+    except Exception as e:
+        _fail_job(self, job_id, e, metrics)
+        raise
+
+
+@celery_app.task(bind=True, max_retries=settings.JOB_MAX_RETRIES)
+def alignment_stage(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stage 5: karaoke alignment; runs under the job id and returns the song result
+
+    Args:
+        state: Pipeline state from mix_stage
+
+    Returns:
+        Dictionary with song data (lyrics, audio_url, timings, etc.)
+    """
+    job_id = state['job_id']
+    metrics = _resume_metrics(state)
+    try:
+        with track_job(metrics):
+            _report_progress(job_id, 85, 'Creating karaoke timings...')
+
+            checkpoints = CheckpointStore(job_id, state['word'])
+            with stage_timer("alignment"):
+                timings = checkpoints.load_json(TIMINGS)
+                if timings is None:
+                    timings = get_services().karaoke.generate_word_timings(
+                        state['final_audio_path'], state['lyrics_data']['lyrics']
+                    )
+                    checkpoints.save_json(TIMINGS, timings)
+
+        for key in ('vocal_path', 'instrumental_path'):
+            Path(state[key]).unlink(missing_ok=True)
+        checkpoints.clear()
+
+        logger.info(f"[{job_id}] Song generation completed for '{state['word']}'")
+
+        result = _build_result(
+            state['word'], _clean_display_lyrics(state['lyrics_data']['lyrics']), state['final_audio_path'],
+            timings, state['duration'], state['bpm'], state['rhymes']
+        )
+        result["metrics"] = metrics.to_dict()
+
+        _finish_admission(job_id, result["metrics"]["total_seconds"])
+        _record_job_metrics(result["metrics"])
 
         return result
 
     except Exception as e:
-        logger.error(f"Song generation failed for '{word}': {e}", exc_info=True)
-        # Let Celery handle the FAILURE state automatically
+        _fail_job(self, job_id, e, metrics)
+        raise
+
+
+# ===== Batch generation =====
+# A batch shares work across its words: lyrics come from one Gemini request
+# per group of words, songs are voiced and mixed concurrently, the background
+# track is decoded once and identical generated beats are rendered once.
+# Progress and results are stored under each word's own job id, so every
+# word is polled exactly like a single job.
+
+def submit_batch_generation(batch_id: str, jobs: Dict[str, str]) -> str:
+    """
+    Enqueue generation for a batch of words
+
+    Args:
+        batch_id: Batch identifier
+        jobs: Mapping of word to the job id its progress and result are stored under
+
+    Returns:
+        The batch id
+    """
+    generate_batch_task.apply_async(args=[batch_id, jobs])
+
+    logger.info(f"Submitted batch {batch_id} for {len(jobs)} words")
+    return batch_id
+
+
+@celery_app.task
+def generate_batch_task(batch_id: str, jobs: Dict[str, str]) -> Dict[str, str]:
+    """
+    Generate songs for several words, sharing LLM, TTS and instrumental work
+
+    Args:
+        batch_id: Batch identifier
+        jobs: Mapping of word to job id
+
+    Returns:
+        Mapping of word to its final status ("completed" or "failed")
+    """
+    try:
+        return _run_batch(batch_id, jobs)
+    finally:
+        # A batch holds one slot; its run time would skew the per-job ETA average
+        _finish_admission(batch_id)
+
+
+def _run_batch(batch_id: str, jobs: Dict[str, str]) -> Dict[str, str]:
+    """Rhymes, shared lyrics, then concurrent songs for every word of a batch"""
+    logger.info(f"[{batch_id}] Batch generation for {len(jobs)} words: {list(jobs)}")
+
+    services = get_services()
+    outcome = {}
+
+    def fail(word: str, error: Exception, metrics_recorded: bool = False):
+        logger.error(f"[{batch_id}] Song generation failed for '{word}': {error}", exc_info=True)
+        celery_app.backend.mark_as_failure(jobs[word], error)
+        outcome[word] = "failed"
+        if not metrics_recorded:
+            _record_job_metrics(None, "failed")
+
+    # Step 1: Rhymes
+    word_rhymes = {}
+    for word, job_id in jobs.items():
+        _report_progress(job_id, 10, 'Generating rhymes...')
+        try:
+            word_rhymes[word] = _find_rhymes(word)
+        except Exception as e:
+            fail(word, e)
+
+    # Step 2: Lyrics, several words per Gemini request
+    for word in word_rhymes:
+        _report_progress(jobs[word], 20, 'Writing pirate shanty...')
+    lyrics = _generate_batch_lyrics(services, word_rhymes, fail)
+
+    # Step 3: Vocals, instrumental, mix and alignment per word, concurrently
+    background_track = _load_background_track()
+    beat_renders: Dict[tuple, Future] = {}
+
+    with ThreadPoolExecutor(
+        max_workers=settings.BATCH_SONG_CONCURRENCY,
+        thread_name_prefix="batch"
+    ) as executor:
+        futures = {
+            executor.submit(
+                _generate_batch_song, services, word, jobs[word], word_rhymes[word],
+                lyrics_data, background_track, beat_renders
+            ): word
+            for word, lyrics_data in lyrics.items()
+        }
+
+        for future in as_completed(futures):
+            word = futures[future]
+            try:
+                celery_app.backend.store_result(jobs[word], future.result(), 'SUCCESS')
+                outcome[word] = "completed"
+            except Exception as e:
+                # _generate_batch_song already recorded the song's partial metrics
+                fail(word, e, metrics_recorded=True)
+
+    logger.info(f"[{batch_id}] Batch finished: {outcome}")
+
+    return outcome
+
+
+def _generate_batch_lyrics(services: ServiceContainer, word_rhymes: Dict[str, list], on_failure) -> Dict[str, Dict[str, Any]]:
+    """
+    Lyrics for every word, falling back to one request per word the batch missed
+
+    Args:
+        services: The worker's ServiceContainer
+        word_rhymes: Mapping of word to rhymes
+        on_failure: Callback (word, exception) for words without lyrics
+
+    Returns:
+        Mapping of word to lyrics data
+    """
+    lyrics = {}
+    words = list(word_rhymes)
+    group_size = max(1, settings.BATCH_LYRICS_WORDS_PER_REQUEST)
+
+    for i in range(0, len(words), group_size):
+        group = {word: word_rhymes[word] for word in words[i:i + group_size]}
+        if len(group) < 2:
+            continue
+        try:
+            with stage_timer("lyrics"):
+                lyrics.update(services.lyrics.generate_pirate_shanties(group))
+        except Exception as e:
+            logger.warning(f"Batch lyrics request failed ({e}), falling back to one request per word")
+
+    for word in words:
+        if word in lyrics:
+            continue
+        try:
+            lyrics[word] = services.lyrics.generate_pirate_shanty(word, word_rhymes[word])
+        except Exception as e:
+            on_failure(word, e)
+
+    return lyrics
+
+
+def _generate_batch_song(
+    services: ServiceContainer,
+    word: str,
+    job_id: str,
+    rhymes: list,
+    lyrics_data: Dict[str, Any],
+    background_track: Optional[AudioSegment],
+    beat_renders: Dict[tuple, Future]
+) -> Dict[str, Any]:
+    """
+    Finish one song of a batch from its lyrics
+
+    Args:
+        services: The worker's ServiceContainer
+        word: The input word
+        job_id: Job id progress is reported under
+        rhymes: Rhymes found for the word
+        lyrics_data: Lyrics from the batch request
+        background_track: Background track decoded once for the batch
+        beat_renders: Generated beats shared across the batch
+
+    Returns:
+        Dictionary with song data (including its metrics)
+    """
+    metrics = JobMetrics()
+    try:
+        with track_job(metrics):
+            # One AudioService per song so its analysis memo stays per job
+            audio_service = services.audio_service()
+
+            _report_progress(job_id, 40, 'Recording vocals...')
+            with stage_timer("vocals"):
+                vocals = services.vocals.generate_vocals_pcm(lyrics_data['lyrics'])
+
+            _report_progress(job_id, 55, 'Analyzing mood and BPM...')
+            with stage_timer("bpm"):
+                vocal_bpm = audio_service.detect_bpm_pcm(vocals)
+
+            with stage_timer("mood"):
+                mood_analysis = services.mood_analyzer.analyze_lyrics(lyrics_data['lyrics'])
+                energy = services.mood_analyzer.adjust_energy_for_bpm(mood_analysis['energy'], vocal_bpm)
+
+            _report_progress(job_id, 60, 'Selecting background music...')
+            with stage_timer("instrumental"):
+                instrumental = _select_instrumental_pcm(
+                    audio_service, word, lyrics_data, vocals.duration, vocal_bpm, energy,
+                    background_track, beat_renders
+                )
+
+            _report_progress(job_id, 75, 'Mixing vocals with instrumental...')
+            with stage_timer("mix"):
+                final_audio_path, final_audio = audio_service.mix_pcm(vocals, instrumental)
+
+            _report_progress(job_id, 85, 'Creating karaoke timings...')
+            with stage_timer("alignment"):
+                timings = services.karaoke.generate_word_timings(final_audio_path, lyrics_data['lyrics'])
+
+            with stage_timer("final_analysis"):
+                bpm = audio_service.detect_bpm_pcm(final_audio, source_path=final_audio_path)
+    except Exception:
+        # Keep what the song recorded before it failed
+        _record_job_metrics(metrics.to_dict(), "failed")
+        raise
+
+    logger.info(f"Song generation completed for '{word}' (batch job {job_id})")
+
+    result = _build_result(
+        word, _clean_display_lyrics(lyrics_data['lyrics']), final_audio_path,
+        timings, final_audio.duration, bpm, rhymes
+    )
+    result["metrics"] = metrics.to_dict()
+    _record_job_metrics(result["metrics"])
+    return result
+
+
+@celery_app.task
+def warm_song_cache() -> Dict[str, Any]:
+    """
+    Start an off-peak cache warming run (Celery beat)
+
+    Words come from request popularity, theme words and the preschool
+    vocabulary. Each word is generated by its own warm_song_task; every
+    task queues the next one CACHE_WARM_INTERVAL_SECONDS after it finishes,
+    so no worker sleeps between songs.
+
+    Returns:
+        Candidate words and the id of the first warm job
+    """
+    warmer = CacheWarmer(get_sync_redis())
+    cached_words = set(get_sync_database()["song_cache"].distinct("word"))
+    words = warmer.candidates(cached_words, settings.CACHE_WARM_MAX_SONGS)
+
+    logger.info(f"Cache warming: {len(words)} candidates, {warmer.remaining_budget()} TTS characters left today")
+
+    if not words:
+        return {"candidates": [], "job_id": None}
+
+    job_id = _queue_warm_song(words, {}, countdown=0)
+    return {"candidates": words, "job_id": job_id}
+
+
+def _queue_warm_song(words: List[str], run: Dict[str, Any], countdown: float) -> str:
+    """
+    Queue warm_song_task for the first of the remaining words
+
+    The Celery task id is the warm job's id, so requests attached to it
+    through single-flight poll it like any other job.
+
+    Args:
+        words: Remaining candidate words, in priority order
+        run: Totals of the run so far (warmed, failed, tts_characters, characters_per_song)
+        countdown: Seconds to wait before the task runs
+
+    Returns:
+        Job id of the queued task
+    """
+    job_id = f"warm-{uuid.uuid4()}"
+    warm_song_task.apply_async(args=[words, run], task_id=job_id, countdown=countdown)
+    return job_id
+
+
+def _finish_warm_run(run: Dict[str, Any], stopped: str):
+    """Log the summary of a warming run that has no more words to generate"""
+    logger.info(
+        f"Cache warming finished ({stopped}): warmed {run.get('warmed', [])}, "
+        f"failed {run.get('failed', [])}, {run.get('tts_characters', 0.0):.0f} TTS characters"
+    )
+
+
+@celery_app.task(bind=True)
+def warm_song_task(self, words: List[str], run: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Pre-generate the song for words[0], then queue the rest of the run
+
+    The word is claimed through single-flight under this task's id, and a
+    Job document is saved for it, so user requests for the word attach to
+    the warm job instead of generating it again. The run stops when a
+    generation slot is not free (or a user job is waiting for one), or the
+    daily TTS character budget is used up.
+
+    Args:
+        words: Remaining candidate words; this task generates the first
+        run: Totals of the run so far, carried from task to task
+
+    Returns:
+        Song result (like generate_song_task), or None if the word was skipped
+    """
+    word, remaining = words[0], words[1:]
+    job_id = self.request.id
+
+    run = {
+        "warmed": run.get("warmed", []),
+        "failed": run.get("failed", []),
+        "tts_characters": run.get("tts_characters", 0.0),
+        "characters_per_song": run.get("characters_per_song", DEFAULT_SONG_CHARACTERS),
+    }
+
+    warmer = CacheWarmer(get_sync_redis())
+    database = get_sync_database()
+
+    if warmer.remaining_budget() < run["characters_per_song"]:
+        _finish_warm_run(run, "TTS budget spent")
+        return None
+
+    if not acquire_slot(job_id):
+        _finish_warm_run(run, "user traffic")
+        return None
+
+    cached = database["song_cache"].count_documents({"word": word}, limit=1) > 0
+    single_flight = WorkerSingleFlight()
+    owner_job_id = None if cached else single_flight.claim(word, job_id)
+
+    if cached or owner_job_id:
+        # Cached since the run started, or a user request is generating it now
+        logger.info(f"Cache warming skipped '{word}'")
+        _finish_admission(job_id)
+        if remaining:
+            _queue_warm_song(remaining, run, countdown=0)
+        else:
+            _finish_warm_run(run, "no more candidates")
+        return None
+
+    # Requests attaching to the warm job poll this document
+    now = datetime.utcnow()
+    database["jobs"].insert_one({
+        "job_id": job_id, "word": word, "status": "processing", "progress": 0,
+        "stream": False, "created_at": now, "updated_at": now
+    })
+
+    elapsed = None
+    metrics = JobMetrics()
+    try:
+        with track_job(metrics):
+            checkpoints = CheckpointStore(job_id, word)
+            if settings.IN_MEMORY_PIPELINE:
+                result = _generate_song_in_memory(self, word, checkpoints)
+            else:
+                result = _generate_song_from_files(self, word, checkpoints)
+            checkpoints.clear()
+
+        summary = metrics.to_dict()
+        elapsed = summary["total_seconds"]
+        _record_job_metrics(summary)
+
+        characters = summary["counters"].get(TTS_CHARACTERS, 0)
+        warmer.spend(characters)
+        run["tts_characters"] += characters
+        if characters:
+            run["characters_per_song"] = characters
+
+        database["song_cache"].update_one(
+            {"word": word},
+            {"$setOnInsert": {
+                "word": word,
+                "lyrics": result["lyrics"],
+                "audio_url": result["audio_url"],
+                "timings": result["timings"],
+                "duration": result["duration"],
+                "bpm": result["bpm"],
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+        run["warmed"].append(word)
+        logger.info(f"Warmed song cache for '{word}' ({characters:.0f} TTS characters)")
+
+        result["metrics"] = summary
+        return result
+
+    except Exception as e:
+        logger.error(f"Cache warming failed for '{word}': {e}", exc_info=True)
+        run["failed"].append(word)
+        _record_job_metrics(metrics.to_dict(), "failed")
+        # Attached requests see the failure through the task state
         raise
 
+    finally:
+        # The cache is filled (or the word failed): later requests no longer attach
+        single_flight.release(word, job_id)
+        _finish_admission(job_id, elapsed)
+
+        if remaining:
+            _queue_warm_song(remaining, run, countdown=settings.CACHE_WARM_INTERVAL_SECONDS)
+        else:
+            _finish_warm_run(run, "no more candidates")
+
 
 @celery_app.task
 def cleanup_old_files():
@@ -227,6 +1611,12 @@ def cleanup_old_files():
                     deleted_count += 1
                     logger.debug(f"Deleted old temp file: {file_path}")
 
+        # Checkpoints of failed jobs nobody resumed
+        deleted_count += cleanup_checkpoints(settings.CHECKPOINT_MAX_AGE_HOURS * 60 * 60)
+
+        # Per-line segments of streamed songs (the full song MP3 is kept)
+        deleted_count += cleanup_streams(settings.STREAM_MAX_AGE_HOURS * 60 * 60)
+
         logger.info(f"Cleanup complete: deleted {deleted_count} old files")
 
     except Exception as e:
@@ -0,0 +1,3 @@
+"""
+Pipeline benchmarks run against local stand-ins for Gemini and ElevenLabs
+"""
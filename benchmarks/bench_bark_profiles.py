@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Bark CPU Profile Benchmark
+
+Loads Bark under each CPU inference profile (see app/services/bark_profiles.py)
+and measures load time, peak memory and real-time factor (generation time
+divided by generated audio length; below 1.0 is faster than real time).
+Every profile runs in its own process so memory and thread settings
+don't leak between them.
+
+Usage:
+    python benchmarks/bench_bark_profiles.py
+    python benchmarks/bench_bark_profiles.py --profiles default,fast --threads 4 --repeat 3
+    python benchmarks/bench_bark_profiles.py --save cpu-node
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Setup path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings require a Gemini key even though nothing here calls Gemini
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+# Lyric chunks as the vocal service would send them
+TEXTS = [
+    "[Gentle teacher singing a sweet song to children]\nThe little cat is soft and sweet, we love the cat we like to meet.",
+    "[Gentle teacher singing a sweet song to children]\nA happy cat can play all day, it smiles and sings along the way.",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    """Command line options"""
+    from app.services.bark_profiles import CPU_PROFILES
+
+    parser = argparse.ArgumentParser(description="Compare Bark CPU inference profiles")
+    parser.add_argument("--profiles", default=",".join(CPU_PROFILES), help="Comma-separated profile names")
+    parser.add_argument("--repeat", type=int, default=2, help="Measured generations per profile")
+    parser.add_argument("--threads", type=int, default=0, help="Torch threads (0 = profile default)")
+    parser.add_argument("--batch-size", type=int, default=0, help="Chunks per generate() call (0 = BARK_BATCH_SIZE)")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--run-profile", help=argparse.SUPPRESS)  # Child process mode
+    return parser.parse_args()
+
+
+def run_profile(args: argparse.Namespace) -> dict:
+    """Load and time one profile in this process"""
+    from app.services.bark_batcher import BarkBatcher
+    from app.services.bark_profiles import cpu_thread_count, effective_model_name, load_bark
+
+    start = time.perf_counter()
+    model, processor, device = load_bark(args.run_profile)
+    load_seconds = time.perf_counter() - start
+
+    batcher = BarkBatcher(model, processor, device, max_batch_size=args.batch_size or None, window_seconds=0)
+
+    # The first generation pays one-off costs (voice preset download, kernel selection)
+    batcher.generate(TEXTS[:1])
+
+    rtfs, walls = [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        audio = batcher.generate(TEXTS)
+        wall = time.perf_counter() - start
+        audio_seconds = sum(len(a) for a in audio) / batcher.sample_rate
+        walls.append(wall)
+        rtfs.append(wall / audio_seconds if audio_seconds else float("inf"))
+
+    return {
+        "profile": args.run_profile,
+        "model": effective_model_name(args.run_profile),
+        "device": device,
+        "threads": cpu_thread_count(),
+        "load_seconds": load_seconds,
+        "generate_seconds": statistics.median(walls),
+        "real_time_factor": statistics.median(rtfs),
+        # ru_maxrss is reported in KB on Linux
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def main():
+    """Benchmark each profile in a child process and print a comparison"""
+    args = parse_args()
+
+    if args.run_profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    print("🦜 BARK CPU PROFILE BENCHMARK")
+    print("=" * 60)
+
+    env = dict(os.environ, BARK_USE_GPU="False")
+    if args.threads:
+        env["BARK_CPU_THREADS"] = str(args.threads)
+
+    results = []
+    for profile in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+        print(f"Running profile '{profile}'...")
+        command = [
+            sys.executable, __file__, "--run-profile", profile,
+            "--repeat", str(args.repeat), "--batch-size", str(args.batch_size)
+        ]
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"⚠️  Profile '{profile}' failed:\n{completed.stderr[-2000:]}")
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    if not results:
+        sys.exit(1)
+
+    baseline_rtf = results[0]["real_time_factor"]
+    print()
+    print(f"{'profile':<16} {'model':<16} {'load':>8} {'RTF':>7} {'speedup':>8} {'peak RSS':>10}")
+    print("-" * 70)
+    for result in results:
+        print(
+            f"{result['profile']:<16} {result['model'].split('/')[-1]:<16} "
+            f"{result['load_seconds']:>7.1f}s {result['real_time_factor']:>7.2f} "
+            f"{baseline_rtf / result['real_time_factor']:>7.2f}x "
+            f"{result['peak_rss_bytes'] / (1024 * 1024):>8.0f}MB"
+        )
+    print(f"\nThreads per process: {results[0]['threads']}   (speedup is relative to '{results[0]['profile']}')")
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save}.json"
+        with open(path, "w") as f:
+            json.dump({
+                "name": args.save,
+                "created_at": datetime.utcnow().isoformat(),
+                "cpu_count": os.cpu_count(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Bark Cold Start Benchmark
+
+Compares how long a fresh worker process takes to get Bark into memory,
+and how much memory it holds privately, when weights come from the
+Hugging Face checkpoint versus the memory-mapped local snapshot
+(BARK_SNAPSHOT_ENABLED, see app/services/bark_snapshot.py).
+
+Several snapshot processes are started side by side to show page sharing:
+their PSS (proportional set size) and private memory stay small because
+the weights live once in the page cache.
+
+Usage:
+    python benchmarks/bench_bark_startup.py
+    python benchmarks/bench_bark_startup.py --processes 4 --profile small
+    python benchmarks/bench_bark_startup.py --save cpu-node-startup
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Setup path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings require a Gemini key even though nothing here calls Gemini
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def parse_args() -> argparse.Namespace:
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Measure Bark cold start with and without snapshots")
+    parser.add_argument("--profile", default="default", help="Bark CPU profile to load")
+    parser.add_argument("--processes", type=int, default=3, help="Snapshot processes loaded side by side")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--run", choices=["build", "load"], help=argparse.SUPPRESS)  # Child process mode
+    return parser.parse_args()
+
+
+def memory_usage() -> dict:
+    """RSS, PSS and private memory of this process in bytes (Linux)"""
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                field, _, value = line.partition(":")
+                if field in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    usage[field] = int(value.split()[0]) * 1024
+    except OSError:
+        return {}
+
+    return {
+        "rss_bytes": usage.get("Rss", 0),
+        "pss_bytes": usage.get("Pss", 0),
+        "private_bytes": usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0),
+    }
+
+
+def run_child(args: argparse.Namespace):
+    """Child process: build the snapshot, or load Bark and report once told to"""
+    from app.services.bark_profiles import load_bark
+
+    if args.run == "build":
+        load_bark(args.profile)  # Writes the snapshot if it is missing
+        return
+
+    start = time.perf_counter()
+    model, _, _ = load_bark(args.profile)
+    load_seconds = time.perf_counter() - start
+
+    # Touch every weight once, as the first generation would
+    checksum = sum(float(p.float().abs().sum()) for p in model.parameters())
+
+    print("ready", flush=True)
+    sys.stdin.readline()  # Wait until every sibling has loaded, then measure together
+
+    print(json.dumps({"load_seconds": load_seconds, "checksum": checksum, **memory_usage()}), flush=True)
+
+
+def run_group(args: argparse.Namespace, snapshot: bool, processes: int) -> list:
+    """Start processes that load Bark together and collect their reports"""
+    env = dict(os.environ, BARK_USE_GPU="False", BARK_SNAPSHOT_ENABLED=str(snapshot))
+    command = [sys.executable, __file__, "--run", "load", "--profile", args.profile]
+
+    children = [
+        subprocess.Popen(command, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(processes)
+    ]
+
+    for child in children:
+        if child.stdout.readline().strip() != "ready":
+            raise RuntimeError("Bark failed to load in a child process")
+
+    results = []
+    for child in children:
+        child.stdin.write("measure\n")
+        child.stdin.flush()
+    for child in children:
+        results.append(json.loads(child.stdout.readline()))
+        child.wait()
+
+    return results
+
+
+def summarize(name: str, results: list) -> dict:
+    """Median load time and memory of a group"""
+    summary = {"mode": name, "processes": len(results)}
+    for field in ("load_seconds", "rss_bytes", "pss_bytes", "private_bytes"):
+        values = [r[field] for r in results if field in r]
+        if values:
+            summary[field] = statistics.median(values)
+    return summary
+
+
+def main():
+    """Benchmark checkpoint and snapshot loading"""
+    args = parse_args()
+
+    if args.run:
+        run_child(args)
+        return
+
+    print("🦜 BARK COLD START BENCHMARK")
+    print("=" * 60)
+
+    print("Building snapshot (if missing)...")
+    env = dict(os.environ, BARK_USE_GPU="False", BARK_SNAPSHOT_ENABLED="True")
+    subprocess.run([sys.executable, __file__, "--run", "build", "--profile", args.profile], env=env, check=True)
+
+    # The page cache stays warm between runs, as it is on a worker host
+    print("Loading from the checkpoint...")
+    summaries = [summarize("checkpoint", run_group(args, snapshot=False, processes=1))]
+
+    print("Loading from the snapshot (first process)...")
+    summaries.append(summarize("snapshot", run_group(args, snapshot=True, processes=1)))
+
+    print(f"Loading from the snapshot ({args.processes} processes side by side)...")
+    summaries.append(summarize(f"snapshot x{args.processes}", run_group(args, snapshot=True, processes=args.processes)))
+
+    mb = 1024 * 1024
+    print()
+    print(f"{'mode':<16} {'load':>8} {'RSS':>10} {'PSS':>10} {'private':>10}")
+    print("-" * 58)
+    for summary in summaries:
+        print(
+            f"{summary['mode']:<16} {summary['load_seconds']:>7.2f}s "
+            f"{summary.get('rss_bytes', 0) / mb:>8.0f}MB {summary.get('pss_bytes', 0) / mb:>8.0f}MB "
+            f"{summary.get('private_bytes', 0) / mb:>8.0f}MB"
+        )
+    print(f"\nProfile: {args.profile}   (medians per process)")
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save}.json"
+        with open(path, "w") as f:
+            json.dump({
+                "name": args.save,
+                "created_at": datetime.utcnow().isoformat(),
+                "profile": args.profile,
+                "results": summaries,
+            }, f, indent=2)
+        print(f"\n💾 Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
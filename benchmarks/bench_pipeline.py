@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+
+Runs the real song generation pipeline (eager Celery, no Redis or MongoDB)
+against local fakes of Gemini and ElevenLabs with configurable latency,
+and reports per-stage and total wall time, CPU time and peak memory.
+Results can be saved as a JSON baseline and compared against a previous
+baseline to catch regressions between commits.
+
+Usage:
+    python benchmarks/bench_pipeline.py --words small --repeat 3 --save main
+    python benchmarks/bench_pipeline.py --words small --repeat 3 --compare benchmarks/baselines/main.json
+    python benchmarks/bench_pipeline.py --words cat,sun --mode stream --tts-latency 0.8
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Setup path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+WORD_SETS = {
+    "smoke": ["cat"],
+    "small": ["cat", "sun", "star"],
+    "medium": ["cat", "dog", "sun", "star", "tree", "fish", "moon", "ball"],
+}
+
+MODES = ["in-memory", "files", "stream", "staged"]
+
+# Changes smaller than this are noise, whatever the percentage
+NOISE_FLOOR_SECONDS = 0.02
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the song generation pipeline")
+    parser.add_argument("--words", default="small",
+                        help=f"Word set ({', '.join(WORD_SETS)}) or comma-separated words")
+    parser.add_argument("--mode", choices=MODES, default="in-memory", help="Pipeline variant to run")
+    parser.add_argument("--repeat", type=int, default=1, help="Measured runs per word")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs before measuring (service start-up)")
+    parser.add_argument("--gemini-latency", type=float, default=1.5, help="Seconds per Gemini request")
+    parser.add_argument("--tts-latency", type=float, default=0.5, help="Fixed seconds per TTS request")
+    parser.add_argument("--tts-latency-per-char", type=float, default=0.004, help="Extra TTS seconds per character")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative random latency variation")
+    parser.add_argument("--custom-music", action="store_true",
+                        help="Use tracks from background_music/ instead of generated beats")
+    parser.add_argument("--admission", action="store_true",
+                        help="Keep admission control enabled (needs Redis)")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown of a median that counts as a regression")
+    parser.add_argument("--keep-outputs", action="store_true", help="Keep generated songs in the work directory")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline logs")
+    return parser.parse_args()
+
+
+def resolve_words(spec: str) -> list:
+    """Word set name or comma-separated list"""
+    if spec in WORD_SETS:
+        return WORD_SETS[spec]
+    return [word.strip().lower() for word in spec.split(",") if word.strip()]
+
+
+def configure_environment(args: argparse.Namespace, workdir: Path):
+    """
+    Point the app at local fakes and throwaway directories
+
+    Must run before anything under app/ is imported: settings are read
+    from the environment on import.
+    """
+    for name in ("outputs", "temp"):
+        (workdir / name).mkdir(parents=True, exist_ok=True)
+
+    os.environ.update({
+        "GEMINI_API_KEY": "benchmark",
+        "ELEVENLABS_API_KEY": "benchmark",
+        "TTS_PROVIDER": "elevenlabs",
+        "TTS_FALLBACK_TO_BARK": "False",
+        "OUTPUT_DIR": str(workdir / "outputs"),
+        "TEMP_DIR": str(workdir / "temp"),
+        "USE_CUSTOM_BACKGROUND_MUSIC": str(args.custom_music),
+        "PIPELINE_MODE": "staged" if args.mode == "staged" else "monolithic",
+        "IN_MEMORY_PIPELINE": str(args.mode != "files"),
+        "ADMISSION_CONTROL_ENABLED": str(args.admission),
+        "CHECKPOINTS_ENABLED": "False",
+        "JOB_MAX_RETRIES": "0",
+        "WORKER_WARM_START": "False",
+        "CACHE_WARMING_ENABLED": "False",
+    })
+
+
+def install_fakes(args: argparse.Namespace):
+    """
+    Replace the Gemini and ElevenLabs clients and run Celery eagerly
+
+    Returns:
+        Tuple of (celery app, submit function, fake TTS namespace for request counts)
+    """
+    from benchmarks.fakes import FakeGenAI, LatencyModel, fake_elevenlabs_class
+    from app.services import lyrics_service, vocal_service
+
+    gemini_latency = LatencyModel(args.gemini_latency, jitter=args.jitter, seed=1)
+    tts_latency = LatencyModel(args.tts_latency, args.tts_latency_per_char, jitter=args.jitter, seed=2)
+
+    lyrics_service.genai = FakeGenAI(gemini_latency)
+    fake_client = fake_elevenlabs_class(tts_latency)
+    vocal_service.ElevenLabs = fake_client
+    vocal_service.ELEVENLABS_AVAILABLE = True
+
+    from app.tasks import celery_app, submit_song_generation
+
+    celery_app.conf.update(
+        task_always_eager=True,
+        task_eager_propagates=True,
+        task_store_eager_result=True,
+        # Progress updates and results stay in this process
+        result_backend="cache+memory://",
+    )
+
+    return celery_app, submit_song_generation, fake_client.text_to_speech, {
+        "gemini": gemini_latency.describe(),
+        "tts": tts_latency.describe(),
+    }
+
+
+def run_once(celery_app, submit, word: str, stream: bool) -> dict:
+    """
+    Generate one song and collect its measurements
+
+    Returns:
+        Dictionary with word, wall/CPU totals and the job's stage metrics
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    job_id = submit(word, stream=stream)
+    result = celery_app.AsyncResult(job_id).get(propagate=True)
+
+    job_metrics = result.get("metrics", {})
+    return {
+        "word": word,
+        "wall_seconds": time.perf_counter() - wall_start,
+        "process_cpu_seconds": time.process_time() - cpu_start,
+        "peak_rss_bytes": job_metrics.get("peak_rss_bytes"),
+        "duration": result.get("duration"),
+        "stages": job_metrics.get("stages", {}),
+        "counters": job_metrics.get("counters", {}),
+    }
+
+
+def describe(values: list) -> dict:
+    """Median, mean, p95, min and max of a list of numbers"""
+    ordered = sorted(values)
+    return {
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def summarize(runs: list) -> dict:
+    """Aggregate measured runs per stage and in total"""
+    stage_names = sorted({name for run in runs for name in run["stages"]})
+
+    stages = {}
+    for name in stage_names:
+        entries = [run["stages"][name] for run in runs if name in run["stages"]]
+        stages[name] = {
+            "wall_seconds": describe([entry["wall_seconds"] for entry in entries]),
+            "cpu_seconds": describe([entry["cpu_seconds"] for entry in entries]),
+        }
+
+    return {
+        "runs": len(runs),
+        "total": {
+            "wall_seconds": describe([run["wall_seconds"] for run in runs]),
+            "process_cpu_seconds": describe([run["process_cpu_seconds"] for run in runs]),
+        },
+        "stages": stages,
+        "peak_rss_bytes": max((run["peak_rss_bytes"] or 0) for run in runs),
+    }
+
+
+def print_summary(summary: dict):
+    """Table of median/p95 wall and median CPU per stage"""
+    print()
+    print(f"{'stage':<20} {'wall med':>10} {'wall p95':>10} {'cpu med':>10}")
+    print("-" * 53)
+    for name, stage in summary["stages"].items():
+        print(
+            f"{name:<20} {stage['wall_seconds']['median']:>9.3f}s "
+            f"{stage['wall_seconds']['p95']:>9.3f}s {stage['cpu_seconds']['median']:>9.3f}s"
+        )
+    print("-" * 53)
+    total = summary["total"]
+    print(
+        f"{'total':<20} {total['wall_seconds']['median']:>9.3f}s "
+        f"{total['wall_seconds']['p95']:>9.3f}s {total['process_cpu_seconds']['median']:>9.3f}s"
+    )
+    print(f"Peak RSS: {summary['peak_rss_bytes'] / (1024 * 1024):.1f} MB over {summary['runs']} runs")
+
+
+def compare(summary: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare medians with a baseline
+
+    Returns:
+        Names of stages (or 'total') that got slower than the threshold allows
+    """
+    print()
+    print(f"Compared with baseline '{baseline.get('name')}' ({baseline.get('git_commit') or 'unknown commit'}):")
+
+    current = {name: stage["wall_seconds"]["median"] for name, stage in summary["stages"].items()}
+    current["total"] = summary["total"]["wall_seconds"]["median"]
+    previous = {name: stage["wall_seconds"]["median"] for name, stage in baseline["summary"]["stages"].items()}
+    previous["total"] = baseline["summary"]["total"]["wall_seconds"]["median"]
+
+    regressions = []
+    for name in sorted(set(current) | set(previous)):
+        if name not in current or name not in previous:
+            print(f"  {name:<20} {'only in ' + ('baseline' if name in previous else 'this run'):>30}")
+            continue
+
+        delta = current[name] - previous[name]
+        change = delta / previous[name] if previous[name] else 0.0
+        regressed = change > threshold and delta > NOISE_FLOOR_SECONDS
+        if regressed:
+            regressions.append(name)
+
+        marker = "  REGRESSION" if regressed else ""
+        print(f"  {name:<20} {previous[name]:>8.3f}s -> {current[name]:>8.3f}s ({change:+.1%}){marker}")
+
+    return regressions
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit (None outside a git checkout)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def main():
+    """Run the benchmark, print results and save/compare baselines"""
+    args = parse_args()
+    words = resolve_words(args.words)
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.INFO)
+
+    print("⏱️  PIRATE KARAOKE PIPELINE BENCHMARK")
+    print("=" * 60)
+    print(f"Mode: {args.mode}   Words: {', '.join(words)}   Runs per word: {args.repeat}")
+
+    with tempfile.TemporaryDirectory(prefix="karaoke-bench-") as tmp:
+        workdir = Path(tmp)
+        configure_environment(args, workdir)
+        celery_app, submit, text_to_speech, latencies = install_fakes(args)
+        stream = args.mode == "stream"
+
+        for i in range(args.warmup):
+            print(f"Warm-up run {i + 1}/{args.warmup} ('{words[0]}')...")
+            run_once(celery_app, submit, words[0], stream)
+
+        requests_before = text_to_speech.requests
+        runs = []
+        for repeat in range(args.repeat):
+            for word in words:
+                run = run_once(celery_app, submit, word, stream)
+                runs.append(run)
+                print(f"  [{repeat + 1}/{args.repeat}] {word:<12} {run['wall_seconds']:.3f}s wall")
+
+        if args.keep_outputs:
+            kept = Path(tempfile.mkdtemp(prefix="karaoke-bench-outputs-"))
+            os.replace(workdir / "outputs", kept / "outputs")
+            print(f"Generated songs kept in {kept / 'outputs'}")
+
+    summary = summarize(runs)
+    summary["tts_requests"] = text_to_speech.requests - requests_before
+    print_summary(summary)
+
+    report = {
+        "name": args.save,
+        "created_at": datetime.utcnow().isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {
+            "mode": args.mode,
+            "words": words,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "custom_music": args.custom_music,
+            "latency": latencies,
+        },
+        "summary": summary,
+        "runs": runs,
+    }
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save}.json"
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline saved to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("config", {}).get("mode") != args.mode or baseline.get("config", {}).get("words") != words:
+            print("⚠️  WARNING: baseline was recorded with a different mode or word set")
+        regressions = compare(summary, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Slower than baseline: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
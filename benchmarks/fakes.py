@@ -0,0 +1,282 @@
+"""
+Local stand-ins for Gemini and ElevenLabs used by the pipeline benchmarks
+
+The fakes replace only the network clients. LyricsGenerator and
+VocalGenerator run unchanged on top of them, so prompt building, lyric
+cleanup, MP3 decoding and vocal enhancement are all part of the measurement.
+"""
+import io
+import json
+import logging
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterator, Optional
+import numpy as np
+from pydub import AudioSegment
+
+logger = logging.getLogger(__name__)
+
+# Roughly how long a sung character lasts, used to size synthetic vocals
+SECONDS_PER_CHARACTER = 0.065
+
+# Lines the fake Gemini model builds its songs from ({word} is substituted)
+SONG_LINES = [
+    "The little {word} is soft and sweet,",
+    "We love the {word} we like to meet,",
+    "A happy {word} can play all day,",
+    "It smiles and sings along the way,",
+    "Oh {word}, oh {word}, so nice and kind,",
+    "The best {word} you could ever find.",
+]
+
+
+class LatencyModel:
+    """
+    Injected latency of a fake remote service
+
+    Each call sleeps base_seconds + per_character_seconds * characters,
+    scaled by a random factor in [1 - jitter, 1 + jitter]. The random
+    generator is seeded so repeated benchmark runs sleep the same amounts.
+    """
+
+    def __init__(
+        self,
+        base_seconds: float = 0.0,
+        per_character_seconds: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Configure latency
+
+        Args:
+            base_seconds: Fixed latency per call
+            per_character_seconds: Extra latency per input character
+            jitter: Relative random variation (0.1 = +/-10%)
+            seed: Random seed
+        """
+        self.base_seconds = base_seconds
+        self.per_character_seconds = per_character_seconds
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self, characters: int = 0):
+        """
+        Sleep for one call
+
+        Args:
+            characters: Size of the request in characters
+        """
+        delay = self.base_seconds + self.per_character_seconds * characters
+        if self.jitter:
+            with self._lock:
+                delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def describe(self) -> Dict[str, float]:
+        """Settings recorded in benchmark baselines"""
+        return {
+            'base_seconds': self.base_seconds,
+            'per_character_seconds': self.per_character_seconds,
+            'jitter': self.jitter,
+        }
+
+
+# ===== Gemini =====
+
+class FakeGeminiResponse:
+    """Mimics the .text of a google.generativeai response"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Deterministic replacement for genai.GenerativeModel"""
+
+    def __init__(self, model_name: str, latency: LatencyModel):
+        self.model_name = model_name
+        self.latency = latency
+
+    def generate_content(self, prompt: str, generation_config: Optional[dict] = None) -> FakeGeminiResponse:
+        """
+        Answer a single-song or batch prompt
+
+        Args:
+            prompt: Prompt built by LyricsGenerator
+            generation_config: JSON mode is honoured for batch prompts
+
+        Returns:
+            Response with lyrics (or a JSON object of lyrics per word)
+        """
+        self.latency.wait(len(prompt))
+
+        if generation_config and generation_config.get("response_mime_type") == "application/json":
+            words = re.findall(r"^- (\w+) \(", prompt, flags=re.MULTILINE)
+            return FakeGeminiResponse(json.dumps({word: _song_about(word) for word in words}))
+
+        match = re.search(r"TOPIC: (\w+)", prompt)
+        return FakeGeminiResponse(_song_about(match.group(1) if match else "friend"))
+
+
+class FakeGenAI:
+    """Stand-in for the google.generativeai module used by LyricsGenerator"""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def configure(self, **kwargs):
+        """API keys are not needed"""
+
+    def GenerativeModel(self, model_name: str) -> FakeGenerativeModel:
+        return FakeGenerativeModel(model_name, self.latency)
+
+
+def _song_about(word: str) -> str:
+    """Five gentle lines about a word (the same word always gets the same song)"""
+    rng = random.Random(word)
+    lines = rng.sample(SONG_LINES, 5)
+    return "\n".join(line.format(word=word) for line in lines)
+
+
+# ===== ElevenLabs =====
+
+class SyntheticVocals:
+    """
+    Deterministic voice-like audio used as the TTS response
+
+    A harmonic tone with vibrato, a syllable-rate envelope and a little
+    breath noise, so BPM detection, mixing and encoding see realistic
+    material. Responses are cached per duration and output format.
+    """
+
+    def __init__(self, sample_rate: int = 44100, chunk_size: int = 4096):
+        """
+        Configure fixture audio
+
+        Args:
+            sample_rate: Sample rate of the generated vocals
+            chunk_size: Size of the byte chunks the fake client streams
+        """
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self._cache: Dict[tuple, bytes] = {}
+        self._lock = threading.Lock()
+
+    def audio_for_text(self, text: str, output_format: str = "mp3_44100_128") -> bytes:
+        """
+        Response bytes sized to how long the text takes to sing
+
+        Args:
+            text: Text sent to TTS
+            output_format: ElevenLabs output format ("pcm_<rate>" or an MP3 format)
+
+        Returns:
+            Raw 16-bit PCM for pcm_* formats, MP3 otherwise
+        """
+        duration = round(max(len(text) * SECONDS_PER_CHARACTER, 1.0), 1)
+        key = (duration, output_format)
+
+        with self._lock:
+            data = self._cache.get(key)
+            if data is None:
+                if output_format.startswith("pcm_"):
+                    rate = int(output_format.split("_")[1])
+                    data = (self.render(duration, rate) * 32767).astype('<i2').tobytes()
+                else:
+                    data = self._encode(self.render(duration))
+                self._cache[key] = data
+        return data
+
+    def render(self, duration: float, sample_rate: Optional[int] = None) -> np.ndarray:
+        """
+        Render mono float samples
+
+        Args:
+            duration: Length in seconds
+            sample_rate: Sample rate (defaults to the fixture's)
+
+        Returns:
+            float32 samples in [-1, 1]
+        """
+        sample_rate = sample_rate or self.sample_rate
+        t = np.arange(int(duration * sample_rate)) / sample_rate
+        rng = np.random.default_rng(int(duration * 10))
+
+        pitch = 220.0 * (1 + 0.01 * np.sin(2 * np.pi * 5.5 * t))  # vibrato
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+
+        syllables = 0.5 * (1 - np.cos(2 * np.pi * 3.5 * t))  # ~3.5 syllables/s
+        breath = 0.02 * rng.standard_normal(len(t))
+
+        samples = 0.3 * voice * syllables + breath
+        return np.clip(samples, -1.0, 1.0).astype(np.float32)
+
+    def _encode(self, samples: np.ndarray) -> bytes:
+        """Encode samples as MP3 like the ElevenLabs API returns them"""
+        segment = AudioSegment(
+            data=(samples * 32767).astype('<i2').tobytes(),
+            sample_width=2,
+            frame_rate=self.sample_rate,
+            channels=1
+        )
+        buffer = io.BytesIO()
+        segment.export(buffer, format="mp3", bitrate="128k")
+        return buffer.getvalue()
+
+    def stream(self, data: bytes) -> Iterator[bytes]:
+        """Split bytes into chunks like the SDK's streaming response"""
+        for start in range(0, len(data), self.chunk_size):
+            yield data[start:start + self.chunk_size]
+
+
+class FakeTextToSpeech:
+    """The client.text_to_speech namespace"""
+
+    def __init__(self, latency: LatencyModel, vocals: SyntheticVocals):
+        self.latency = latency
+        self.vocals = vocals
+        self.requests = 0
+        self.characters = 0
+
+    def convert(self, text: str, output_format: str = "mp3_44100_128", **kwargs) -> Iterator[bytes]:
+        """
+        Synthesize text
+
+        Args:
+            text: Text to speak
+            output_format: ElevenLabs output format (other SDK arguments are ignored)
+
+        Returns:
+            Iterator of audio byte chunks
+        """
+        self.requests += 1
+        self.characters += len(text)
+        self.latency.wait(len(text))
+        return self.vocals.stream(self.vocals.audio_for_text(text, output_format))
+
+
+def fake_elevenlabs_class(latency: LatencyModel, vocals: Optional[SyntheticVocals] = None):
+    """
+    Build a drop-in replacement for elevenlabs.client.ElevenLabs
+
+    Args:
+        latency: Latency injected into every TTS request
+        vocals: Fixture audio (a default SyntheticVocals if omitted)
+
+    Returns:
+        Class whose instances share one FakeTextToSpeech (so request counts add up)
+    """
+    text_to_speech = FakeTextToSpeech(latency, vocals or SyntheticVocals())
+
+    class FakeElevenLabs:
+        def __init__(self, api_key: Optional[str] = None, **kwargs):
+            self.text_to_speech = text_to_speech
+
+    FakeElevenLabs.text_to_speech = text_to_speech
+    return FakeElevenLabs
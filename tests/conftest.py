@@ -0,0 +1,34 @@
+"""
+Shared fixtures: settings for tests and in-memory Redis (fakeredis with Lua)
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Setup path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings require a Gemini key even though no test calls Gemini
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import fakeredis
+
+
+@pytest.fixture
+def redis_server():
+    """One in-memory Redis server shared by the sync and async clients of a test"""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def sync_redis(redis_server):
+    """Synchronous client, as Celery workers use"""
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+
+
+@pytest.fixture
+def async_redis(redis_server):
+    """Async client, as the API uses"""
+    return fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True)
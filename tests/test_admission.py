@@ -0,0 +1,144 @@
+"""
+Tests for Redis admission control (slots, FIFO queue, leases)
+"""
+import pytest
+
+from app import admission
+from app.admission import (
+    INFLIGHT_KEY,
+    PAYLOAD_KEY,
+    QUEUE_KEY,
+    AdmissionController,
+    QueueFullError,
+    acquire_slot,
+    release_slot,
+)
+from app.config import settings
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch, sync_redis):
+    """Two slots, two queue places; worker helpers use the test's Redis"""
+    monkeypatch.setattr(settings, "ADMISSION_CONTROL_ENABLED", True)
+    monkeypatch.setattr(settings, "MAX_CONCURRENT_JOBS", 2)
+    monkeypatch.setattr(settings, "MAX_QUEUE_DEPTH", 2)
+    monkeypatch.setattr(settings, "ADMISSION_LEASE_SECONDS", 900)
+    monkeypatch.setattr(settings, "ADMISSION_DEFAULT_JOB_SECONDS", 60.0)
+    monkeypatch.setattr(admission, "get_sync_redis", lambda: sync_redis)
+
+
+async def fill_slots(controller: AdmissionController):
+    for job_id in ("job-1", "job-2"):
+        assert (await controller.admit(job_id, {"kind": "song", "word": job_id})).admitted
+
+
+@pytest.mark.asyncio
+async def test_admits_up_to_the_limit_then_queues_in_order(async_redis):
+    controller = AdmissionController(async_redis)
+    await fill_slots(controller)
+
+    third = await controller.admit("job-3", {"kind": "song", "word": "three"})
+    fourth = await controller.admit("job-4", {"kind": "song", "word": "four"})
+
+    assert not third.admitted and third.position == 0
+    assert not fourth.admitted and fourth.position == 1
+    assert third.eta_seconds == 60.0
+    assert (await controller.position("job-4")).position == 1
+    assert await controller.position("job-1") is None
+
+
+@pytest.mark.asyncio
+async def test_rejects_beyond_queue_depth(async_redis):
+    controller = AdmissionController(async_redis)
+    await fill_slots(controller)
+    await controller.admit("job-3", {})
+    await controller.admit("job-4", {})
+
+    with pytest.raises(QueueFullError) as error:
+        await controller.admit("job-5", {})
+
+    assert error.value.retry_after >= 1
+    assert await async_redis.zcard(QUEUE_KEY) == 2
+
+
+@pytest.mark.asyncio
+async def test_release_hands_the_slot_to_the_queue_head(async_redis):
+    controller = AdmissionController(async_redis)
+    await fill_slots(controller)
+    await controller.admit("job-3", {"kind": "song", "word": "three"})
+    await controller.admit("job-4", {"kind": "song", "word": "four"})
+
+    admitted = release_slot("job-1", elapsed_seconds=30.0)
+
+    assert admitted == [("job-3", {"kind": "song", "word": "three"})]
+    assert await async_redis.zscore(INFLIGHT_KEY, "job-3") is not None
+    assert await async_redis.hget(PAYLOAD_KEY, "job-3") is None
+    assert (await controller.position("job-4")).position == 0
+    # The finished job's time is folded into the ETA average
+    assert await controller.average_job_seconds() == 30.0
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_free_their_slots(async_redis, monkeypatch):
+    controller = AdmissionController(async_redis)
+    monkeypatch.setattr(settings, "ADMISSION_LEASE_SECONDS", -1)  # Workers that died at once
+    await fill_slots(controller)
+    monkeypatch.setattr(settings, "ADMISSION_LEASE_SECONDS", 900)
+
+    assert (await controller.admit("job-3", {})).admitted
+
+
+@pytest.mark.asyncio
+async def test_next_admitted_moves_queued_jobs_into_free_slots(async_redis):
+    controller = AdmissionController(async_redis)
+    await fill_slots(controller)
+    await controller.admit("job-3", {"kind": "batch", "jobs": {"cat": "job-3a"}})
+
+    assert await controller.next_admitted() == []
+
+    await async_redis.zrem(INFLIGHT_KEY, "job-1")  # Slot freed without a hand-over
+    assert await controller.next_admitted() == [("job-3", {"kind": "batch", "jobs": {"cat": "job-3a"}})]
+    assert await controller.position("job-3") is None
+
+
+@pytest.mark.asyncio
+async def test_cancel_gives_back_slot_and_queue_place(async_redis):
+    controller = AdmissionController(async_redis)
+    await fill_slots(controller)
+    await controller.admit("job-3", {})
+
+    await controller.cancel("job-1")
+    await controller.cancel("job-3")
+
+    assert await async_redis.zcard(INFLIGHT_KEY) == 1
+    assert await async_redis.zcard(QUEUE_KEY) == 0
+    assert (await controller.admit("job-4", {})).admitted
+
+
+@pytest.mark.asyncio
+async def test_background_work_yields_to_waiting_user_jobs(async_redis):
+    controller = AdmissionController(async_redis)
+
+    assert acquire_slot("warm-1")
+    assert (await controller.admit("job-1", {})).admitted
+    assert not acquire_slot("warm-2")  # Every slot taken
+
+    await controller.admit("job-2", {})  # Waits for a slot
+    release_slot("warm-1")  # Hands the slot to job-2
+    await controller.admit("job-3", {})
+    await async_redis.zrem(INFLIGHT_KEY, "job-1")  # Slot free, job-3 not yet moved in
+
+    assert not acquire_slot("warm-2")
+    assert await controller.next_admitted() == [("job-3", {})]
+
+
+@pytest.mark.asyncio
+async def test_disabled_admits_everything(async_redis, monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_CONTROL_ENABLED", False)
+    controller = AdmissionController(async_redis)
+
+    for i in range(5):
+        assert (await controller.admit(f"job-{i}", {})).admitted
+    assert acquire_slot("warm-1")
+    assert release_slot("job-0") == []
+    assert await async_redis.zcard(INFLIGHT_KEY) == 0
@@ -0,0 +1,98 @@
+"""
+Tests for per-job stage checkpoints
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from app.checkpoints import LYRICS, TIMINGS, VOCALS, CheckpointStore, cleanup_checkpoints
+from app.config import settings
+from app.services.audio_buffer import AudioBuffer
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CHECKPOINTS_ENABLED", True)
+    monkeypatch.setattr(settings, "TEMP_DIR", tmp_path)
+
+
+def test_retry_resumes_from_saved_stages(tmp_path):
+    first = CheckpointStore("job-1", "ship", root=tmp_path)
+    first.save_json(LYRICS, {"lyrics": "Yo ho"})
+
+    retry = CheckpointStore("job-1", "ship", root=tmp_path)
+
+    assert retry.has(LYRICS)
+    assert not retry.has(VOCALS)
+    assert retry.load_json(LYRICS) == {"lyrics": "Yo ho"}
+    assert retry.load_json(TIMINGS) is None
+    assert retry.completed_stages() == [LYRICS]
+
+
+def test_audio_round_trip(tmp_path):
+    samples = np.linspace(-0.5, 0.5, 2400, dtype=np.float32)
+    store = CheckpointStore("job-1", "ship", root=tmp_path)
+
+    path = store.save_audio(VOCALS, AudioBuffer(samples, 24000))
+
+    assert path == str(store.audio_path(VOCALS))
+    assert store.completed_stages() == [VOCALS]  # No temporary files left behind
+    audio = CheckpointStore("job-1", "ship", root=tmp_path).load_audio(VOCALS)
+    assert audio.sample_rate == 24000
+    np.testing.assert_allclose(audio.samples[:, 0], samples, atol=1e-4)
+
+
+def test_checkpoints_of_another_word_are_discarded(tmp_path):
+    CheckpointStore("job-1", "ship", root=tmp_path).save_json(LYRICS, {"lyrics": "Yo ho"})
+
+    reused = CheckpointStore("job-1", "anchor", root=tmp_path)
+
+    assert reused.completed_stages() == []
+    assert reused.load_json(LYRICS) is None
+    manifest = json.loads((tmp_path / "job-1" / CheckpointStore.MANIFEST).read_text())
+    assert manifest == {"job_id": "job-1", "word": "anchor"}
+
+
+def test_corrupt_checkpoints_count_as_missing(tmp_path):
+    store = CheckpointStore("job-1", "ship", root=tmp_path)
+    (store.directory / f"{LYRICS}.json").write_text("{not json")
+    store.audio_path(VOCALS).write_bytes(b"not audio")
+
+    assert store.load_json(LYRICS) is None
+    assert store.load_audio(VOCALS) is None
+
+
+def test_clear_removes_the_job(tmp_path):
+    store = CheckpointStore("job-1", "ship", root=tmp_path)
+    store.save_json(LYRICS, {})
+
+    store.clear()
+
+    assert not store.directory.exists()
+    assert store.completed_stages() == []
+
+
+def test_disabled_stores_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHECKPOINTS_ENABLED", False)
+    store = CheckpointStore("job-1", "ship", root=tmp_path)
+
+    store.save_json(LYRICS, {"lyrics": "Yo ho"})
+
+    assert store.save_audio(VOCALS, AudioBuffer(np.zeros(10), 24000)) is None
+    assert store.load_json(LYRICS) is None
+    assert not store.has(LYRICS)
+    assert not (tmp_path / "job-1").exists()
+
+
+def test_cleanup_drops_only_stale_jobs():
+    stale = CheckpointStore("job-old", "ship")
+    fresh = CheckpointStore("job-new", "anchor")
+    old = time.time() - 2 * 3600
+    os.utime(stale.directory, (old, old))
+
+    assert cleanup_checkpoints(max_age_seconds=3600) == 1
+    assert not stale.directory.exists()
+    assert fresh.directory.exists()
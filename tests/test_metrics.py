@@ -0,0 +1,108 @@
+"""
+Tests for per-job metrics and their Prometheus rendering
+"""
+import pytest
+
+from app import metrics
+from app.metrics import JobMetrics, MetricsRegistry
+
+
+def summary(total=3.0, stages=None, counters=None, peak_rss_bytes=1000):
+    return {
+        "stages": stages or {},
+        "counters": counters or {},
+        "total_seconds": total,
+        "peak_rss_bytes": peak_rss_bytes,
+    }
+
+
+def test_stage_and_counter_helpers_follow_the_tracked_job():
+    metrics.count(metrics.TTS_CHARACTERS, 5)  # No job tracked: ignored
+
+    with metrics.track_job() as job:
+        with metrics.stage_timer("lyrics"):
+            pass
+        with metrics.stage_timer("lyrics"):
+            pass
+        metrics.count(metrics.TTS_CHARACTERS, 12)
+
+    result = job.to_dict()
+    assert set(result["stages"]) == {"lyrics"}
+    assert result["counters"] == {metrics.TTS_CHARACTERS: 12}
+    assert metrics.current_metrics() is None
+
+
+def test_merge_folds_in_an_earlier_stage():
+    earlier = summary(total=10.0, stages={"lyrics": {"wall_seconds": 2.0, "cpu_seconds": 0.5}}, counters={"tts_characters": 4})
+    job = JobMetrics()
+    job.count("tts_characters", 6)
+
+    job.merge(earlier)
+
+    result = job.to_dict()
+    assert result["stages"]["lyrics"] == {"wall_seconds": 2.0, "cpu_seconds": 0.5}
+    assert result["counters"] == {"tts_characters": 10}
+    assert result["total_seconds"] >= 10.0
+
+
+@pytest.mark.asyncio
+async def test_histograms_are_cumulative(sync_redis, async_redis):
+    registry = MetricsRegistry()
+    registry.observe_job(sync_redis, summary(total=0.3))
+    registry.observe_job(sync_redis, summary(total=45.0))
+
+    text = await registry.render(async_redis)
+
+    assert "# TYPE song_job_duration_seconds histogram" in text
+    assert 'song_job_duration_seconds_bucket{status="completed",le="0.25"} 0' in text
+    assert 'song_job_duration_seconds_bucket{status="completed",le="0.5"} 1' in text
+    assert 'song_job_duration_seconds_bucket{status="completed",le="60.0"} 2' in text
+    assert 'song_job_duration_seconds_bucket{status="completed",le="+Inf"} 2' in text
+    assert 'song_job_duration_seconds_count{status="completed"} 2' in text
+    assert 'song_job_duration_seconds_sum{status="completed"} 45.3' in text
+
+
+@pytest.mark.asyncio
+async def test_stages_counters_and_job_status(sync_redis, async_redis):
+    registry = MetricsRegistry()
+    registry.observe_job(sync_redis, summary(
+        stages={"vocals": {"wall_seconds": 4.0, "cpu_seconds": 1.0}},
+        counters={"tts_characters": 120},
+    ))
+    registry.observe_job(sync_redis, None, status="failed")
+
+    text = await registry.render(async_redis)
+
+    assert 'song_stage_duration_seconds_count{stage="vocals"} 1' in text
+    assert 'song_stage_cpu_seconds_bucket{stage="vocals",le="1.0"} 1' in text
+    assert "# TYPE song_tts_characters_total counter" in text
+    assert "song_tts_characters_total 120" in text
+    assert 'song_jobs_total{status="completed"} 1' in text
+    assert 'song_jobs_total{status="failed"} 1' in text
+    assert text.count("# TYPE song_jobs_total counter") == 1
+
+
+@pytest.mark.asyncio
+async def test_peak_rss_keeps_the_largest_report(sync_redis, async_redis):
+    registry = MetricsRegistry()
+    registry.observe_job(sync_redis, summary(peak_rss_bytes=5000))
+    registry.observe_job(sync_redis, summary(peak_rss_bytes=2000))
+
+    text = await registry.render(async_redis)
+
+    assert "song_worker_peak_rss_bytes 5000" in text
+
+
+@pytest.mark.asyncio
+async def test_empty_registry_renders_a_zero_gauge(async_redis):
+    text = await MetricsRegistry().render(async_redis)
+
+    assert text == "# TYPE song_worker_peak_rss_bytes gauge\nsong_worker_peak_rss_bytes 0\n"
+
+
+def test_observe_job_never_raises():
+    class BrokenRedis:
+        def pipeline(self, transaction=True):
+            raise ConnectionError("redis is down")
+
+    MetricsRegistry().observe_job(BrokenRedis(), summary())
@@ -0,0 +1,94 @@
+"""
+Tests for single-flight ownership of song generation per word
+"""
+import pytest
+
+from app.config import settings
+from app.single_flight import SongSingleFlight, WorkerSingleFlight
+
+KEY = f"{SongSingleFlight.KEY_PREFIX}ship"
+
+
+@pytest.mark.asyncio
+async def test_first_claim_owns_and_later_claims_attach(async_redis):
+    single_flight = SongSingleFlight(async_redis)
+
+    assert await single_flight.claim("ship", "job-1") is None
+    assert await single_flight.claim("ship", "job-2") == "job-1"
+    assert await single_flight.claim("anchor", "job-3") is None
+
+
+@pytest.mark.asyncio
+async def test_release_only_by_owner(async_redis):
+    single_flight = SongSingleFlight(async_redis)
+    await single_flight.claim("ship", "job-1")
+
+    await single_flight.release("ship", "job-2")
+    assert await async_redis.get(KEY) == "job-1"
+
+    await single_flight.release("ship", "job-1")
+    assert await async_redis.get(KEY) is None
+    assert await single_flight.claim("ship", "job-2") is None
+
+
+@pytest.mark.asyncio
+async def test_claim_sets_expiry(async_redis):
+    await SongSingleFlight(async_redis, ttl_seconds=120).claim("ship", "job-1")
+
+    assert 0 < await async_redis.ttl(KEY) <= 120
+
+
+@pytest.mark.asyncio
+async def test_refresh_restarts_expiry_only_for_owner(async_redis):
+    await SongSingleFlight(async_redis, ttl_seconds=5).claim("ship", "job-1")
+    single_flight = SongSingleFlight(async_redis, ttl_seconds=600)
+
+    await single_flight.refresh("ship", "job-2")
+    assert await async_redis.ttl(KEY) <= 5
+
+    await single_flight.refresh("ship", "job-1")
+    assert await async_redis.ttl(KEY) > 5
+
+
+@pytest.mark.asyncio
+async def test_refresh_does_not_recreate_released_key(async_redis):
+    single_flight = SongSingleFlight(async_redis)
+    await single_flight.claim("ship", "job-1")
+    await single_flight.release("ship", "job-1")
+
+    await single_flight.refresh("ship", "job-1")
+    assert await async_redis.get(KEY) is None
+
+
+@pytest.mark.asyncio
+async def test_worker_and_api_share_ownership(async_redis, sync_redis):
+    worker = WorkerSingleFlight(sync_redis)
+
+    assert worker.claim("ship", "warm-1") is None
+    assert await SongSingleFlight(async_redis).claim("ship", "job-1") == "warm-1"
+
+    worker.release("ship", "warm-1")
+    assert await SongSingleFlight(async_redis).claim("ship", "job-1") is None
+    assert worker.claim("ship", "warm-2") == "job-1"
+
+
+@pytest.mark.asyncio
+async def test_disabled_never_dedups(async_redis, sync_redis, monkeypatch):
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", False)
+
+    assert await SongSingleFlight(async_redis).claim("ship", "job-1") is None
+    assert await SongSingleFlight(async_redis).claim("ship", "job-2") is None
+    assert WorkerSingleFlight(sync_redis).claim("ship", "job-3") is None
+    assert await async_redis.get(KEY) is None
+
+
+def test_redis_errors_do_not_block_generation(monkeypatch):
+    class BrokenRedis:
+        def eval(self, *args):
+            raise ConnectionError("redis is down")
+
+    worker = WorkerSingleFlight(BrokenRedis())
+
+    assert worker.claim("ship", "job-1") is None
+    worker.release("ship", "job-1")
+    worker.refresh("ship", "job-1")
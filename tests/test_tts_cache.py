@@ -0,0 +1,65 @@
+"""
+Tests for the disk-backed TTS cache
+"""
+import os
+import time
+
+import pytest
+from pydub import AudioSegment
+
+from app.config import settings
+from app.services.vocal_service import TTSCache
+
+
+def take(milliseconds=100):
+    return AudioSegment.silent(duration=milliseconds, frame_rate=24000)
+
+
+def test_round_trip_and_miss(tmp_path):
+    cache = TTSCache(directory=tmp_path)
+    audio = take()
+
+    cache.put("a", audio)
+
+    assert cache.get("a").raw_data == audio.raw_data
+    assert cache.get("b") is None
+    assert [path.name for path in tmp_path.iterdir()] == ["a.wav"]  # No temporary files left behind
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    (tmp_path / "a.wav").write_bytes(b"not audio")
+
+    assert TTSCache(directory=tmp_path).get("a") is None
+
+
+def test_eviction_keeps_recently_used_takes(tmp_path):
+    size = len(take().raw_data) + 44  # WAV header
+    cache = TTSCache(directory=tmp_path, max_bytes=int(size * 2.5))
+    cache.put("old", take())
+    cache.put("used", take())
+    past = time.time() - 60
+    os.utime(tmp_path / "old.wav", (past, past))
+    os.utime(tmp_path / "used.wav", (past - 60, past - 60))
+    cache.get("used")  # Touch: now the most recent of the two
+
+    cache.put("new", take())
+
+    assert sorted(path.stem for path in tmp_path.glob("*.wav")) == ["new", "used"]
+    assert cache._size <= cache.max_bytes * 0.9
+
+
+def test_size_counts_takes_already_on_disk(tmp_path):
+    TTSCache(directory=tmp_path).put("a", take())
+
+    assert TTSCache(directory=tmp_path)._size == (tmp_path / "a.wav").stat().st_size
+
+
+def test_key_covers_text_provider_and_voice(monkeypatch):
+    key = TTSCache.make_key("Yo ho", "bark")
+
+    assert key == TTSCache.make_key("Yo ho", "bark")
+    assert key != TTSCache.make_key("Yo ho ho", "bark")
+    assert key != TTSCache.make_key("Yo ho", "elevenlabs")
+
+    monkeypatch.setattr(settings, "BARK_VOICE_PRESET", "v2/en_speaker_6")
+    assert key != TTSCache.make_key("Yo ho", "bark")